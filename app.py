@@ -1,37 +1,417 @@
+import cProfile
+import gc
+import hmac
 import os
-import joblib
+import time
+import uuid
+import zipfile
+from functools import lru_cache
 import numpy as np
-from flask import Flask, render_template, request, redirect, url_for
+from flask import Flask, Response, g, render_template, request, redirect, url_for, jsonify
+from werkzeug.exceptions import HTTPException
 from werkzeug.utils import secure_filename
-from sklearn.metrics.pairwise import cosine_similarity
-from app.utils.file_reader import extract_text_from_stream
+from app.utils.dedup import NEAR_DUPLICATE_THRESHOLD, DuplicateIndex, group_duplicates, minhash_signatures, text_digest
+from app.utils.extraction_pool import ExtractionPool
+from app.utils.feature_store import FeatureStore, prune_versions
+from app.utils.feedback import FeedbackLog, IncrementalTrainer
+from app.utils.file_reader import MAX_CHARS, MAX_PAGES, MAX_SECONDS, supported_extensions
+from app.utils.job_profile import JobProfile
+from app.utils.job_queue import JobQueue
+from app.utils.match_matrix import JobSet, match_matrix
+from app.utils.metrics import DUPLICATES, MODEL_MISSING, REGISTRY, REQUEST_SECONDS, span
+from app.utils.model_loader import ModelStore, vectorizer_versions
 from app.utils.preprocessing import clean_text
+from app.utils.records import TextRecord, expand_records
+from app.utils.scoring import score_resumes
+from app.utils.talent_pool import TalentPool, pool_dim, pool_key, pool_vectors
+from app.utils.text_cache import ResumeCache, content_digest
+from app.utils.upload_spool import MAX_FILE_BYTES, MAX_REQUEST_BYTES, SpooledFile, UploadSpool
 
 app = Flask(__name__, template_folder='app/templates', static_folder='app/static')
 
 # Configuration
 UPLOAD_FOLDER = 'data/resumes'
-ALLOWED_EXTENSIONS = {'pdf', 'docx'}
+# Every format with a registered extractor: PDF, DOCX, TXT, HTML, JSON and JSON Lines
+ALLOWED_EXTENSIONS = supported_extensions()
+# What the endpoints analyzing one resume accept: every format but the multi-resume exports
+DOCUMENT_EXTENSIONS = supported_extensions(documents_only=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs('app/models', exist_ok=True)
 
+# /predict and /api/v1/screen spool uploads into UPLOAD_FOLDER as they arrive, capped per
+# file and per request; Flask rejects any other request body over the request cap
+app.config['UPLOAD_MAX_FILE_MB'] = int(os.environ.get('UPLOAD_MAX_FILE_MB', MAX_FILE_BYTES // 2 ** 20))
+app.config['UPLOAD_MAX_REQUEST_MB'] = int(os.environ.get('UPLOAD_MAX_REQUEST_MB', MAX_REQUEST_BYTES // 2 ** 20))
+app.config['MAX_CONTENT_LENGTH'] = app.config['UPLOAD_MAX_REQUEST_MB'] * 1024 * 1024
+
+# Document extraction runs in a process pool (EXTRACTION_WORKERS=0 extracts on the request thread)
+app.config['EXTRACTION_WORKERS'] = int(os.environ.get('EXTRACTION_WORKERS', os.cpu_count() or 1))
+app.config['EXTRACTION_TIMEOUT'] = float(os.environ.get('EXTRACTION_TIMEOUT', 30))
+app.config['EXTRACTION_MAX_TASKS_PER_WORKER'] = int(os.environ.get('EXTRACTION_MAX_TASKS_PER_WORKER', 100))
+# Per-document budgets: only the first pages/characters of an oversized upload are read
+app.config['EXTRACTION_MAX_PAGES'] = int(os.environ.get('EXTRACTION_MAX_PAGES', MAX_PAGES))
+app.config['EXTRACTION_MAX_CHARS'] = int(os.environ.get('EXTRACTION_MAX_CHARS', MAX_CHARS))
+app.config['EXTRACTION_MAX_SECONDS'] = float(os.environ.get('EXTRACTION_MAX_SECONDS', MAX_SECONDS))
+app.config['EXTRACTION_EARLY_EXIT_CHARS'] = int(os.environ.get('EXTRACTION_EARLY_EXIT_CHARS', 0))
+extraction_pool = ExtractionPool(
+    max_workers=app.config['EXTRACTION_WORKERS'],
+    timeout=app.config['EXTRACTION_TIMEOUT'],
+    max_tasks_per_worker=app.config['EXTRACTION_MAX_TASKS_PER_WORKER'],
+    limits={
+        'max_pages': app.config['EXTRACTION_MAX_PAGES'] or None,
+        'max_chars': app.config['EXTRACTION_MAX_CHARS'] or None,
+        'max_seconds': app.config['EXTRACTION_MAX_SECONDS'] or None,
+        'early_exit_chars': app.config['EXTRACTION_EARLY_EXIT_CHARS'] or None
+    }
+)
+
+# Extracted/cleaned resume text and TF-IDF rows are cached by upload content (empty path disables)
+app.config['RESUME_CACHE_PATH'] = os.environ.get('RESUME_CACHE_PATH', 'data/cache/resumes.sqlite3')
+app.config['RESUME_CACHE_MAX_MB'] = int(os.environ.get('RESUME_CACHE_MAX_MB', 512))
+resume_cache = None
+if app.config['RESUME_CACHE_PATH']:
+    resume_cache = ResumeCache(app.config['RESUME_CACHE_PATH'], max_bytes=app.config['RESUME_CACHE_MAX_MB'] * 1024 * 1024)
+
 # Load Models
-# We use a try-except block in case models aren't trained yet
-try:
-    model = joblib.load('app/models/model.pkl')
-    vectorizer = joblib.load('app/models/vectorizer.pkl')
-except:
-    model = None
-    vectorizer = None
-    print("WARNING: Models not found. Please train the model first.")
-
-def allowed_file(filename):
+# Artifacts load lazily on first use; PRELOAD_MODELS=1 loads them at import
+# (e.g. under gunicorn --preload so forked workers share them). Every
+# MODEL_RELOAD_INTERVAL seconds each process checks app/models/current and
+# swaps in a newly published version (0 disables).
+app.config['MODEL_RELOAD_INTERVAL'] = float(os.environ.get('MODEL_RELOAD_INTERVAL', 10))
+model_store = ModelStore('app/models', watch_interval=app.config['MODEL_RELOAD_INTERVAL'])
+if os.environ.get('PRELOAD_MODELS', '').lower() not in ('', '0', 'false'):
+    model_store.get()
+    # Move everything loaded so far out of the collector's reach, so the
+    # workers' GC passes don't write to (and copy) the pages they inherit
+    gc.freeze()
+
+# Every scored resume is also kept in a searchable talent pool (empty path disables)
+app.config['TALENT_POOL_PATH'] = os.environ.get('TALENT_POOL_PATH', 'data/talent_pool')
+app.config['TALENT_POOL_QUANTIZE'] = os.environ.get('TALENT_POOL_QUANTIZE', '').lower() not in ('', '0', 'false')
+
+@lru_cache(maxsize=1)
+def get_talent_pool(bundle):
+    """
+    The talent pool for a model bundle, in its vectorizer version's own subdirectory.
+    """
+    if not app.config['TALENT_POOL_PATH'] or bundle.jd_index is None:
+        return None
+    dim = pool_dim(bundle.jd_index.matrix.shape[1], bundle.lsa)
+    quantize = app.config['TALENT_POOL_QUANTIZE']
+    return TalentPool(
+        os.path.join(app.config['TALENT_POOL_PATH'], pool_key(bundle.version, dim, quantize)),
+        dim,
+        quantize=quantize,
+        version=bundle.version
+    )
+
+# TF-IDF rows of every scored resume are persisted per vectorizer version (empty path disables)
+app.config['FEATURE_STORE_PATH'] = os.environ.get('FEATURE_STORE_PATH', 'data/features')
+
+def feature_store_key(version):
+    return version[:16]
+
+@lru_cache(maxsize=1)
+def get_feature_store(bundle):
+    """
+    The feature store for a model bundle's vectorizer version.
+    """
+    if not app.config['FEATURE_STORE_PATH'] or bundle.version is None:
+        return None
+    return FeatureStore(
+        os.path.join(app.config['FEATURE_STORE_PATH'], feature_store_key(bundle.version)),
+        version=bundle.version
+    )
+
+# Exact and near-duplicate resumes (MinHash similarity at least DEDUP_THRESHOLD, 0 disables)
+# are scored once per request, and flagged when seen in an earlier request (empty path disables)
+app.config['DEDUP_THRESHOLD'] = float(os.environ.get('DEDUP_THRESHOLD', NEAR_DUPLICATE_THRESHOLD))
+app.config['DEDUP_INDEX_PATH'] = os.environ.get('DEDUP_INDEX_PATH', 'data/dedup')
+duplicate_index = None
+if app.config['DEDUP_THRESHOLD'] and app.config['DEDUP_INDEX_PATH']:
+    duplicate_index = DuplicateIndex(app.config['DEDUP_INDEX_PATH'])
+
+# Recruiter corrections of predicted categories are logged (cleaned text, label and TF-IDF row)
+# and learned with partial_fit on the current vectorizer, in the background every
+# FEEDBACK_TRAIN_INTERVAL seconds (0, the default, trains only on request; empty path disables)
+app.config['FEEDBACK_PATH'] = os.environ.get('FEEDBACK_PATH', 'data/feedback')
+app.config['FEEDBACK_TRAIN_INTERVAL'] = float(os.environ.get('FEEDBACK_TRAIN_INTERVAL', 0))
+app.config['FEEDBACK_MIN_ROWS'] = int(os.environ.get('FEEDBACK_MIN_ROWS', 20))
+feedback_log = None
+incremental_trainer = None
+if app.config['FEEDBACK_PATH']:
+    feedback_log = FeedbackLog(app.config['FEEDBACK_PATH'])
+    incremental_trainer = IncrementalTrainer(
+        model_store.model_dir,
+        feedback_log,
+        interval=app.config['FEEDBACK_TRAIN_INTERVAL'],
+        min_rows=app.config['FEEDBACK_MIN_ROWS'],
+        # Swap the new version in here at once; other workers pick it up through their watcher
+        on_publish=lambda name: model_store.reload()
+    )
+
+def add_to_talent_pool(bundle, digests, filenames, resume_matrix):
+    talent_pool = get_talent_pool(bundle)
+    if talent_pool is None or not len(digests):
+        return
+    try:
+        talent_pool.add(digests, filenames, pool_vectors(resume_matrix, bundle.lsa))
+    except Exception as e:
+        print(f"Error adding resumes to the talent pool: {e}")
+
+def allowed_file(filename, extensions=ALLOWED_EXTENSIONS):
     return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+           filename.rsplit('.', 1)[1].lower() in extensions
+
+def open_spool():
+    """
+    A fresh upload spool for one request, with the configured size caps.
+    """
+    return UploadSpool(
+        app.config['UPLOAD_FOLDER'],
+        max_file_bytes=app.config['UPLOAD_MAX_FILE_MB'] * 1024 * 1024,
+        max_request_bytes=app.config['UPLOAD_MAX_REQUEST_MB'] * 1024 * 1024,
+        accept=allowed_file
+    )
+
+def load_resumes(uploads):
+    """
+    Takes (filename, data) uploads, data being the bytes or a SpooledFile,
+    and returns them as a list with their content digests and cleaned texts
+    (None where a file could not be read), in upload order.
+    uploads may be a generator, e.g. an UploadSpool still receiving the
+    request: each file not in the resume cache goes to the extraction pool
+    as soon as it is produced. Cached files skip extraction and cleaning.
+    Structured exports (JSON, JSON Lines) are split into one entry per
+    resume record, whose text is read straight from the record.
+    """
+    received = []
+    digests = []
+    cached = {}
+    to_extract = []
+
+    def uncached():
+        for filename, data in expand_records(uploads):
+            digest = data.digest if isinstance(data, (SpooledFile, TextRecord)) else content_digest(data)
+            received.append((filename, data))
+            digests.append(digest)
+            if resume_cache:
+                cached.update(resume_cache.get_texts([digest]))
+            if digest not in cached:
+                to_extract.append(len(received) - 1)
+                yield filename, data
+
+    with span('extract'):
+        texts = extraction_pool.extract_all(uncached())
+
+    cleaned_resumes = [cached[digest][1] if digest in cached else None for digest in digests]
+    new_entries = []
+    with span('clean_text'):
+        for i, resume_text in zip(to_extract, texts):
+            if resume_text is None:
+                continue
+            try:
+                cleaned_resumes[i] = clean_text(resume_text)
+            except Exception as e:
+                print(f"Error reading file {received[i][0]}: {e}")
+                continue
+            new_entries.append((digests[i], resume_text, cleaned_resumes[i]))
+
+    if resume_cache and new_entries:
+        resume_cache.put_texts(new_entries)
+    return received, digests, cleaned_resumes
+
+def vectorize_resumes(bundle, digests, cleaned_resumes):
+    """
+    TF-IDF rows for cleaned resumes, served from the feature store (or the
+    resume cache) when possible.
+    """
+    with span('transform'):
+        feature_store = get_feature_store(bundle)
+        if feature_store is not None:
+            return feature_store.transform(bundle.vectorizer, digests, cleaned_resumes)
+        if resume_cache:
+            return resume_cache.transform(bundle.vectorizer, bundle.version, digests, cleaned_resumes)
+        return bundle.vectorizer.transform(cleaned_resumes)
+
+def deduplicate(filenames, cleaned_resumes):
+    """
+    Groups the exact and near-duplicate resumes of a batch. Returns the
+    indexes of the resumes to score (the first of every group) and, for
+    each of them, what to flag in its result: the other files of its group
+    and the most similar resume screened by an earlier request, if any.
+    """
+    with span('dedup'):
+        signatures = minhash_signatures(cleaned_resumes)
+        group, similarities = group_duplicates(cleaned_resumes, signatures, app.config['DEDUP_THRESHOLD'])
+        keep = np.flatnonzero(group == np.arange(len(group)))
+        flags = {i: {'duplicates': [], 'seen_before': None} for i in keep}
+        for i in np.flatnonzero(group != np.arange(len(group))):
+            flags[group[i]]['duplicates'].append(
+                {'filename': filenames[i], 'similarity': round(float(similarities[i]), 3)})
+            DUPLICATES.inc(kind='exact' if cleaned_resumes[i] == cleaned_resumes[group[i]] else 'near')
+
+        if duplicate_index is not None:
+            digests = [text_digest(cleaned_resumes[i]) for i in keep]
+            try:
+                matches = duplicate_index.query(signatures[keep], app.config['DEDUP_THRESHOLD'])
+                duplicate_index.add(digests, [filenames[i] for i in keep], signatures[keep])
+            except Exception as e:
+                print(f"Error checking resumes against the duplicate index: {e}")
+                matches = [None] * len(keep)
+            for i, match in zip(keep, matches):
+                if match is not None:
+                    _, filename, similarity = match
+                    flags[i]['seen_before'] = {'filename': filename, 'similarity': round(similarity, 3)}
+                    DUPLICATES.inc(kind='seen_before')
+    return keep, [flags[i] for i in keep]
+
+@lru_cache(maxsize=32)
+def get_job_profile(bundle, job_description):
+    """
+    JobProfile of a job description for a model bundle. Cached, so every
+    batch of an API job and repeated submissions of a JD share one profile.
+    """
+    with span('job_profile'):
+        return JobProfile(clean_text(job_description), bundle.vectorizer, bundle.lsa)
+
+def clear_model_caches(bundle):
+    """
+    Drops everything cached for the previous model once a new one is swapped
+    in. Cached TF-IDF rows are keyed by vectorizer version and need no flush.
+    """
+    get_job_profile.cache_clear()
+    get_talent_pool.cache_clear()
+    get_feature_store.cache_clear()
+
+model_store.on_swap(clear_model_caches)
+
+def screen_uploads(bundle, job_description, uploads, top_k=None, offset=0):
+    """
+    Scores (filename, data) uploads against a job description.
+    Returns (results, failed_filenames, total): the results ranked
+    offset .. offset+top_k (all by default) and how many distinct resumes
+    were scored.
+    """
+    return rank_resumes(bundle, job_description, load_resumes(uploads), top_k, offset)
+
+def distinct_resumes(loaded):
+    """
+    The readable resumes of load_resumes' return value, one per group of
+    duplicates. Returns (filenames, digests, cleaned_resumes, flags,
+    failed_filenames); flags (None when deduplication is off) holds what to
+    add to each resume's result.
+    """
+    filenames = []
+    digests = []
+    cleaned_resumes = []
+    failed = []
+    for (filename, _), digest, cleaned_resume in zip(*loaded):
+        if cleaned_resume is None:
+            failed.append(filename)
+            continue
+        filenames.append(filename)
+        digests.append(digest)
+        cleaned_resumes.append(cleaned_resume)
+
+    # Each distinct resume is scored once; its copies are listed in its result
+    flags = None
+    if app.config['DEDUP_THRESHOLD'] and cleaned_resumes:
+        keep, flags = deduplicate(filenames, cleaned_resumes)
+        filenames = [filenames[i] for i in keep]
+        digests = [digests[i] for i in keep]
+        cleaned_resumes = [cleaned_resumes[i] for i in keep]
+    return filenames, digests, cleaned_resumes, flags, failed
+
+def rank_resumes(bundle, job_description, loaded, top_k=None, offset=0):
+    """
+    screen_uploads for resumes already read by load_resumes (its return value).
+    """
+    model, vectorizer = bundle.model, bundle.vectorizer
+    filenames, digests, cleaned_resumes, flags, failed = distinct_resumes(loaded)
+
+    # Preprocess Job Description
+    job_profile = get_job_profile(bundle, job_description) if vectorizer else None
+    cleaned_jd = job_profile.cleaned if job_profile else clean_text(job_description)
+
+    # Predict Categories and Match Scores against Provided JD
+    resume_matrix = None
+    if model and vectorizer and cleaned_resumes:
+        resume_matrix = vectorize_resumes(bundle, digests, cleaned_resumes)
+        add_to_talent_pool(bundle, digests, filenames, resume_matrix)
+    results = score_resumes(filenames, cleaned_resumes, cleaned_jd, model, vectorizer, resume_matrix,
+                            top_k=top_k, offset=offset, job_profile=job_profile, extras=flags)
+    return results, failed, len(cleaned_resumes)
+
+# Bulk API jobs are scored in the background, a batch of resumes at a time
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['JOB_BATCH_SIZE'] = int(os.environ.get('JOB_BATCH_SIZE', 16))
+app.config['JOB_HISTORY'] = int(os.environ.get('JOB_HISTORY', 100))
+job_queue = JobQueue(
+    lambda bundle, job_description, uploads, top_k: screen_uploads(bundle, job_description, uploads, top_k)[:2],
+    workers=app.config['JOB_WORKERS'],
+    batch_size=app.config['JOB_BATCH_SIZE'],
+    max_jobs=app.config['JOB_HISTORY']
+)
 
 from app.utils.sample_jds import SAMPLE_JDS
 
+# Every request is timed into the /metrics histograms. With PROFILE_REQUESTS=1,
+# a request sent with the header "X-Profile: 1" is also run under cProfile and
+# its stats are written to PROFILE_DIR (path returned in X-Profile-Output)
+app.config['PROFILE_REQUESTS'] = os.environ.get('PROFILE_REQUESTS', '').lower() not in ('', '0', 'false')
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'data/profiles')
+
+# Admin actions that delete or rewrite stored data (pruning, deleting, compacting, clustering,
+# publishing models from feedback) need "Authorization: Bearer <ADMIN_TOKEN>"; unset refuses them
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN', '')
+
+def admin_denied():
+    """
+    A 403 response unless the request carries the admin token, else None.
+    """
+    token = app.config['ADMIN_TOKEN']
+    if not token:
+        return jsonify({'error': 'set ADMIN_TOKEN to enable this action'}), 403
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return jsonify({'error': 'this action needs the admin token'}), 403
+    return None
+
+@app.before_request
+def start_request():
+    g.request_start = time.perf_counter()
+    if incremental_trainer is not None:
+        incremental_trainer.start()
+    if app.config['PROFILE_REQUESTS'] and request.headers.get('X-Profile') == '1':
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@app.after_request
+def finish_request(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+        path = os.path.join(
+            app.config['PROFILE_DIR'],
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint}-{uuid.uuid4().hex[:8]}.prof"
+        )
+        profiler.dump_stats(path)
+        response.headers['X-Profile-Output'] = path
+    REQUEST_SECONDS.observe(time.perf_counter() - g.request_start,
+                            endpoint=request.endpoint or 'unmatched', status=response.status_code)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """
+    Request, stage and extraction metrics of this process in the Prometheus
+    text exposition format.
+    """
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -42,72 +422,33 @@ def ats_scanner():
 
 @app.route('/predict', methods=['POST'])
 def predict():
-    if 'resume_files' not in request.files:
-        return redirect(request.url)
-    
-    files = request.files.getlist('resume_files')
-    job_description = request.form.get('job_description', '')
-    
-    results = []
-    
-    # Preprocess Job Description
-    cleaned_jd = clean_text(job_description)
+    # The body is parsed as it arrives: every resume is spooled to disk and handed
+    # to the extraction pool while the later ones are still uploading
+    spool = open_spool()
     try:
-        if vectorizer:
-            jd_vector = vectorizer.transform([cleaned_jd])
-        else:
-            jd_vector = None
-    except Exception as e:
-        print(f"Error transforming JD: {e}")
-        jd_vector = None
+        try:
+            loaded = load_resumes(spool.files(request.stream, request.content_type))
+        except zipfile.BadZipFile as e:
+            return str(e), 400
+        if 'resume_files' not in spool.file_fields:
+            return redirect(request.url)
 
-    for file in files:
-        if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            try:
-                resume_text = extract_text_from_stream(file, filename)
-                cleaned_resume = clean_text(resume_text)
-            except Exception as e:
-                print(f"Error reading file {filename}: {e}")
-                continue
-            
-            # Predict Category
-            category = "Unknown"
-            if model and vectorizer:
-                resume_vector = vectorizer.transform([cleaned_resume])
-                prediction = model.predict(resume_vector)
-                category = prediction[0]
-                
-                # Match Score against Provided JD (Old/Standard Method)
-                if jd_vector is not None:
-                    score = cosine_similarity(jd_vector, resume_vector)[0][0] * 100
-                    score = round(score, 2)
-                    
-                    # Calculate "What to Add" (Missing Keywords) based on User JD
-                    # We use the evaluator helper but ignore its score, using only the missing terms
-                    evaluator = ATSEvaluator(cleaned_resume, cleaned_jd)
-                    _, missing_keywords = evaluator.calculate_keyword_match()
-                else:
-                    score = 0
-                    missing_keywords = []
-            else:
-                score = 0
-                missing_keywords = []
-            
-            results.append({
-                'filename': filename,
-                'category': category,
-                'score': score,
-                'missing_keywords': missing_keywords,
-                'excerpt': cleaned_resume[:200] + "..." 
-            })
-    
-    # Rank resumes by score
-    results.sort(key=lambda x: x['score'], reverse=True)
-    
-    return render_template('result.html', results=results, job_description=job_description)
+        job_description = spool.form.get('job_description', '')
+        # Optional: only keep (and fully analyse) the best top_k candidates
+        top_k = spool.form.get('top_k', type=int)
+        if top_k is not None and top_k <= 0:
+            top_k = None
+        bundle = model_store.get()
+        if not (bundle.model and bundle.vectorizer):
+            MODEL_MISSING.inc(endpoint='predict')
 
-from app.utils.ats_evaluator import ATSEvaluator
+        # Results come back ranked by score
+        results, _, total = rank_resumes(bundle, job_description, loaded, top_k)
+    finally:
+        spool.cleanup()
+    
+    with span('render'):
+        return render_template('result.html', results=results, total=total, job_description=job_description)
 
 @app.route('/analyze_ats', methods=['POST'])
 def analyze_ats():
@@ -118,47 +459,59 @@ def analyze_ats():
     if file.filename == '':
         return redirect('/ats')
 
-    if file and allowed_file(file.filename):
+    if file and allowed_file(file.filename, DOCUMENT_EXTENSIONS):
         filename = secure_filename(file.filename)
-        try:
-            resume_text = extract_text_from_stream(file, filename)
-            cleaned_resume = clean_text(resume_text)
-        except Exception as e:
-            print(f"Error reading file {filename}: {e}")
+        _, digests, cleaned_resumes = load_resumes([(filename, file.read())])
+        if len(cleaned_resumes) != 1:
+            return "Upload a single resume", 400
+        cleaned_resume = cleaned_resumes[0]
+        if cleaned_resume is None:
             return "Error reading file", 500
         
         # Logic for ATS Analysis
+        bundle = model_store.get()
+        model, vectorizer = bundle.model, bundle.vectorizer
         category = "Unknown"
         score = 0
         recommended_jd = "Not Available"
         comparisons = {}
         details = {}
         
+        category_matches = []
+        
         if model and vectorizer:
-            resume_vector = vectorizer.transform([cleaned_resume])
+            resume_vector = vectorize_resumes(bundle, digests, cleaned_resumes)
+            add_to_talent_pool(bundle, digests, [filename], resume_vector)
             
             # AI Prediction & Probability (The "Brain")
-            prediction = model.predict(resume_vector)
-            category = prediction[0]
-            
-            # Get the confidence score (Probability)
-            # This is the "Real" AI prediction value
-            probs = model.predict_proba(resume_vector)[0]
+            with span('predict'):
+                prediction = model.predict(resume_vector)
+                category = prediction[0]
+                
+                # Get the confidence score (Probability)
+                # This is the "Real" AI prediction value
+                probs = model.predict_proba(resume_vector)[0]
             ai_confidence = round(max(probs) * 100, 1)
             
+            # Semantic Match against every category's Sample JD (one sparse product)
+            jd_index = bundle.jd_index
+            with span('cosine_similarity'):
+                semantic_scores = jd_index.score_all(resume_vector)
+            category_matches = sorted(
+                ((cat, round(val, 1)) for cat, val in semantic_scores.items()),
+                key=lambda x: x[1], reverse=True
+            )
+            
             # Get Sample JD
             recommended_jd = SAMPLE_JDS.get(category, "")
             
-            if recommended_jd:
-                clean_sample_jd = clean_text(recommended_jd)
-                sample_jd_vector = vectorizer.transform([clean_sample_jd])
-                
+            if recommended_jd and category in jd_index:
                 # 1. Semantic Match (Vector Similarity)
-                semantic_score = cosine_similarity(sample_jd_vector, resume_vector)[0][0] * 100
+                semantic_score = semantic_scores[category]
                 
                 # 2. Rule-Based Detailed Analysis (Structure, Keywords, Impact)
-                evaluator = ATSEvaluator(cleaned_resume, clean_sample_jd)
-                ats_analysis = evaluator.evaluate()
+                with span('ats_rules'):
+                    ats_analysis = jd_index.profiles[category].rules.evaluate(cleaned_resume)
                 
                 rule_based_score = ats_analysis['overall_score']
                 keyword_score = ats_analysis['detail_scores']['keywords']
@@ -185,16 +538,336 @@ def analyze_ats():
             else:
                 recommended_jd = "No standard job description available for this category yet."
                 score = 0
+        else:
+            MODEL_MISSING.inc(endpoint='analyze_ats')
         
-        return render_template('ats_result.html', 
-                               score=score, 
-                               category=category, 
-                               recommended_jd=recommended_jd,
-                               filename=filename,
-                               comparisons=comparisons,
-                               details=details)
+        with span('render'):
+            return render_template('ats_result.html', 
+                                   score=score, 
+                                   category=category, 
+                                   recommended_jd=recommended_jd,
+                                   filename=filename,
+                                   comparisons=comparisons,
+                                   details=details,
+                                   category_matches=category_matches)
     
     return redirect('/ats')
 
+@app.route('/admin/cache')
+def cache_stats():
+    if not resume_cache:
+        return jsonify({'enabled': False})
+    return jsonify(dict(resume_cache.stats(), enabled=True))
+
+@app.route('/admin/model', methods=['GET', 'POST'])
+def model_status():
+    """
+    The active model version and when it was loaded. POST reloads now
+    instead of waiting for the watcher.
+    """
+    swapped = model_store.reload() if request.method == 'POST' else False
+    bundle = model_store.get()
+    return jsonify({
+        'version': bundle.name,
+        'vectorizer_version': bundle.version,
+        'model': type(bundle.model).__name__ if bundle.model is not None else None,
+        'vectorizer': type(bundle.vectorizer).__name__ if bundle.vectorizer is not None else None,
+        'lsa_components': bundle.lsa.n_components if bundle.lsa is not None else None,
+        'loaded_at': bundle.loaded_at,
+        'load_seconds': round(bundle.load_seconds, 3),
+        'reloads': model_store.reloads,
+        'swapped': swapped
+    })
+
+@app.route('/api/v1/feedback', methods=['POST'])
+def api_feedback():
+    """
+    Records a recruiter's correction of a resume's predicted category, for
+    the incremental trainer. Takes the right category and the resume,
+    either uploaded as resume_file or as digest, the SHA-256 of a file
+    screened before (its text is served from the resume cache).
+    """
+    if feedback_log is None:
+        return jsonify({'error': 'feedback is disabled'}), 404
+    bundle = model_store.get()
+    if not (bundle.model and bundle.vectorizer):
+        MODEL_MISSING.inc(endpoint='api_feedback')
+        return jsonify({'error': 'the model is not trained'}), 503
+    category = request.form.get('category', '').strip()
+    classes = [str(c) for c in bundle.model.classes_]
+    if category not in classes:
+        return jsonify({'error': f"category must be one of: {', '.join(classes)}"}), 400
+
+    file = request.files.get('resume_file')
+    digest = request.form.get('digest', '').strip().lower()
+    if file and file.filename:
+        if not allowed_file(file.filename, DOCUMENT_EXTENSIONS):
+            return jsonify({'error': f"resume_file must be one of: {', '.join(sorted(DOCUMENT_EXTENSIONS))}"}), 400
+        filename = secure_filename(file.filename)
+        _, _, cleaned_resumes = load_resumes([(filename, file.read())])
+        if len(cleaned_resumes) != 1:
+            return jsonify({'error': 'resume_file must hold a single resume'}), 400
+        cleaned_resume = cleaned_resumes[0]
+    elif digest:
+        cached = resume_cache.get_texts([digest]) if resume_cache else {}
+        if digest not in cached:
+            return jsonify({'error': 'unknown digest; upload the resume as resume_file instead'}), 404
+        filename, cleaned_resume = None, cached[digest][1]
+    else:
+        return jsonify({'error': 'resume_file or digest is required'}), 400
+    if not cleaned_resume:
+        return jsonify({'error': 'no text could be read from the resume'}), 422
+
+    # The TF-IDF row is stored now, so training on the correction does not vectorize it again
+    key = text_digest(cleaned_resume)
+    row = feedback_log.features(bundle.version).transform(bundle.vectorizer, [key], [cleaned_resume])
+    predicted = str(bundle.model.predict(row)[0])
+    feedback_log.append([{
+        'digest': key,
+        'filename': filename,
+        'category': category,
+        'predicted': predicted,
+        'model_version': bundle.name,
+        'cleaned': cleaned_resume,
+        'created_at': time.time()
+    }])
+    return jsonify({'digest': key, 'category': category, 'predicted': predicted}), 201
+
+@app.route('/admin/feedback', methods=['GET', 'POST'])
+def feedback_admin():
+    """
+    Feedback log size and the incremental trainer's last round. POST
+    action=train runs a round now, on any new feedback.
+    """
+    if incremental_trainer is None:
+        return jsonify({'enabled': False})
+    result = incremental_trainer.last_result
+    if request.method == 'POST':
+        if request.form.get('action') != 'train':
+            return jsonify({'error': "action must be 'train'"}), 400
+        denied = admin_denied()
+        if denied:
+            return denied
+        result = incremental_trainer.train(force=True)
+    return jsonify({
+        'enabled': True,
+        'feedback_bytes': feedback_log.size(),
+        'train_interval': incremental_trainer.interval,
+        'min_rows': incremental_trainer.min_rows,
+        'last_result': result
+    })
+
+@app.route('/api/v1/screen', methods=['POST'])
+def api_screen():
+    """
+    Queues a bulk screening job. Takes a job_description form field and
+    resumes as resume_files (any supported format or zip, repeatable) and/or zip
+    archives in resume_zip. An optional top_k keeps only the best top_k
+    candidates.
+    Returns the job ID immediately.
+    """
+    # Resumes are spooled to disk as they arrive and stay there until the job is done
+    spool = open_spool()
+
+    def reject(error, status=400):
+        spool.cleanup()
+        return jsonify({'error': error}), status
+
+    try:
+        # Exports are split into their records here, so job progress and batches count resumes
+        uploads = list(expand_records(spool.files(request.stream, request.content_type, archive_fields=('resume_zip',))))
+    except zipfile.BadZipFile as e:
+        return reject(str(e))
+    except HTTPException as e:
+        # Upload over the size caps (413) or a malformed body (400)
+        return reject(e.description, e.code)
+
+    job_description = spool.form.get('job_description', '').strip()
+    if not job_description:
+        return reject('job_description is required')
+    top_k = spool.form.get('top_k', type=int)
+    if top_k is not None and top_k <= 0:
+        return reject('top_k must be a positive integer')
+    if not uploads:
+        return reject('no resumes in a supported format were uploaded')
+
+    bundle = model_store.get()
+    if not (bundle.model and bundle.vectorizer):
+        MODEL_MISSING.inc(endpoint='api_screen')
+    job = job_queue.submit(job_description, uploads, top_k, model=bundle, cleanup=spool.cleanup)
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'total': job.total,
+        'status_url': url_for('api_job', job_id=job.id)
+    }), 202
+
+@app.route('/api/v1/match', methods=['POST'])
+def api_match():
+    """
+    Scores one pool of resumes against several job descriptions at once.
+    Takes job_description repeated once per JD (with optional job_title
+    fields in the same order) and resumes as in /api/v1/screen; each resume
+    is parsed once for all the JDs. An optional top_k limits every JD's
+    ranking (default 10).
+    Returns each JD's ranking, every resume's best-fit JD, and the
+    assignment of one distinct resume per JD with the highest total score.
+    """
+    spool = open_spool()
+    try:
+        try:
+            loaded = load_resumes(spool.files(request.stream, request.content_type, archive_fields=('resume_zip',)))
+        except zipfile.BadZipFile as e:
+            return jsonify({'error': str(e)}), 400
+        except HTTPException as e:
+            # Upload over the size caps (413) or a malformed body (400)
+            return jsonify({'error': e.description}), e.code
+
+        job_descriptions = [jd.strip() for jd in spool.form.getlist('job_description')]
+        if not job_descriptions or not all(job_descriptions):
+            return jsonify({'error': 'job_description is required, once per job'}), 400
+        titles = spool.form.getlist('job_title')
+        titles += [f"Job {i + 1}" for i in range(len(titles), len(job_descriptions))]
+        top_k = spool.form.get('top_k', 10, type=int)
+        if top_k is None or top_k <= 0:
+            return jsonify({'error': 'top_k must be a positive integer'}), 400
+        if not loaded[0]:
+            return jsonify({'error': 'no resumes in a supported format were uploaded'}), 400
+
+        bundle = model_store.get()
+        if not (bundle.model and bundle.vectorizer):
+            MODEL_MISSING.inc(endpoint='api_match')
+            return jsonify({'error': 'the model is not trained'}), 503
+        filenames, digests, cleaned_resumes, flags, failed = distinct_resumes(loaded)
+    finally:
+        spool.cleanup()
+
+    jobs = [{'index': m, 'title': title, 'results': []} for m, title in enumerate(titles[:len(job_descriptions)])]
+    best_fit, assignment = [], []
+    if cleaned_resumes:
+        resume_matrix = vectorize_resumes(bundle, digests, cleaned_resumes)
+        job_set = JobSet([get_job_profile(bundle, jd) for jd in job_descriptions], resume_matrix.shape[1])
+        add_to_talent_pool(bundle, digests, filenames, resume_matrix)
+        rankings, best_jobs, assigned = match_matrix(job_set, cleaned_resumes, resume_matrix, bundle.model, top_k)
+        for job, results in zip(jobs, rankings):
+            for result in results:
+                i = result.pop('resume')
+                job['results'].append({'filename': filenames[i], **result, **(flags[i] if flags else {})})
+        best_fit = [{'filename': filenames[i], 'job': m, 'score': score} for i, (m, score) in enumerate(best_jobs)]
+        assignment = [{'job': m, 'filename': filenames[i], 'score': score} for m, i, score in assigned]
+    return jsonify({
+        'jobs': jobs,
+        'best_fit': best_fit,
+        'assignment': assignment,
+        'failed': failed,
+        'total': len(cleaned_resumes)
+    })
+
+@app.route('/api/v1/jobs/<job_id>')
+def api_job(job_id):
+    """
+    Progress of a screening job and the results ranked so far; results grow
+    as batches finish. ?offset=N&limit=M pages through the ranking.
+    """
+    job = job_queue.get(
+        job_id,
+        offset=max(0, request.args.get('offset', 0, type=int)),
+        limit=request.args.get('limit', type=int)
+    )
+    if job is None:
+        return jsonify({'error': 'unknown job'}), 404
+    return jsonify(job)
+
+@app.route('/api/v1/talent_pool/search', methods=['POST'])
+def api_talent_pool_search():
+    """
+    Reverse search: the stored resumes that best match a job_description.
+    Optional top_n (default 10) and nprobe (clusters to scan once the pool
+    has an ANN index; exact search otherwise).
+    """
+    job_description = request.form.get('job_description', '').strip()
+    if not job_description:
+        return jsonify({'error': 'job_description is required'}), 400
+    bundle = model_store.get()
+    talent_pool = get_talent_pool(bundle)
+    if talent_pool is None:
+        return jsonify({'error': 'the talent pool is disabled or no model is loaded'}), 503
+
+    job_profile = get_job_profile(bundle, job_description)
+    if job_profile.vector is None:
+        return jsonify({'error': 'could not vectorize the job description'}), 400
+    matches = talent_pool.search(
+        pool_vectors(job_profile.vector, bundle.lsa)[0],
+        top_n=max(1, request.form.get('top_n', 10, type=int)),
+        nprobe=request.form.get('nprobe', type=int)
+    )
+    return jsonify({
+        'results': [{'digest': digest, 'filename': name, 'score': score} for digest, name, score in matches]
+    })
+
+@app.route('/api/v1/talent_pool/<digest>', methods=['DELETE'])
+def api_talent_pool_delete(digest):
+    denied = admin_denied()
+    if denied:
+        return denied
+    talent_pool = get_talent_pool(model_store.get())
+    if talent_pool is None:
+        return jsonify({'error': 'the talent pool is disabled or no model is loaded'}), 503
+    try:
+        removed = talent_pool.delete([digest])
+    except ValueError:
+        return jsonify({'error': 'digest must be a SHA-256 hex string'}), 400
+    if not removed:
+        return jsonify({'error': 'unknown resume'}), 404
+    return jsonify({'deleted': digest})
+
+@app.route('/admin/features', methods=['GET', 'POST'])
+def feature_store_admin():
+    """
+    Feature store stats. POST action=compact merges its segments into one;
+    action=prune deletes the stores of vectorizers no published version uses.
+    """
+    bundle = model_store.get()
+    feature_store = get_feature_store(bundle)
+    if feature_store is None:
+        return jsonify({'enabled': False})
+    pruned = []
+    if request.method == 'POST':
+        action = request.form.get('action')
+        if action not in ('compact', 'prune'):
+            return jsonify({'error': 'action must be compact or prune'}), 400
+        denied = admin_denied()
+        if denied:
+            return denied
+        if action == 'compact':
+            feature_store.compact()
+        else:
+            # Workers still serving an older published version keep writing to its store
+            keep = {feature_store_key(version) for version in vectorizer_versions(model_store.model_dir)}
+            pruned = prune_versions(app.config['FEATURE_STORE_PATH'], keep | {feature_store_key(bundle.version)})
+    return jsonify(dict(feature_store.stats(), enabled=True, version=bundle.version, pruned=pruned))
+
+@app.route('/admin/talent_pool', methods=['GET', 'POST'])
+def talent_pool_admin():
+    """
+    Pool statistics. POST action=build_ann (optional n_lists) clusters the
+    pool for approximate search; action=compact drops deleted rows.
+    """
+    talent_pool = get_talent_pool(model_store.get())
+    if talent_pool is None:
+        return jsonify({'enabled': False})
+    if request.method == 'POST':
+        action = request.form.get('action')
+        if action not in ('build_ann', 'compact'):
+            return jsonify({'error': 'action must be build_ann or compact'}), 400
+        denied = admin_denied()
+        if denied:
+            return denied
+        if action == 'build_ann':
+            talent_pool.build_ann(n_lists=request.form.get('n_lists', type=int))
+        else:
+            talent_pool.compact()
+    return jsonify(dict(talent_pool.stats(), enabled=True))
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
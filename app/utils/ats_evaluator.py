@@ -1,17 +1,79 @@
 
 import re
 
+# Common headers
+SECTIONS = {
+    'education': ['education', 'academic', 'qualification'],
+    'experience': ['experience', 'work history', 'employment'],
+    'skills': ['skills', 'technologies', 'competencies', 'expertise'],
+    'projects': ['projects', 'initiatives']
+}
+
+# Strong action verbs often checked by ATS/ResumeWorded
+ACTION_VERBS = [
+    "developed", "designed", "implemented", "managed", "led", 
+    "created", "achieved", "improved", "increased", "resolved",
+    "collaborated", "orchestrated", "engineered", "optimized"
+]
+
+EMAIL_PATTERN = re.compile(r'[\w\.-]+@[\w\.-]+')
+PHONE_PATTERN = re.compile(r'(\d{10})|(\+\d{1,2}\s?\d{10})')
+KEYWORD_PATTERN = re.compile(r'\b[a-z]{4,}\b')
+# PHONE_PATTERN after stripping '-' and ' ' matches exactly when ten digits are
+# separated only by those characters, which this finds without copying the text
+SPACED_PHONE_PATTERN = re.compile(r'\d(?:[- ]*\d){9}')
+
+def extract_keywords(text):
+    """
+    Keyword set used for JD matching (lowercase words of 4+ letters).
+    """
+    return set(KEYWORD_PATTERN.findall(text.lower()))
+
+def build_report(contact, sections, verb_count, keyword_score, missing_keywords):
+    """
+    Combines the individual checks into the weighted ATS report.
+    """
+    verb_score = min(verb_count * 5, 100) # Cap at 20 verbs
+
+    # Calculate Weighted ATS Score
+    # Structure (Contact + Sections): 25%
+    # Impact (Verbs): 15%
+    # Content (Keywords): 60%
+    
+    structure_points = sum(contact.values()) + sum(sections.values())
+    max_structure = len(contact) + len(sections)
+    structure_score = (structure_points / max_structure) * 100
+    
+    final_score = (structure_score * 0.25) + (verb_score * 0.15) + (keyword_score * 0.60)
+    
+    return {
+        'overall_score': round(final_score, 1),
+        'detail_scores': {
+            'structure': round(structure_score, 1),
+            'impact': round(verb_score, 1),
+            'keywords': round(keyword_score, 1)
+        },
+        'checks': {
+            'contact': contact,
+            'sections': sections,
+            'verb_count': verb_count
+        },
+        'missing_keywords': missing_keywords
+    }
+
 class ATSEvaluator:
-    def __init__(self, resume_text, jd_text):
+    def __init__(self, resume_text, jd_text, jd_keywords=None):
         self.resume_text = resume_text.lower()
         self.jd_text = jd_text.lower()
         self.raw_text = resume_text # Case sensitive for some checks if needed
+        # Precomputed extract_keywords(jd_text), e.g. from the sample JD index
+        self.jd_keywords = jd_keywords
         
     def check_contact_info(self):
         # Email Regex
-        email = re.search(r'[\w\.-]+@[\w\.-]+', self.resume_text)
+        email = EMAIL_PATTERN.search(self.resume_text)
         # Phone Regex (Simple)
-        phone = re.search(r'(\d{10})|(\+\d{1,2}\s?\d{10})', self.resume_text.replace("-", "").replace(" ", ""))
+        phone = PHONE_PATTERN.search(self.resume_text.replace("-", "").replace(" ", ""))
         # LinkedIn/Links
         linkedin = "linkedin.com" in self.resume_text
         
@@ -22,37 +84,22 @@ class ATSEvaluator:
         }
         
     def check_sections(self):
-        # Common headers
-        sections = {
-            'education': ['education', 'academic', 'qualification'],
-            'experience': ['experience', 'work history', 'employment'],
-            'skills': ['skills', 'technologies', 'competencies', 'expertise'],
-            'projects': ['projects', 'initiatives']
-        }
-        
         found_sections = {}
-        for sec, keywords in sections.items():
+        for sec, keywords in SECTIONS.items():
             found = any(k in self.resume_text for k in keywords)
             found_sections[sec] = found
             
         return found_sections
         
     def check_action_verbs(self):
-        # Strong action verbs often checked by ATS/ResumeWorded
-        verbs = [
-            "developed", "designed", "implemented", "managed", "led", 
-            "created", "achieved", "improved", "increased", "resolved",
-            "collaborated", "orchestrated", "engineered", "optimized"
-        ]
-        
-        count = sum(1 for v in verbs if v in self.resume_text)
+        count = sum(1 for v in ACTION_VERBS if v in self.resume_text)
         score = min(count * 5, 100) # Cap at 20 verbs
         return score, count
         
     def calculate_keyword_match(self):
         # Extract keywords from JD (simple length filter > 3)
-        jd_words = set(re.findall(r'\b[a-z]{4,}\b', self.jd_text))
-        resume_words = set(re.findall(r'\b[a-z]{4,}\b', self.resume_text))
+        jd_words = self.jd_keywords if self.jd_keywords is not None else extract_keywords(self.jd_text)
+        resume_words = extract_keywords(self.resume_text)
         
         if not jd_words:
             return 0, []
@@ -66,31 +113,82 @@ class ATSEvaluator:
     def evaluate(self):
         contact = self.check_contact_info()
         sections = self.check_sections()
-        verb_score, verb_count = self.check_action_verbs()
+        _, verb_count = self.check_action_verbs()
         keyword_score, missing_keywords = self.calculate_keyword_match()
-        
-        # Calculate Weighted ATS Score
-        # Structure (Contact + Sections): 25%
-        # Impact (Verbs): 15%
-        # Content (Keywords): 60%
-        
-        structure_points = sum(contact.values()) + sum(sections.values())
-        max_structure = len(contact) + len(sections)
-        structure_score = (structure_points / max_structure) * 100
-        
-        final_score = (structure_score * 0.25) + (verb_score * 0.15) + (keyword_score * 0.60)
-        
-        return {
-            'overall_score': round(final_score, 1),
-            'detail_scores': {
-                'structure': round(structure_score, 1),
-                'impact': round(verb_score, 1),
-                'keywords': round(keyword_score, 1)
-            },
-            'checks': {
-                'contact': contact,
-                'sections': sections,
-                'verb_count': verb_count
-            },
-            'missing_keywords': missing_keywords
+        return build_report(contact, sections, verb_count, keyword_score, missing_keywords)
+
+def _is_email_char(char):
+    return char.isalnum() or char in '_.-'
+
+def _has_email(text):
+    # EMAIL_PATTERN matches exactly when some '@' has a [\w.-] character on
+    # both sides, so only look around each '@' instead of scanning every word
+    at = text.find('@')
+    while at != -1:
+        if 0 < at < len(text) - 1 and _is_email_char(text[at - 1]) and _is_email_char(text[at + 1]):
+            return True
+        at = text.find('@', at + 1)
+    return False
+
+class ATSRuleEngine:
+    """
+    ATSEvaluator compiled once for a job description and applied to any
+    number of resumes. The JD keyword set is built once, and each resume is
+    lowercased once, checked against one flat table of section and verb
+    phrases and tokenized once for keywords. evaluate(resume) returns the
+    same report as ATSEvaluator(resume, jd).evaluate(); given a keyword_order
+    (e.g. JobProfile's TF-IDF ranking) missing keywords follow that order
+    instead of set order.
+    """
+
+    def __init__(self, jd_text, jd_keywords=None, keyword_order=None):
+        self.jd_keywords = jd_keywords if jd_keywords is not None else extract_keywords(jd_text)
+        self.keyword_order = keyword_order
+        # (phrase, section or None for an action verb); each phrase is searched once
+        self._phrases = [(phrase, sec) for sec, phrases in SECTIONS.items() for phrase in phrases]
+        self._phrases += [(verb, None) for verb in ACTION_VERBS]
+
+    def keyword_match(self, resume_text):
+        """
+        (match score, missing keywords), as ATSEvaluator.calculate_keyword_match.
+        """
+        return self._keyword_match(resume_text.lower())
+
+    def evaluate(self, resume_text):
+        text = resume_text.lower()
+
+        contact = {
+            'email': _has_email(text),
+            'phone': SPACED_PHONE_PATTERN.search(text) is not None,
+            'linkedin': "linkedin.com" in text
         }
+
+        sections = dict.fromkeys(SECTIONS, False)
+        verb_count = 0
+        for phrase, sec in self._phrases:
+            if sec is not None:
+                if not sections[sec] and phrase in text:
+                    sections[sec] = True
+            elif phrase in text:
+                verb_count += 1
+
+        keyword_score, missing_keywords = self._keyword_match(text)
+        return build_report(contact, sections, verb_count, keyword_score, missing_keywords)
+
+    def evaluate_batch(self, resume_texts):
+        return [self.evaluate(text) for text in resume_texts]
+
+    def _keyword_match(self, text):
+        jd_words = self.jd_keywords
+        if not jd_words:
+            return 0, []
+        resume_words = set(KEYWORD_PATTERN.findall(text))
+
+        common = jd_words.intersection(resume_words)
+        if self.keyword_order is not None:
+            missing = [word for word in self.keyword_order if word not in resume_words][:10]
+        else:
+            missing = list(jd_words - resume_words)[:10] # Top 10 missing
+
+        match_score = (len(common) / len(jd_words)) * 100
+        return round(match_score, 1), missing
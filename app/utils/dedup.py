@@ -0,0 +1,302 @@
+import hashlib
+import os
+import zlib
+import numpy as np
+from app.utils.storage import (NAME_BYTES, MappedDirectory, append_rows, digest_hex, digest_keys, encode_names,
+                               find_keys, map_rows, sort_keys, write_array)
+
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+# Estimated Jaccard similarity of word shingles above which two resumes are near-duplicates
+NEAR_DUPLICATE_THRESHOLD = 0.8
+# Resumes added to a DuplicateIndex since its band keys were last sorted, before they are re-sorted
+TAIL_ROWS = 8192
+# Candidates checked per LSH bucket, so a very common band cannot make a lookup linear
+MAX_BUCKET = 64
+
+_PRIME = np.uint64((1 << 32) + 15)
+_MASK = np.uint64(0xFFFFFFFF)
+_EMPTY = np.uint32(0xFFFFFFFF)
+# Seeded, so signatures are comparable across processes and restarts
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_BAND_WEIGHTS = np.uint64(0x9E3779B97F4A7C15) ** np.arange(ROWS_PER_BAND, dtype=np.uint64)
+
+def text_digest(cleaned_text):
+    """
+    SHA-256 of a cleaned resume: the same for every upload of one resume,
+    whatever its file format.
+    """
+    return hashlib.sha256(cleaned_text.encode('utf-8')).hexdigest()
+
+def _shingles(cleaned_text):
+    # 32-bit hashes of every run of SHINGLE_WORDS consecutive words
+    words = cleaned_text.split()
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(word.encode('utf-8')) for word in words), dtype=np.uint64, count=len(words))
+    if len(hashes) < SHINGLE_WORDS:
+        return hashes
+    shingles = hashes[:len(hashes) - SHINGLE_WORDS + 1].copy()
+    for j in range(1, SHINGLE_WORDS):
+        # uint64 arithmetic wraps, which is fine for hashing
+        shingles = shingles * np.uint64(1000003) + hashes[j:len(hashes) - SHINGLE_WORDS + 1 + j]
+    return np.unique(shingles & _MASK)
+
+def minhash_signatures(cleaned_texts, block=4096):
+    """
+    (n, NUM_PERM) uint32 MinHash signatures of the resumes' word shingles:
+    the share of positions where two signatures agree estimates the Jaccard
+    similarity of their shingle sets. A text without words gets an all-ones
+    signature, which is_empty() recognises.
+    """
+    signatures = np.full((len(cleaned_texts), NUM_PERM), _EMPTY, dtype=np.uint32)
+    for i, cleaned_text in enumerate(cleaned_texts):
+        shingles = _shingles(cleaned_text)
+        minimum = np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+        for start in range(0, len(shingles), block):
+            # One universal hash (a*x + b mod p) per permutation, blocked to bound memory on long resumes
+            hashed = (shingles[start:start + block, np.newaxis] * _A + _B) % _PRIME
+            np.minimum(minimum, hashed.min(axis=0), out=minimum)
+        if len(shingles):
+            signatures[i] = minimum & _MASK
+    return signatures
+
+def is_empty(signatures):
+    return (signatures == _EMPTY).all(axis=1)
+
+def band_keys(signatures):
+    """
+    (n, BANDS) uint64 LSH keys: one hash per band of ROWS_PER_BAND signature
+    positions. Resumes sharing any band key are candidate duplicates.
+    """
+    bands = signatures.reshape(len(signatures), BANDS, ROWS_PER_BAND).astype(np.uint64)
+    return (bands * _BAND_WEIGHTS).sum(axis=2, dtype=np.uint64)
+
+def similarity(a, b):
+    """
+    Estimated Jaccard similarity of paired rows of two signature arrays.
+    """
+    return (a == b).mean(axis=-1)
+
+def group_duplicates(cleaned_texts, signatures, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    Groups the exact and near-duplicates in one batch of resumes. Returns
+    (group, similarities): for each resume the index of the first resume of
+    its group (itself if it is unique or the first), and its estimated
+    similarity to that resume (1.0 for exact copies and first resumes).
+    """
+    n = len(cleaned_texts)
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        i, j = find(i), find(j)
+        # The earliest upload stays the representative
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+
+    # Exact copies: the same cleaned text, whatever the file bytes
+    first = {}
+    for i, cleaned_text in enumerate(cleaned_texts):
+        union(first.setdefault(cleaned_text, i), i)
+
+    # Near-duplicates: resumes sharing an LSH band, confirmed on the whole signature
+    unique = np.array(sorted(set(first.values())), dtype=np.intp)
+    unique = unique[~is_empty(signatures[unique])]
+    if len(unique) > 1:
+        keys = band_keys(signatures[unique])
+        pairs = set()
+        for band in range(BANDS):
+            order = np.argsort(keys[:, band], kind='stable')
+            sorted_keys = keys[order, band]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            ends = np.r_[starts[1:], len(order)]
+            for start, end in zip(starts, ends):
+                for k in range(start + 1, min(end, start + MAX_BUCKET)):
+                    pairs.add((unique[order[start]], unique[order[k]]))
+        if pairs:
+            left, right = np.array(sorted(pairs)).T
+            similar = similarity(signatures[left], signatures[right]) >= threshold
+            for i, j in zip(left[similar], right[similar]):
+                union(i, j)
+
+    group = np.array([find(i) for i in range(n)], dtype=np.intp)
+    similarities = np.ones(n)
+    copies = np.flatnonzero(group != np.arange(n))
+    if len(copies):
+        similarities[copies] = similarity(signatures[copies], signatures[group[copies]])
+    return group, similarities
+
+class DuplicateIndex(MappedDirectory):
+    """
+    Persistent MinHash signatures of every distinct resume screened, so
+    duplicates are recognised across requests as the candidate pool grows.
+
+    Rows live in flat append-only files read through read-only memory maps
+    (as in the talent pool): the signature, its LSH band keys, the cleaned
+    text digest and the filename. Lookups binary-search each band's keys,
+    kept sorted on disk, plus the few rows added since (sorted in memory),
+    so their cost grows with log(rows), not rows; digests are kept and
+    looked up the same way, to skip resumes already stored. The sorted keys
+    are rebuilt once more than TAIL_ROWS rows were added after them, and the
+    previous sort is kept until the next one, for readers still holding the
+    meta.json that names it.
+    """
+
+    COLUMNS = [
+        ('signatures.bin', np.uint32, (NUM_PERM,)),
+        ('bands.bin', np.uint64, (BANDS,)),
+        ('digests.bin', 'S32', ()),
+        ('names.bin', f'S{NAME_BYTES}', ()),
+    ]
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        with self._write_lock():
+            meta = self._read_meta()
+            if meta is None or (meta['num_perm'], meta['bands']) != (NUM_PERM, BANDS):
+                self._reset()
+
+    # Files
+
+    def _reset(self):
+        for name, _, _ in self.COLUMNS:
+            open(self._path(name), 'wb').close()
+        self._remove_sorted(keep=())
+        self._write_meta({'num_perm': NUM_PERM, 'bands': BANDS, 'count': 0, 'indexed': 0, 'previous_indexed': 0})
+
+    def _map(self, meta):
+        """
+        (meta, maps): the memory-mapped columns, plus the per-band sorted
+        keys (and row numbers) of the indexed rows and of the rows added
+        since, and the same for digests (as find_keys indexes).
+        """
+        count, indexed = meta['count'], meta['indexed']
+        maps = {name: map_rows(self._path(name), dtype, shape, count) for name, dtype, shape in self.COLUMNS}
+        sorted_parts = []
+        maps['digest_index'] = []
+        if indexed:
+            sorted_parts.append((np.load(self._path(f"band-sorted-{indexed}.npy"), mmap_mode='r'),
+                                 np.load(self._path(f"band-order-{indexed}.npy"), mmap_mode='r')))
+            # Indexes sorted before digests were have none: every digest is tail until the next sort
+            if os.path.exists(self._path(f"digest-sorted-{indexed}.npy")):
+                maps['digest_index'].append((np.load(self._path(f"digest-sorted-{indexed}.npy"), mmap_mode='r'),
+                                             np.load(self._path(f"digest-order-{indexed}.npy"), mmap_mode='r'), 0))
+        if count > indexed:
+            tail = np.asarray(maps['bands.bin'][indexed:]).T
+            order = np.argsort(tail, axis=1, kind='stable')
+            sorted_parts.append((np.take_along_axis(tail, order, axis=1), order + indexed))
+        maps['sorted'] = sorted_parts
+        tail_start = indexed if maps['digest_index'] else 0
+        maps['digest_index'].append(sort_keys(maps['digests.bin'][tail_start:]) + (tail_start,))
+        return meta, maps
+
+    # Reads
+
+    def query(self, signatures, threshold=NEAR_DUPLICATE_THRESHOLD):
+        """
+        The most similar stored resume for each signature, as (hex text
+        digest, filename, similarity), or None where nothing stored reaches
+        threshold.
+        """
+        meta, maps = self._load()
+        matches = [None] * len(signatures)
+        if not meta['count'] or not len(signatures):
+            return matches
+        queries = np.flatnonzero(~is_empty(signatures))
+        keys = band_keys(signatures[queries])
+        pair_queries, pair_rows = [], []
+        for sorted_keys, order in maps['sorted']:
+            for band in range(BANDS):
+                starts = np.searchsorted(sorted_keys[band], keys[:, band], side='left')
+                ends = np.minimum(np.searchsorted(sorted_keys[band], keys[:, band], side='right'),
+                                  starts + MAX_BUCKET)
+                # Every position in [start, end) of every query, as flat arrays
+                counts = ends - starts
+                positions = np.arange(counts.sum()) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+                pair_rows.append(np.asarray(order[band][positions]))
+                pair_queries.append(np.repeat(queries, counts))
+        pairs = np.column_stack([np.concatenate(pair_queries or [[]]), np.concatenate(pair_rows or [[]])])
+        if not len(pairs):
+            return matches
+        pairs = np.unique(pairs.astype(np.int64), axis=0)
+        q, rows = pairs[:, 0], pairs[:, 1]
+        scores = similarity(signatures[q], maps['signatures.bin'][rows])
+        for i in np.argsort(-scores, kind='stable'):
+            if scores[i] < threshold:
+                break
+            if matches[q[i]] is None:
+                row = rows[i]
+                matches[q[i]] = (digest_hex(maps['digests.bin'][row:row + 1])[0],
+                                 maps['names.bin'][row].decode('utf-8', 'replace'), float(scores[i]))
+        return matches
+
+    def stats(self):
+        meta, _ = self._load()
+        return {'resumes': meta['count'], 'indexed': meta['indexed']}
+
+    def __len__(self):
+        return self._load()[0]['count']
+
+    # Updates
+
+    def add(self, digests, names, signatures):
+        """
+        Appends resumes (hex cleaned text digests, filenames, signatures).
+        Digests already stored are skipped. Returns how many were added.
+        """
+        if not len(digests):
+            return 0
+        keys = digest_keys(digests)
+        with self._write_lock():
+            meta, maps = self._load()
+            _, first = np.unique(keys, return_index=True)
+            new = np.sort(first[find_keys(maps['digest_index'], keys[first]) < 0])
+            if not len(new):
+                return 0
+            columns = {
+                'signatures.bin': signatures[new],
+                'bands.bin': band_keys(signatures[new]),
+                'digests.bin': keys[new],
+                'names.bin': encode_names([names[i] for i in new]),
+            }
+            for name, dtype, shape in self.COLUMNS:
+                append_rows(self._path(name), dtype, shape, meta['count'], columns[name])
+            meta = dict(meta, count=meta['count'] + len(new))
+            resort = meta['count'] - meta['indexed'] > TAIL_ROWS
+            if resort:
+                self._sort(meta['count'])
+                meta = dict(meta, indexed=meta['count'], previous_indexed=meta['indexed'])
+            self._write_meta(meta)
+            if resort:
+                self._remove_sorted(keep=(meta['indexed'], meta['previous_indexed']))
+        return len(new)
+
+    def _sort(self, count):
+        # Writes the band keys of the first `count` rows, sorted, as band-sorted-<count>.npy
+        # (and their row numbers as band-order-<count>.npy), and their digests likewise
+        bands = np.memmap(self._path('bands.bin'), dtype=np.uint64, mode='r', shape=(count, BANDS))
+        keys = np.asarray(bands).T
+        order = np.argsort(keys, axis=1, kind='stable')
+        digests, digest_order = sort_keys(map_rows(self._path('digests.bin'), 'S32', (), count))
+        for name, array in (('band-sorted', np.take_along_axis(keys, order, axis=1)), ('band-order', order),
+                            ('digest-sorted', digests), ('digest-order', digest_order)):
+            write_array(self._path(f"{name}-{count}.npy"), array)
+
+    def _remove_sorted(self, keep):
+        # Deletes every sort but those of the given row counts (the one meta.json names and the one before)
+        names = {f"{name}-{count}.npy" for count in keep
+                 for name in ('band-sorted', 'band-order', 'digest-sorted', 'digest-order')}
+        for entry in os.listdir(self.directory):
+            if entry.startswith(('band-sorted-', 'band-order-', 'digest-sorted-', 'digest-order-')) \
+                    and entry not in names:
+                os.remove(self._path(entry))
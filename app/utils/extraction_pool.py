@@ -0,0 +1,216 @@
+import io
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from app.utils.file_reader import extract_text_from_record, extract_text_from_stream
+from app.utils.metrics import DOCUMENT_BYTES, DOCUMENT_CHARS, EXTRACTION_FAILURES, EXTRACTION_SECONDS, file_type
+from app.utils.records import TextRecord, upload_extractor
+from app.utils.upload_spool import SpooledFile
+
+def _extract_bytes(data, filename, limits):
+    """
+    Worker entry point: runs the normal stream extractor over raw upload bytes,
+    or over the file of a SpooledFile (only its path crosses the process boundary).
+    Returns (text, seconds spent extracting).
+    """
+    start = time.perf_counter()
+    if isinstance(data, TextRecord):
+        # Parsed when the export was split, unless it was unreadable
+        text = extract_text_from_record(data.read() if data.text is None else None, text=data.text, **limits)
+    elif isinstance(data, SpooledFile):
+        with data.open() as stream:
+            text = extract_text_from_stream(stream, filename, **limits)
+    else:
+        text = extract_text_from_stream(io.BytesIO(data), filename, **limits)
+    return text, time.perf_counter() - start
+
+def _report_pid(pids):
+    # Worker initializer: lets the parent stop workers that are stuck on a file
+    pids.put(os.getpid())
+
+def _is_inline(filename, data):
+    if isinstance(data, TextRecord):
+        return True
+    extractor = upload_extractor(filename, data)
+    return extractor is not None and extractor.inline
+
+def _record(filename, data, result, failure=None):
+    """
+    Document size, extraction time and failure metrics for one upload.
+    """
+    kind = file_type(data.export if isinstance(data, TextRecord) else filename)
+    DOCUMENT_BYTES.observe(len(data), file_type=kind)
+    if result is None:
+        EXTRACTION_FAILURES.inc(file_type=kind, reason=failure)
+        return None
+    text, seconds = result
+    EXTRACTION_SECONDS.observe(seconds, file_type=kind)
+    DOCUMENT_CHARS.observe(len(text), file_type=kind)
+    if not text:
+        # The extractors log their own errors and return no text
+        EXTRACTION_FAILURES.inc(file_type=kind, reason='empty')
+    return text
+
+class ExtractionPool:
+    """
+    Fans document extraction out to a process pool and gathers the texts
+    back in upload order.
+
+    A batch gets timeout seconds for every max_workers files it sends to the
+    pool, however many of them are stuck. A file still running at that
+    deadline, or one that kills its worker, comes back as None instead of
+    stalling or failing the batch, and the pool is replaced so stuck
+    workers do not pile up. The pool is also
+    replaced once its workers have handled max_tasks_per_worker files each
+    on average, which bounds any memory PyPDF2 leaks over time.
+
+    Formats registered as inline (plain text, HTML, structured records) are
+    read on the calling thread instead: they cost less than the round trip
+    to a worker.
+
+    limits are passed to the extractors as keyword budgets (max_pages,
+    max_chars, max_seconds, early_exit_chars; see file_reader.collect_text).
+    """
+
+    def __init__(self, max_workers=None, timeout=30, max_tasks_per_worker=100, limits=None):
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        self.timeout = timeout
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.limits = limits or {}
+        self._executor = None
+        # Queue of the worker PIDs of each live executor
+        self._pids = {}
+        self._submitted = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Workers fork from a forkserver that has the extractors preloaded,
+                # so starting a fresh pool costs milliseconds rather than new interpreters
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload([__name__, 'app.utils.file_reader'])
+                pids = context.SimpleQueue()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=context, initializer=_report_pid, initargs=(pids,)
+                )
+                self._pids[self._executor] = pids
+                self._submitted = 0
+            return self._executor
+
+    def _retire(self, executor, kill=False):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+            pids = self._pids.pop(executor, None)
+        if kill and pids is not None:
+            # Stuck workers never pick up the shutdown sentinel, so stop them directly
+            while not pids.empty():
+                try:
+                    os.kill(pids.get(), signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+        # A recycled pool finishes what other requests already queued on it
+        executor.shutdown(wait=False, cancel_futures=kill)
+
+    def extract_all(self, uploads):
+        """
+        Extracts text from (filename, data) uploads, where data is the file's
+        bytes or a SpooledFile. uploads can be any iterable: each file goes
+        to the pool as soon as it is produced, so extraction overlaps with
+        e.g. the rest of a request body still being received.
+        Returns a list aligned with the input: the text, or None for files
+        that timed out or crashed their worker.
+        """
+        received = []
+
+        def indexes():
+            for upload in uploads:
+                received.append(upload)
+                yield len(received) - 1
+
+        results = {}
+        # Why each file without a result failed, for the failure counter
+        failures = {}
+        if self.max_workers <= 0:
+            for i in indexes():
+                results[i] = self._extract_inline(received[i][1], received[i][0])
+        else:
+            crashed = self._run(received, indexes(), results, failures)
+            # A crashed worker breaks every pending future in the pool, so retry
+            # those files one at a time to isolate the one that caused it
+            for i in crashed:
+                if self._run(received, [i], results, failures):
+                    print(f"Error reading file {received[i][0]}: worker crashed")
+                    failures[i] = 'crash'
+        return [
+            _record(filename, data, results.get(i), failures.get(i, 'error'))
+            for i, (filename, data) in enumerate(received)
+        ]
+
+    def _run(self, uploads, indexes, results, failures):
+        """
+        Runs one round of extraction on a pool and returns the indexes that
+        were lost to a broken pool. uploads may still be growing while
+        indexes is iterated.
+        """
+        executor = None
+        futures = {}
+        try:
+            for i in indexes:
+                if _is_inline(*uploads[i]):
+                    results[i] = self._extract_inline(uploads[i][1], uploads[i][0])
+                    continue
+                # Started on the first file, so a batch served from the cache never spins up a pool
+                executor = executor or self._get_executor()
+                futures[i] = executor.submit(_extract_bytes, uploads[i][1], uploads[i][0], self.limits)
+        except BrokenProcessPool:
+            self._retire(executor)
+            return [*futures, i, *indexes]
+        if executor is None:
+            return []
+        with self._lock:
+            self._submitted += len(futures)
+
+        broken = []
+        # One deadline for the batch, so stuck files do not each add a timeout
+        timeout = self.timeout * math.ceil(len(futures) / self.max_workers)
+        _, pending = wait(futures.values(), timeout=timeout)
+        stuck = bool(pending)
+        for i, future in futures.items():
+            if future in pending:
+                print(f"Error reading file {uploads[i][0]}: timed out after {timeout}s")
+                future.cancel()
+                failures[i] = 'timeout'
+                continue
+            try:
+                results[i] = future.result()
+            except BrokenProcessPool:
+                broken.append(i)
+            except Exception as e:
+                print(f"Error reading file {uploads[i][0]}: {e}")
+
+        if stuck or broken:
+            self._retire(executor, kill=stuck)
+        elif self.max_tasks_per_worker and self._submitted >= self.max_tasks_per_worker * self.max_workers:
+            self._retire(executor)
+        return broken
+
+    def _extract_inline(self, data, filename):
+        try:
+            return _extract_bytes(data, filename, self.limits)
+        except Exception as e:
+            print(f"Error reading file {filename}: {e}")
+            return None
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._pids.pop(executor, None)
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
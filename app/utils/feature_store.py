@@ -0,0 +1,308 @@
+import os
+import shutil
+import uuid
+from collections import namedtuple
+import numpy as np
+import scipy.sparse as sp
+from app.utils.storage import MappedDirectory, digest_hex, digest_keys, find_keys, sort_keys
+
+FEATURES_DIR = 'features'
+MERGE_FACTOR = 8
+
+# keys are the segment's digests sorted, order maps them back to its row numbers
+Segment = namedtuple('Segment', ['matrix', 'digests', 'labels', 'keys', 'order'])
+
+def _save(path, array):
+    np.save(path, np.ascontiguousarray(array), allow_pickle=False)
+
+def _tier(rows, factor):
+    # floor(log_factor(rows)): segments of one tier are within a factor of each other's size
+    tier = 0
+    while rows >= factor:
+        rows //= factor
+        tier += 1
+    return tier
+
+def _concatenate(segments):
+    """
+    (CSR matrix, S32 digests, labels or None) of segments in order; a single
+    segment is returned as mapped.
+    """
+    if len(segments) == 1:
+        return segments[0].matrix, segments[0].digests, segments[0].labels
+    matrix = sp.vstack([segment.matrix for segment in segments], format='csr')
+    digests = np.concatenate([segment.digests for segment in segments])
+    labels = None
+    if all(segment.labels is not None for segment in segments):
+        labels = np.concatenate([segment.labels for segment in segments])
+    return matrix, digests, labels
+
+class FeatureStore(MappedDirectory):
+    """
+    Persistent TF-IDF rows keyed by content digest, for one vectorizer
+    version, so resumes are never re-extracted, re-cleaned or re-vectorized
+    and retraining or analytics can run straight off stored features.
+
+    Rows are kept as CSR matrices split into append-only segments: each
+    segment is a directory of .npy files (data, indices, indptr, the hex
+    digests as 32-byte keys, their sorted index and optional labels) written
+    once and then only read, through read-only memory maps. Lookups search
+    the segments one by one, and a process maps each segment once, so a new
+    segment costs readers only its own files. Appending writes a new segment;
+    compact() merges segments into one, and appends merge merge_factor
+    neighbouring segments of similar size into one (size-tiered merging), so
+    there are only a few segments per size tier and each row is rewritten
+    about once per tier.
+
+    meta.json lists the live segments and is replaced atomically, so readers
+    never see a half-written segment. Readers take no lock, so the segments
+    a merge replaced are only deleted by the next write that merges, after
+    readers of the meta.json listing them have had time to open them.
+
+    A store created for another vectorizer version (or width) starts over.
+    """
+
+    def __init__(self, directory, version=None, merge_factor=MERGE_FACTOR):
+        super().__init__(directory)
+        # Segments mapped so far, by name (they never change once written)
+        self._segments = {}
+        self.version = version
+        self.merge_factor = merge_factor
+        with self._write_lock():
+            meta = self._read_meta()
+            if meta is None or meta['version'] != version:
+                self._reset()
+
+    # Files
+
+    def _reset(self):
+        for entry in os.listdir(self.directory):
+            if entry.startswith('segment-'):
+                shutil.rmtree(self._path(entry), ignore_errors=True)
+        self._write_meta({'version': self.version, 'n_features': None, 'segments': [], 'rows': 0, 'retired': []})
+
+    def _write_segment(self, matrix, keys, labels):
+        """
+        Writes one segment under a temporary name and renames it into place.
+        Returns its name.
+        """
+        name = f"segment-{uuid.uuid4().hex[:12]}"
+        tmp = self._path(f".{name}")
+        os.makedirs(tmp)
+        matrix = matrix.tocsr()
+        matrix.sort_indices()
+        _save(os.path.join(tmp, 'data.npy'), matrix.data)
+        _save(os.path.join(tmp, 'indices.npy'), matrix.indices.astype(np.int32))
+        _save(os.path.join(tmp, 'indptr.npy'), matrix.indptr.astype(np.int64))
+        _save(os.path.join(tmp, 'digests.npy'), keys)
+        sorted_keys, order = sort_keys(keys)
+        _save(os.path.join(tmp, 'keys.npy'), sorted_keys)
+        _save(os.path.join(tmp, 'order.npy'), order.astype(np.int64))
+        if labels is not None:
+            _save(os.path.join(tmp, 'labels.npy'), np.asarray(labels).astype(str))
+        os.rename(tmp, self._path(name))
+        return name
+
+    def _load_segment(self, name, n_features):
+        arrays = {}
+        for column in ('data', 'indices', 'indptr', 'digests', 'labels', 'keys', 'order'):
+            path = self._path(name, f"{column}.npy")
+            if os.path.exists(path):
+                arrays[column] = np.load(path, mmap_mode='r', allow_pickle=False)
+        digests = arrays['digests']
+        matrix = sp.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=(len(digests), n_features))
+        if 'order' not in arrays:
+            # Written before segments stored their index
+            arrays['keys'], arrays['order'] = sort_keys(digests)
+        return Segment(matrix, digests, arrays.get('labels'), arrays['keys'], arrays['order'])
+
+    def _map(self, meta):
+        """
+        (meta, segments, offsets): offsets are the first row number of each
+        segment.
+        """
+        self._segments = {
+            name: self._segments.get(name) or self._load_segment(name, meta['n_features'])
+            for name in meta['segments']
+        }
+        segments = [self._segments[name] for name in meta['segments']]
+        offsets = np.cumsum([0] + [segment.matrix.shape[0] for segment in segments])
+        return meta, segments, offsets
+
+    @staticmethod
+    def _find(segments, offsets, keys):
+        """
+        Row numbers of S32 keys (-1 where not stored), from the first segment holding each.
+        """
+        return find_keys([(segment.keys, segment.order, offset) for segment, offset in zip(segments, offsets)], keys)
+
+    # Reads
+
+    def lookup(self, digests):
+        """
+        Row numbers of the given hex digests (-1 where not stored).
+        """
+        _, segments, offsets = self._load()
+        return self._find(segments, offsets, digest_keys(digests))
+
+    def rows(self, row_numbers):
+        """
+        CSR matrix of the given row numbers, in the order given.
+        """
+        meta, segments, offsets = self._load()
+        row_numbers = np.asarray(row_numbers, dtype=np.int64)
+        if not len(row_numbers):
+            return sp.csr_matrix((0, meta['n_features'] or 0))
+        segment_of = np.searchsorted(offsets, row_numbers, side='right') - 1
+        parts = []
+        positions = []
+        for s in np.unique(segment_of):
+            selected = np.flatnonzero(segment_of == s)
+            parts.append(segments[s].matrix[row_numbers[selected] - offsets[s]])
+            positions.append(selected)
+        stacked = sp.vstack(parts, format='csr')
+        # Back from segment order to the requested order
+        return stacked[np.argsort(np.concatenate(positions), kind='stable')]
+
+    def matrix(self):
+        """
+        Every stored row as (CSR matrix, hex digests, labels or None). A
+        compacted store is served straight from the memory-mapped segment.
+        """
+        meta, segments, _ = self._load()
+        if not segments:
+            return sp.csr_matrix((0, meta['n_features'] or 0)), [], None
+        matrix, digests, labels = _concatenate(segments)
+        return matrix, digest_hex(digests), labels
+
+    def transform(self, vectorizer, digests, cleaned_texts):
+        """
+        Returns the TF-IDF matrix for the given resumes: stored rows where
+        the digest is known, the rest transformed in one batch and appended.
+        """
+        stored = self.lookup(digests)
+        missing = np.flatnonzero(stored < 0)
+        if not len(missing):
+            return self.rows(stored)
+        computed = vectorizer.transform([cleaned_texts[i] for i in missing])
+        self.append([digests[i] for i in missing], computed)
+        if len(missing) == len(digests):
+            return computed
+        rows = [None] * len(digests)
+        known = np.flatnonzero(stored >= 0)
+        for i, row in zip(known, self.rows(stored[known])):
+            rows[i] = row
+        for j, i in enumerate(missing):
+            rows[i] = computed[j]
+        return sp.vstack(rows, format='csr')
+
+    # Writes
+
+    def append(self, digests, matrix, labels=None, skip_existing=True):
+        """
+        Appends rows (hex content digests, a CSR matrix and optional labels)
+        as a new segment. With skip_existing, digests already stored (or
+        repeated in the batch) are skipped; a training set keeps every row.
+        Returns how many rows were added.
+        """
+        if not len(digests):
+            return 0
+        keys = digest_keys(digests)
+        with self._write_lock():
+            meta, segments, offsets = self._load()
+            if meta['n_features'] not in (None, matrix.shape[1]):
+                raise ValueError(f"Store holds {meta['n_features']} features, got {matrix.shape[1]}")
+            new = np.arange(len(keys))
+            if skip_existing:
+                _, first = np.unique(keys, return_index=True)
+                new = np.sort(first[self._find(segments, offsets, keys[first]) < 0])
+                if not len(new):
+                    return 0
+            matrix = matrix.tocsr()
+            if len(new) < len(keys):
+                matrix = matrix[new]
+                labels = None if labels is None else np.asarray(labels)[new]
+            name = self._write_segment(matrix, keys[new], labels)
+            meta = dict(meta, n_features=matrix.shape[1], segments=meta['segments'] + [name],
+                        rows=meta['rows'] + len(new))
+            self._write_meta(meta)
+            self._merge_tiers(meta.get('retired', []))
+        return len(new)
+
+    def compact(self):
+        """
+        Merges every segment into one.
+        """
+        with self._write_lock():
+            self._merge(0, stale=self._read_meta().get('retired', []))
+
+    def _merge_tiers(self, stale):
+        """
+        Merges every run of merge_factor or more neighbouring segments of one
+        tier, lowest tier first, until there are none. A segment counts in the
+        tier of the largest segment written after it, so small segments
+        followed by a larger one are merged with it rather than left behind.
+        Only neighbours are merged, so row numbers never change. stale are
+        the segments retired before this write, deleted by its first merge.
+        """
+        while True:
+            _, segments, _ = self._load()
+            tiers = []
+            for segment in reversed(segments):
+                tiers.insert(0, max([_tier(len(segment.digests), self.merge_factor)] + tiers[:1]))
+            for tier in sorted(set(tiers)):
+                run = [i for i, t in enumerate(tiers) if t == tier]
+                if len(run) >= self.merge_factor:
+                    self._merge(run[0], run[-1] + 1, stale)
+                    stale = []
+                    break
+            else:
+                return
+
+    def _merge(self, start, stop=None, stale=()):
+        """
+        Replaces segments[start:stop] by one segment. The replaced segments
+        are kept as retired, and the stale ones deleted.
+        """
+        meta, segments, _ = self._load()
+        stop = len(segments) if stop is None else stop
+        merging = segments[start:stop]
+        if len(merging) < 2:
+            return
+        matrix, keys, labels = _concatenate(merging)
+        name = self._write_segment(matrix, keys, labels)
+        retired = [old for old in meta.get('retired', []) if old not in stale] + meta['segments'][start:stop]
+        self._write_meta(dict(meta, segments=meta['segments'][:start] + [name] + meta['segments'][stop:],
+                              retired=retired))
+        for old in stale:
+            shutil.rmtree(self._path(old), ignore_errors=True)
+
+    def stats(self):
+        meta, segments, _ = self._load()
+        size = sum(
+            os.path.getsize(self._path(name, entry))
+            for name in meta['segments'] for entry in os.listdir(self._path(name))
+        )
+        return {
+            'rows': meta['rows'],
+            'segments': len(segments),
+            'n_features': meta['n_features'],
+            'nnz': int(sum(segment.matrix.nnz for segment in segments)),
+            'bytes': size
+        }
+
+    def __len__(self):
+        return self._load()[0]['rows']
+
+def prune_versions(root, keep):
+    """
+    Deletes the feature stores under root other than the `keep` directories.
+    Returns the names removed.
+    """
+    removed = []
+    if os.path.isdir(root):
+        for entry in sorted(os.listdir(root)):
+            if entry not in keep and os.path.isdir(os.path.join(root, entry)):
+                shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+                removed.append(entry)
+    return removed
@@ -0,0 +1,311 @@
+import fcntl
+import json
+import os
+import shutil
+import threading
+import time
+import joblib
+import numpy as np
+from app.utils.feature_store import FEATURES_DIR, FeatureStore
+from app.utils.lsa import LSA_FILE
+from app.utils.mapped_artifacts import MAPPED_DIR, export_artifacts
+from app.utils.model_backends import compile_model
+from app.utils.model_loader import artifact_dir, artifact_version, current_version, publish_version, stage_version
+from app.utils.storage import FileLock
+from app.utils.streaming_trainer import build_streaming_classifier
+from app.utils.text_cache import file_fingerprint
+
+FEEDBACK_FILE = 'feedback.jsonl'
+# Saved next to model.pkl by the incremental trainer: the partial_fit classifier it was compiled
+# from, and which feedback it has learned
+ONLINE_MODEL = 'online.pkl'
+ONLINE_STATE = 'online.json'
+HOLDOUT_EVERY = 5
+# Held-out resumes a candidate model is checked on, at most (the latest ones)
+MAX_HOLDOUT_ROWS = 5000
+BATCH_ROWS = 5000
+BOOTSTRAP_EPOCHS = 5
+
+def is_holdout(digest, holdout_every=HOLDOUT_EVERY):
+    # By content, so every correction of one resume is on the same side of the split
+    return int(digest[:8], 16) % holdout_every == 0
+
+class FeedbackLog:
+    """
+    Append-only log of recruiter corrections, one JSON object per line:
+    the cleaned resume text, its digest, the corrected category and what
+    the model had predicted. The text is kept so the corrections can be
+    re-vectorized for any model version; their TF-IDF rows are kept in a
+    feature store per vectorizer version under features/.
+
+    Readers resume from a byte offset, so the trainer only ever reads the
+    feedback it has not learned yet.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, FEEDBACK_FILE)
+        open(self.path, 'a').close()
+
+    def append(self, entries):
+        lines = ''.join(json.dumps(entry) + '\n' for entry in entries)
+        with FileLock(os.path.join(self.directory, 'lock')):
+            with open(self.path, 'a') as f:
+                f.write(lines)
+        return len(entries)
+
+    def read(self, offset=0):
+        """
+        (offset, entry) pairs from byte offset on, and the offset after the last one.
+        """
+        entries = []
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                # A line still being written is left for the next read
+                if not line.endswith(b'\n'):
+                    break
+                entries.append((offset, json.loads(line)))
+                offset += len(line)
+        return entries, offset
+
+    def read_at(self, offsets):
+        """
+        The entries starting at the given byte offsets.
+        """
+        entries = []
+        with open(self.path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                entries.append(json.loads(f.readline()))
+        return entries
+
+    def features(self, version):
+        """
+        The feature store of the corrections' TF-IDF rows for a vectorizer version.
+        """
+        return FeatureStore(os.path.join(self.directory, FEATURES_DIR, version[:16]), version=version)
+
+    def size(self):
+        return os.path.getsize(self.path)
+
+class IncrementalTrainer:
+    """
+    Folds recruiter feedback into the current model without a full refit.
+
+    Every `interval` seconds (and on train()), if at least min_rows new
+    corrections were logged since the current version was trained, the
+    version's partial_fit classifier (online.pkl) takes one partial_fit
+    pass over them. The vectorizer is never refit, so features stay fixed
+    (hashed ones with train_model.py --vectorizer hashing), cached TF-IDF
+    rows stay valid and the cost grows with the new feedback, not the
+    corpus. A version without online.pkl (e.g. fresh from train_model.py)
+    is first bootstrapped once from its stored training features.
+
+    Every HOLDOUT_EVERY-th resume of the feedback is held out: neither
+    model has been fitted on it, so the updated model is published as a
+    new version only if its accuracy on the held-out corrections is at
+    least that of the current model. The version's ONLINE_STATE records the
+    log offset learned up to and where the held-out corrections are, so a
+    round reads only the new feedback. Only one process trains at a time:
+    the others skip the round.
+    """
+
+    def __init__(self, model_dir, feedback_log, interval=300, min_rows=20, backend='sgd', keep=3, on_publish=None):
+        self.model_dir = model_dir
+        self.log = feedback_log
+        self.interval = interval
+        self.min_rows = min_rows
+        self.backend = backend
+        self.keep = keep
+        self.on_publish = on_publish
+        self.last_result = None
+        self._attempted = None
+        self._lock = threading.Lock()
+        self._thread_pid = None
+
+    def start(self):
+        """
+        Starts the background thread in this process (once per process,
+        as threads do not survive a fork).
+        """
+        if not self.interval:
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+        threading.Thread(target=self._loop, name='incremental-trainer', daemon=True).start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.train()
+            except Exception as e:
+                print(f"Error training on feedback: {e}")
+
+    def train(self, force=False):
+        """
+        Runs one round; returns what happened as a dict (also kept as
+        last_result). With force, trains on any new feedback, even below
+        min_rows or already rejected.
+        """
+        with open(os.path.join(self.log.directory, 'train.lock'), 'a') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return {'status': 'busy'}
+            try:
+                result = self._train(force)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        result['at'] = time.time()
+        self.last_result = result
+        return result
+
+    def _train(self, force):
+        name = current_version(self.model_dir)
+        if name is None:
+            return {'status': 'skipped', 'reason': 'no published model version'}
+        directory = artifact_dir(self.model_dir, name)
+        state = self._read_state(directory)
+        records, offset = self.log.read(state['feedback_offset'])
+        entries = [entry for _, entry in records]
+        if not entries or (not force and (len(entries) < self.min_rows or self._attempted == (name, offset))):
+            return {'status': 'skipped', 'reason': 'not enough new feedback', 'new_feedback': len(entries)}
+        self._attempted = (name, offset)
+        start = time.perf_counter()
+
+        vectorizer = joblib.load(os.path.join(directory, 'vectorizer.pkl'))
+        current = joblib.load(os.path.join(directory, 'model.pkl'))
+        version = file_fingerprint(os.path.join(directory, 'vectorizer.pkl'))
+        clf = self._online_classifier(directory, current)
+        if clf is None:
+            return {'status': 'skipped', 'reason': f"version {name} has no online model or stored training features"}
+
+        # Corrections to categories the model does not know cannot be learned without a full retrain
+        known = set(clf.classes_)
+        unknown = [entry for entry in entries if entry['category'] not in known]
+        entries = [entry for entry in entries if entry['category'] in known]
+        dropped = {
+            'unknown_category_rows': len(unknown),
+            'unknown_categories': sorted({entry['category'] for entry in unknown}),
+        }
+        if all(is_holdout(entry['digest']) for entry in entries):
+            return dict(dropped, status='skipped', reason='no new corrections to known categories to learn from',
+                        new_feedback=len(records))
+        X, y, holdout = self._feedback_features(vectorizer, version, entries)
+        clf.partial_fit(X[~holdout], y[~holdout])
+        candidate = compile_model(clf)
+
+        held_out = self._held_out(state.get('holdout', []), records)
+        X_check, y_check = self._holdout(vectorizer, version, held_out, known)
+        current_accuracy = _accuracy(current, X_check, y_check)
+        candidate_accuracy = _accuracy(candidate, X_check, y_check)
+        result = {
+            'base_version': name,
+            'trained_rows': int((~holdout).sum()),
+            'holdout_rows': len(y_check),
+            **dropped,
+            'current_accuracy': current_accuracy,
+            'candidate_accuracy': candidate_accuracy,
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        if not len(y_check):
+            return dict(result, status='rejected', reason='no held-out feedback to check the update on yet')
+        if candidate_accuracy < current_accuracy:
+            return dict(result, status='rejected')
+
+        staging = stage_version(self.model_dir)
+        try:
+            joblib.dump(candidate, os.path.join(staging, 'model.pkl'))
+            # The same vectorizer file, so the new version keeps the fingerprint caches are keyed by
+            shutil.copy2(os.path.join(directory, 'vectorizer.pkl'), os.path.join(staging, 'vectorizer.pkl'))
+            for optional in ('lemmas.pkl', LSA_FILE):
+                if os.path.exists(os.path.join(directory, optional)):
+                    shutil.copy2(os.path.join(directory, optional), os.path.join(staging, optional))
+            if os.path.exists(os.path.join(directory, FEATURES_DIR)):
+                # Segments are never modified in place, so hard links are safe and free
+                shutil.copytree(os.path.join(directory, FEATURES_DIR), os.path.join(staging, FEATURES_DIR),
+                                copy_function=os.link, ignore=shutil.ignore_patterns('lock'))
+            export_artifacts(candidate, vectorizer, os.path.join(staging, MAPPED_DIR), artifact_version(
+                os.path.join(staging, 'model.pkl'), os.path.join(staging, 'vectorizer.pkl')))
+            joblib.dump(clf, os.path.join(staging, ONLINE_MODEL))
+            with open(os.path.join(staging, ONLINE_STATE), 'w') as f:
+                json.dump(dict(result, feedback_offset=offset, holdout=held_out,
+                               feedback_rows=state['feedback_rows'] + len(entries)), f)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        published = publish_version(self.model_dir, staging, keep=self.keep)
+        if self.on_publish:
+            self.on_publish(published)
+        return dict(result, status='published', version=published)
+
+    def _read_state(self, directory):
+        try:
+            with open(os.path.join(directory, ONLINE_STATE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # A fully retrained version has learned none of the feedback yet
+            return {'feedback_offset': 0, 'feedback_rows': 0, 'holdout': []}
+
+    def _base_features(self, directory):
+        # (X, y) stored with the version by train_model.py, or None
+        if not os.path.exists(os.path.join(directory, FEATURES_DIR, 'meta.json')):
+            return None
+        X, _, y = FeatureStore(os.path.join(directory, FEATURES_DIR)).matrix()
+        return (X, y) if y is not None and X.shape[0] else None
+
+    def _online_classifier(self, directory, current):
+        if os.path.exists(os.path.join(directory, ONLINE_MODEL)):
+            return joblib.load(os.path.join(directory, ONLINE_MODEL))
+        base = self._base_features(directory)
+        if base is None:
+            return None
+        # Bootstrap, once per fully retrained version, from its training rows
+        X, y = base
+        classes = np.union1d(np.unique(y), np.asarray(current.classes_).astype(str))
+        clf = build_streaming_classifier(self.backend)
+        for _ in range(BOOTSTRAP_EPOCHS):
+            for start in range(0, X.shape[0], BATCH_ROWS):
+                clf.partial_fit(X[start:start + BATCH_ROWS], y[start:start + BATCH_ROWS], classes=classes)
+        return clf
+
+    def _feedback_features(self, vectorizer, version, entries):
+        """
+        (X, y, holdout) of feedback entries, TF-IDF rows served from (or
+        added to) the feedback feature store of this vectorizer version.
+        """
+        digests = [entry['digest'] for entry in entries]
+        X = self.log.features(version).transform(
+            vectorizer, digests, [entry['cleaned'] for entry in entries])
+        y = np.array([entry['category'] for entry in entries], dtype=object).astype(str)
+        return X, y, np.array([is_holdout(digest) for digest in digests], dtype=bool)
+
+    def _held_out(self, holdout, records):
+        """
+        [digest, offset] of the latest correction of each held-out resume,
+        up to MAX_HOLDOUT_ROWS: the state's list updated with new records.
+        """
+        latest = {digest: offset for digest, offset in holdout}
+        for offset, entry in records:
+            if is_holdout(entry['digest']):
+                latest.pop(entry['digest'], None)
+                latest[entry['digest']] = offset
+        return [[digest, offset] for digest, offset in latest.items()][-MAX_HOLDOUT_ROWS:]
+
+    def _holdout(self, vectorizer, version, held_out, known):
+        entries = [entry for entry in self.log.read_at([offset for _, offset in held_out])
+                   if entry['category'] in known]
+        if not entries:
+            return None, np.zeros(0, dtype=str)
+        X, y, _ = self._feedback_features(vectorizer, version, entries)
+        return X, y
+
+def _accuracy(model, X, y):
+    if not len(y):
+        return 0.0
+    return round(float((np.asarray(model.predict(X)).astype(str) == y).mean()), 4)
@@ -1,64 +1,327 @@
 import PyPDF2
 import docx
+import codecs
+import io
+import json
 import os
+import time
+from collections import namedtuple
+from html.parser import HTMLParser
+
+# Extraction budgets: a huge upload yields its first pages instead of pinning a worker
+MAX_PAGES = 100
+MAX_CHARS = 1000000
+MAX_SECONDS = 10.0
+
+def iter_pdf_pages(file_stream):
+    """
+    Yields the text of a PDF one page at a time.
+    """
+    pdf_reader = PyPDF2.PdfReader(file_stream)
+    for page in pdf_reader.pages:
+        yield page.extract_text()
+
+def iter_docx_paragraphs(file_stream):
+    """
+    Yields the text of a DOCX one paragraph at a time.
+    """
+    for para in docx.Document(file_stream).paragraphs:
+        yield para.text
+
+def collect_text(chunks, max_chunks=None, max_chars=MAX_CHARS, max_seconds=MAX_SECONDS, early_exit_chars=None):
+    """
+    Joins text chunks (pages or paragraphs) once, stopping at whichever
+    budget runs out first:
+    - max_chunks: chunks read
+    - max_chars: characters kept (the last chunk is cut to fit)
+    - max_seconds: wall time, checked between chunks
+    - early_exit_chars: stop after the chunk that brings the text to this
+      many characters, enough to classify the document
+    None disables a budget.
+    """
+    start = time.perf_counter()
+    parts = []
+    size = 0
+    for chunk in chunks:
+        if max_chars is not None and size + len(chunk) > max_chars:
+            parts.append(chunk[:max(0, max_chars - size)])
+            break
+        parts.append(chunk)
+        size += len(chunk) + 1
+        if max_chunks is not None and len(parts) >= max_chunks:
+            break
+        if early_exit_chars is not None and size >= early_exit_chars:
+            break
+        if max_seconds is not None and time.perf_counter() - start >= max_seconds:
+            break
+    return " ".join(parts).strip()
 
-def extract_text_from_pdf(file_stream):
+def extract_text_from_pdf(file_stream, max_pages=MAX_PAGES, **limits):
     """
-    Extracts text from a PDF file stream or path.
+    Extracts text from a PDF file stream or path, reading at most max_pages
+    pages within the collect_text budgets.
     """
-    text = ""
     try:
-        pdf_reader = PyPDF2.PdfReader(file_stream)
-        for page in pdf_reader.pages:
-            text += page.extract_text() + " "
+        return collect_text(iter_pdf_pages(file_stream), max_chunks=max_pages, **limits)
     except Exception as e:
         print(f"Error reading PDF: {e}")
         return ""
-    return text.strip()
 
-def extract_text_from_docx(file_stream):
+def extract_text_from_docx(file_stream, max_pages=None, **limits):
     """
-    Extracts text from a DOCX file stream or path.
+    Extracts text from a DOCX file stream or path, within the collect_text
+    budgets. DOCX has no pages, so max_pages is ignored.
     """
-    text = ""
     try:
-        doc = docx.Document(file_stream)
-        for para in doc.paragraphs:
-            text += para.text + " "
+        return collect_text(iter_docx_paragraphs(file_stream), **limits)
     except Exception as e:
         print(f"Error reading DOCX: {e}")
         return ""
-    return text.strip()
 
-def extract_text(file_path):
+# Byte order marks, longest first (the UTF-32 LE one starts with the UTF-16 LE one)
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+# Tried in order when there is no BOM; latin-1 decodes any bytes, so it always ends the search
+FALLBACK_ENCODINGS = ('utf-8', 'cp1252', 'latin-1')
+
+def decode_text(data, final=True):
+    """
+    Decodes bytes of unknown encoding: by their BOM if they have one, else
+    as the first of FALLBACK_ENCODINGS that decodes them without errors.
+    With final=False (bytes cut off mid-file) a character split at the end
+    is dropped, rather than failing UTF-8 and falling back to cp1252.
+    """
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return codecs.getincrementaldecoder(encoding)(errors='replace').decode(data[len(bom):], final)
+    for encoding in FALLBACK_ENCODINGS:
+        try:
+            return codecs.getincrementaldecoder(encoding)().decode(data, final)
+        except UnicodeDecodeError:
+            continue
+
+def read_text(file_stream, max_chars=MAX_CHARS):
+    if max_chars is None:
+        return decode_text(file_stream.read())
+    # No character takes more than 4 bytes, so a max_chars budget caps the bytes read too
+    budget = max_chars * 4 + 4
+    data = file_stream.read(budget)
+    return decode_text(data, final=len(data) < budget)
+
+def extract_text_from_txt(file_stream, max_pages=None, max_chars=MAX_CHARS, **limits):
+    """
+    Extracts text from a plain text file stream, in whatever encoding
+    decode_text finds, within the collect_text budgets.
+    """
+    try:
+        return collect_text(read_text(file_stream, max_chars).splitlines(), max_chars=max_chars, **limits)
+    except Exception as e:
+        print(f"Error reading TXT: {e}")
+        return ""
+
+class _HTMLText(HTMLParser):
+    # Text content of an HTML document, one chunk per text node, without scripts and styles
+    SKIPPED = {'script', 'style', 'head', 'title', 'noscript', 'template'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED:
+            self._skipping += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED and self._skipping:
+            self._skipping -= 1
+
+    def handle_data(self, data):
+        if not self._skipping and not data.isspace():
+            self.chunks.append(data.strip())
+
+def iter_html_text(text):
+    """
+    Yields the text of an HTML document one text node at a time.
+    """
+    parser = _HTMLText()
+    parser.feed(text)
+    parser.close()
+    yield from parser.chunks
+
+def extract_text_from_html(file_stream, max_pages=None, max_chars=MAX_CHARS, **limits):
+    """
+    Extracts the visible text of an HTML file stream within the
+    collect_text budgets. Markup does not count towards max_chars, so up to
+    4x as many bytes are read as with plain text.
+    """
+    try:
+        html = read_text(file_stream, None if max_chars is None else max_chars * 4)
+        return collect_text(iter_html_text(html), max_chars=max_chars, **limits)
+    except Exception as e:
+        print(f"Error reading HTML: {e}")
+        return ""
+
+# Structured exports (JSON, JSON Lines) hold one resume per record. Its text is the first of
+# these fields that is a string; without one, every string in the record is joined.
+RECORD_TEXT_FIELDS = ('resume_text', 'resume', 'text', 'content', 'body')
+# What a record's result is listed as, when it has one of these fields
+RECORD_NAME_FIELDS = ('filename', 'file_name', 'name', 'id', 'candidate_id')
+
+def parse_record(raw):
+    """
+    A JSON record from its bytes, decoded with decode_text (json.loads
+    itself only takes UTF-8, -16 and -32).
+    """
+    return json.loads(decode_text(bytes(raw)))
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+def record_text(record):
+    if isinstance(record, dict):
+        for field in RECORD_TEXT_FIELDS:
+            if isinstance(record.get(field), str):
+                return record[field]
+    return "\n".join(_strings(record))
+
+def record_name(record):
+    if isinstance(record, dict):
+        for field in RECORD_NAME_FIELDS:
+            if isinstance(record.get(field), (str, int)) and str(record[field]).strip():
+                return str(record[field]).strip()
+    return None
+
+def extract_text_from_record(raw, max_pages=None, text=None, **limits):
+    """
+    Extracts the resume text of one structured record from its JSON bytes,
+    within the collect_text budgets. text is the record_text already parsed
+    out of them, if it was.
+    """
+    try:
+        if text is None:
+            text = record_text(parse_record(raw))
+        return collect_text(text.splitlines(), **limits)
+    except Exception as e:
+        print(f"Error reading record: {e}")
+        return ""
+
+def iter_jsonl_records(file_stream):
+    """
+    Yields (offset, bytes) of each non-blank line of a JSON Lines stream,
+    reading one line at a time.
+    """
+    offset = 0
+    for line in file_stream:
+        if line.strip():
+            yield offset, line
+        offset += len(line)
+
+def iter_json_records(file_stream):
+    """
+    Yields (None, bytes) of each record of a JSON document: the elements of
+    a top-level array, or the document itself. A .json file holding JSON
+    Lines is read as such.
+    """
+    data = file_stream.read()
+    try:
+        document = parse_record(data)
+    except ValueError:
+        yield from iter_jsonl_records(io.BytesIO(data))
+        return
+    for record in document if isinstance(document, list) else [document]:
+        yield None, json.dumps(record).encode()
+
+# One extractor per format:
+# - extract(stream, **limits) returns a document's text; records(stream) instead splits a
+#   structured export into one (offset or None, JSON bytes) per resume
+# - extensions and magic (leading bytes, compared case-insensitively after any BOM and
+#   whitespace) identify the format; magic wins over a misleading extension
+# - inline: cheap enough to run on the request thread, skipping the extraction pool
+Extractor = namedtuple('Extractor', ['name', 'extensions', 'magic', 'extract', 'records', 'inline'])
+EXTRACTORS = {}
+# Bytes read to sniff a file's format
+HEAD_BYTES = 512
+
+def register_extractor(name, extensions, magic=(), extract=None, records=None, inline=False):
+    """
+    Adds (or replaces) the extractor of a format. Registered extensions are
+    the ones uploads are accepted with.
+    """
+    EXTRACTORS[name] = Extractor(
+        name, tuple(ext.lower() for ext in extensions), tuple(m.lower() for m in magic),
+        extract, records, inline
+    )
+
+register_extractor('pdf', ['pdf'], [b'%PDF-'], extract=extract_text_from_pdf)
+register_extractor('docx', ['docx'], [b'PK\x03\x04'], extract=extract_text_from_docx)
+register_extractor('txt', ['txt', 'text'], extract=extract_text_from_txt, inline=True)
+register_extractor('html', ['html', 'htm'], [b'<!doctype html', b'<html'], extract=extract_text_from_html, inline=True)
+register_extractor('json', ['json'], records=iter_json_records, inline=True)
+register_extractor('jsonl', ['jsonl', 'ndjson'], records=iter_jsonl_records, inline=True)
+
+def supported_extensions(documents_only=False):
+    """
+    Extensions of the registered formats; with documents_only, only those
+    of formats holding one resume (not structured exports).
+    """
+    return {
+        ext for extractor in EXTRACTORS.values() if not (documents_only and extractor.records)
+        for ext in extractor.extensions
+    }
+
+def find_extractor(filename, head=b''):
+    """
+    The extractor for a file, from its first bytes if they match a
+    registered magic, else from its extension. None if neither is known.
+    """
+    for bom, _ in BOMS:
+        if head.startswith(bom):
+            head = head[len(bom):]
+            break
+    head = head.lstrip().lower()
+    for extractor in EXTRACTORS.values():
+        if any(head.startswith(magic) for magic in extractor.magic):
+            return extractor
+    ext = os.path.splitext(filename)[1].lower().lstrip('.')
+    for extractor in EXTRACTORS.values():
+        if ext in extractor.extensions:
+            return extractor
+    return None
+
+def _extract_with(extractor, file_stream, **limits):
+    if extractor.extract is not None:
+        return extractor.extract(file_stream, **limits)
+    # A structured export read as one document: its resumes' texts, joined
+    texts = (extract_text_from_record(raw, **limits) for _, raw in extractor.records(file_stream))
+    return collect_text([text for text in texts if text], max_chars=limits.get('max_chars', MAX_CHARS))
+
+def extract_text(file_path, **limits):
     """
     Determines file type and extracts text accordingly.
     """
-    ext = os.path.splitext(file_path)[1].lower()
-    
     with open(file_path, 'rb') as f:
-        if ext == '.pdf':
-            return extract_text_from_pdf(f)
-        elif ext == '.docx':
-            return extract_text_from_docx(f)
-        else:
-            return ""
-
-import io
+        return extract_text_from_stream(f, file_path, **limits)
 
-def extract_text_from_stream(file_stream, filename):
+def extract_text_from_stream(file_stream, filename, **limits):
     """
-    Helper for handling Flask uploads directly.
+    Helper for handling Flask uploads directly. The format is sniffed from
+    the first bytes of the (seekable) stream, then the extension; unknown
+    formats are read as plain text.
     """
-    ext = os.path.splitext(filename)[1].lower()
-    
-    if ext == '.pdf':
-        return extract_text_from_pdf(file_stream)
-    elif ext == '.docx':
-        return extract_text_from_docx(file_stream)
-    else:
-        # Try to read as plain text if all else fails
-        try:
-            return file_stream.read().decode('utf-8')
-        except:
-            return ""
+    head = file_stream.read(HEAD_BYTES)
+    file_stream.seek(0)
+    extractor = find_extractor(filename, head) or EXTRACTORS['txt']
+    return _extract_with(extractor, file_stream, **limits)
@@ -0,0 +1,47 @@
+import numpy as np
+import scipy.sparse as sp
+from app.utils.job_profile import JobProfile
+from app.utils.lsa import cosine
+from app.utils.preprocessing import clean_text
+from app.utils.sample_jds import SAMPLE_JDS
+
+class SampleJDIndex:
+    """
+    The sample job descriptions compiled once against a vectorizer: a
+    JobProfile per category (cleaned text, TF-IDF row, ranked keywords and
+    compiled ATS rules) and the rows stacked for one-product scoring. With
+    an LSAProjection, their LSA vectors are stacked too and scored instead.
+    """
+
+    def __init__(self, vectorizer, sample_jds=SAMPLE_JDS, lsa=None):
+        self.categories = list(sample_jds)
+        self.lsa = lsa
+        self.profiles = {
+            category: JobProfile(clean_text(sample_jds[category]), vectorizer, lsa) for category in self.categories
+        }
+        self.matrix = sp.vstack([self.profiles[category].vector for category in self.categories], format='csr')
+        self.dense = None
+        if lsa is not None:
+            self.dense = np.vstack([self.profiles[category].dense for category in self.categories])
+        self._rows = {category: i for i, category in enumerate(self.categories)}
+
+    def __contains__(self, category):
+        return category in self._rows
+
+    def vector(self, category):
+        return self.matrix[self._rows[category]]
+
+    def score_all(self, resume_vector):
+        """
+        Semantic match (cosine similarity x 100) of one resume against every
+        category's JD in a single sparse product (or dense, in LSA space).
+        Returns {category: score}.
+        """
+        if self.dense is not None:
+            scores = cosine(self.dense, self.lsa.transform(resume_vector))[:, 0] * 100
+            return dict(zip(self.categories, scores))
+        from sklearn.metrics.pairwise import cosine_similarity
+
+        # JD rows on the left, as in the per-category call, so scores are identical
+        scores = cosine_similarity(self.matrix, resume_vector)[:, 0] * 100
+        return dict(zip(self.categories, scores))
@@ -0,0 +1,98 @@
+import numpy as np
+import scipy.sparse as sp
+from app.utils.ats_evaluator import ATSRuleEngine, KEYWORD_PATTERN, extract_keywords
+from app.utils.lsa import cosine
+
+MISSING_KEYWORDS_LIMIT = 10
+
+class JobProfile:
+    """
+    Everything derived from one cleaned job description, built once and
+    reused for every resume scored against it: the TF-IDF vector, the ATS
+    keyword set and each keyword's vocabulary id and TF-IDF weight.
+
+    Keywords are ranked by their weight in the JD vector (ties and words
+    outside the vocabulary alphabetically), so missing keywords always come
+    back most important first.
+
+    With an LSAProjection, the JD is also projected once (dense) and
+    semantic scores are computed in LSA space.
+    """
+
+    def __init__(self, cleaned_jd, vectorizer, lsa=None):
+        self.cleaned = cleaned_jd
+        self.keywords = extract_keywords(cleaned_jd)
+        self.lsa = lsa
+
+        try:
+            self.vector = vectorizer.transform([cleaned_jd])
+        except Exception as e:
+            print(f"Error transforming JD: {e}")
+            self.vector = None
+        self.dense = lsa.transform(self.vector)[0] if lsa is not None and self.vector is not None else None
+
+        # A lone keyword transforms to at most one column: its vocabulary id
+        words = sorted(self.keywords)
+        self.vocabulary_ids = np.full(len(words), -1)
+        self.weights = np.zeros(len(words))
+        if words and self.vector is not None:
+            columns = vectorizer.transform(words).tocsr()
+            has_column = np.diff(columns.indptr) > 0
+            self.vocabulary_ids[has_column] = columns.indices[columns.indptr[:-1][has_column]]
+            self.weights[has_column] = self.vector.toarray()[0, self.vocabulary_ids[has_column]]
+
+        order = np.lexsort((np.arange(len(words)), -self.weights))
+        self.ranked_keywords = [words[i] for i in order]
+        self.vocabulary_ids = self.vocabulary_ids[order]
+        self.weights = self.weights[order]
+        self._columns = {word: i for i, word in enumerate(self.ranked_keywords)}
+        self.rules = ATSRuleEngine(cleaned_jd, self.keywords, keyword_order=self.ranked_keywords)
+
+    def similarity(self, resume_matrix):
+        """
+        Cosine similarity of the JD to every TF-IDF row of resume_matrix:
+        of the LSA vectors when the profile has a projection, else of the
+        TF-IDF rows themselves.
+        """
+        if self.dense is not None:
+            return cosine(self.lsa.transform(resume_matrix), self.dense[np.newaxis])[:, 0]
+        from sklearn.metrics.pairwise import cosine_similarity
+
+        # Same argument order as the per-file call so every score is bit-identical
+        return cosine_similarity(self.vector, resume_matrix)[0]
+
+    def keyword_presence(self, texts):
+        """
+        Sparse boolean matrix (texts x ranked keywords) of which JD keywords
+        each text contains.
+        """
+        indices = []
+        indptr = [0]
+        for text in texts:
+            found = self.keywords.intersection(KEYWORD_PATTERN.findall(text.lower()))
+            indices.extend(self._columns[word] for word in found)
+            indptr.append(len(indices))
+        return sp.csr_matrix(
+            (np.ones(len(indices), dtype=bool), indices, indptr),
+            shape=(len(texts), len(self.ranked_keywords))
+        )
+
+    def keyword_match(self, texts, limit=MISSING_KEYWORDS_LIMIT):
+        """
+        ATS keyword score and the top `limit` missing keywords (by JD weight)
+        for every text, computed with array operations over the whole batch.
+        Returns (scores, missing_lists).
+        """
+        if not self.ranked_keywords:
+            return [0] * len(texts), [[] for _ in texts]
+
+        present = self.keyword_presence(texts)
+        n_keywords = len(self.ranked_keywords)
+        scores = [round((common / n_keywords) * 100, 1) for common in np.diff(present.indptr).tolist()]
+        missing = ~present.toarray()
+        # Keep the first `limit` missing columns of each row; columns are already in rank order
+        keep = missing & (np.cumsum(missing, axis=1) <= limit)
+        rows, columns = np.nonzero(keep)
+        splits = np.searchsorted(rows, np.arange(1, len(texts)))
+        words = np.array(self.ranked_keywords, dtype=object)
+        return scores, [list(words[group]) for group in np.split(columns, splits)]
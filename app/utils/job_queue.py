@@ -0,0 +1,122 @@
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+class ScreeningJob:
+    """
+    One bulk screening request: a job description and the resumes to rank
+    against it. Results are appended batch by batch, so a job can be read
+    while it is still running.
+    """
+
+    def __init__(self, job_description, uploads, top_k=None, model=None, cleanup=None):
+        self.id = uuid.uuid4().hex
+        self.job_description = job_description
+        self.uploads = uploads
+        self.top_k = top_k
+        # Every batch is scored with the model the job was submitted under
+        self.model = model
+        # Called once the job is over, e.g. to delete the spooled upload files
+        self.cleanup = cleanup
+        self.total = len(uploads)
+        self.status = 'queued'
+        self.error = None
+        self.results = []
+        self.failed = []
+        self.processed = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self, offset=0, limit=None):
+        # Every batch is merged in ranked, so this is already in order
+        end = offset + limit if limit else None
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'total': self.total,
+            'processed': self.processed,
+            'failed': list(self.failed),
+            'top_k': self.top_k,
+            'results': self.results[offset:end],
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+class JobQueue:
+    """
+    In-process stand-in for a job broker. Jobs run on a small thread pool;
+    each one is scored in batches of batch_size resumes by score_batch, a
+    callable taking (model, job_description, uploads, top_k) and returning
+    (ranked_results, failed_filenames). A job with top_k keeps only its best
+    top_k results across batches. Only the most recent max_jobs finished
+    jobs are kept.
+    """
+
+    def __init__(self, score_batch, workers=2, batch_size=16, max_jobs=100):
+        self.score_batch = score_batch
+        self.batch_size = batch_size
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='screening')
+
+    def submit(self, job_description, uploads, top_k=None, model=None, cleanup=None):
+        job = ScreeningJob(job_description, uploads, top_k, model, cleanup)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id, offset=0, limit=None):
+        """
+        Returns a snapshot of the job as a dict (a page of the results ranked
+        so far), or None.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict(offset, limit) if job else None
+
+    def _run(self, job):
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            for start in range(0, len(job.uploads), self.batch_size):
+                batch = job.uploads[start:start + self.batch_size]
+                results, failed = self.score_batch(job.model, job.job_description, batch, job.top_k)
+                # Both lists are ranked: merge them, keeping earlier batches first on ties,
+                # and stop after top_k so the job never holds more than that
+                merged = heapq.merge(job.results, results, key=lambda x: -x['score'])
+                merged = list(itertools.islice(merged, job.top_k))
+                with self._lock:
+                    job.results = merged
+                    job.failed.extend(failed)
+                    job.processed += len(batch)
+            job.status = 'done'
+        except Exception as e:
+            print(f"Error running screening job {job.id}: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            # The uploads (and the model, which may have been swapped out) are no longer needed
+            job.uploads = None
+            job.model = None
+            if job.cleanup:
+                job.cleanup()
+                job.cleanup = None
+            job.finished_at = time.time()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
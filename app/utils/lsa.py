@@ -0,0 +1,69 @@
+import numpy as np
+
+# Saved next to model.pkl by train_model.py --lsa
+LSA_FILE = 'lsa.npy'
+# Training rows the SVD is fitted on, at most (a seeded sample of larger matrices)
+MAX_FIT_ROWS = 200000
+
+class LSAProjection:
+    """
+    Latent semantic analysis of TF-IDF rows: their projection onto the top
+    singular vectors of the training matrix (a TruncatedSVD fitted by
+    train_model.py --lsa), as dense float32 vectors L2-normalized once.
+    Cosine similarity of two projected texts is then a plain dot product
+    over contiguous arrays, and terms that co-occur in the training data
+    match each other rather than only themselves.
+
+    basis is the (n_features x n_components) float32 matrix, saved as
+    LSA_FILE and memory-mapped on load, so worker processes share it.
+    """
+
+    def __init__(self, basis):
+        self.basis = basis
+
+    @property
+    def n_features(self):
+        return self.basis.shape[0]
+
+    @property
+    def n_components(self):
+        return self.basis.shape[1]
+
+    def transform(self, matrix):
+        """
+        Normalized (rows x n_components) float32 vectors of TF-IDF rows.
+        """
+        from sklearn.preprocessing import normalize
+
+        projected = np.asarray(matrix.astype(np.float32) @ self.basis, dtype=np.float32)
+        return normalize(np.ascontiguousarray(projected), copy=False)
+
+    def save(self, path):
+        np.save(path, np.ascontiguousarray(self.basis, dtype=np.float32))
+
+    @classmethod
+    def load(cls, path):
+        return cls(np.load(path, mmap_mode='r'))
+
+def cosine(a, b):
+    """
+    Cosine similarity of every pair of normalized LSA vectors (rows of a
+    x rows of b). Clipped to [0, 1] like TF-IDF cosines, which cannot be
+    negative.
+    """
+    return np.clip(np.asarray(a @ b.T, dtype=np.float64), 0, 1)
+
+def fit_lsa(X, n_components, random_state=0):
+    """
+    Fits a TruncatedSVD on TF-IDF training rows X. Returns the
+    LSAProjection and the share of the variance it keeps. n_components is
+    capped by the matrix rank.
+    """
+    from sklearn.decomposition import TruncatedSVD
+
+    if X.shape[0] > MAX_FIT_ROWS:
+        rows = np.random.default_rng(random_state).choice(X.shape[0], MAX_FIT_ROWS, replace=False)
+        X = X[np.sort(rows)]
+    n_components = max(1, min(n_components, X.shape[0], X.shape[1] - 1))
+    svd = TruncatedSVD(n_components=n_components, random_state=random_state).fit(X.astype(np.float32))
+    return LSAProjection(np.ascontiguousarray(svd.components_.T, dtype=np.float32)), float(svd.explained_variance_ratio_.sum())
@@ -0,0 +1,201 @@
+import json
+import os
+import re
+import numpy as np
+import scipy.sparse as sp
+from app.utils.model_backends import LinearModel
+
+MAPPED_DIR = 'mapped'
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+
+# TfidfVectorizer settings the mapped vectorizer reproduces exactly
+_TFIDF_DEFAULTS = {
+    'analyzer': 'word', 'lowercase': True, 'token_pattern': r'(?u)\b\w\w+\b', 'ngram_range': (1, 1),
+    'preprocessor': None, 'tokenizer': None, 'stop_words': None, 'strip_accents': None,
+    'input': 'content', 'binary': False, 'use_idf': True, 'sublinear_tf': False,
+}
+
+def _save(directory, name, array):
+    np.save(os.path.join(directory, name), np.ascontiguousarray(array), allow_pickle=False)
+
+def _load(directory, name):
+    return np.load(os.path.join(directory, name), mmap_mode='r', allow_pickle=False)
+
+def _tfidf_rows(counts, idf, norm):
+    """
+    Same arithmetic as TfidfTransformer.transform: scale each count by its
+    column's IDF, then normalize the rows.
+    """
+    from sklearn.preprocessing import normalize
+    counts.data *= idf[counts.indices]
+    if norm is not None:
+        counts = normalize(counts, norm=norm, copy=False)
+    return counts
+
+class MappedTfidfVectorizer:
+    """
+    Inference-only TfidfVectorizer whose vocabulary and IDF weights are
+    read-only memory maps, so every worker process shares one copy through
+    the page cache instead of unpickling its own vocabulary dict.
+
+    The vocabulary is a sorted fixed-width string array; a batch's tokens
+    are looked up with one searchsorted call. transform() returns the same
+    matrix as the TfidfVectorizer it was exported from.
+    """
+
+    def __init__(self, terms, columns, idf, norm='l2'):
+        self.terms = terms
+        self.columns = columns
+        self.idf = idf
+        self.norm = norm
+        self._width = terms.dtype.itemsize // 4
+        self._token_pattern = re.compile(_TFIDF_DEFAULTS['token_pattern'])
+
+    def transform(self, raw_documents):
+        # Each distinct token in the batch is looked up once
+        distinct = {}
+        token_ids = []
+        lengths = []
+        for doc in raw_documents:
+            doc_tokens = self._token_pattern.findall(doc.lower())
+            token_ids.extend([distinct.setdefault(token, len(distinct)) for token in doc_tokens])
+            lengths.append(len(doc_tokens))
+
+        column_of = np.full(len(distinct), -1)
+        # Tokens wider than the longest term cannot match (and would be truncated by the cast)
+        fits = np.flatnonzero(np.fromiter(map(len, distinct), dtype=np.int64, count=len(distinct)) <= self._width)
+        if len(fits):
+            words = np.array(list(distinct), dtype=object)[fits].astype(self.terms.dtype)
+            positions = np.minimum(np.searchsorted(self.terms, words), len(self.terms) - 1)
+            found = self.terms[positions] == words
+            column_of[fits[found]] = self.columns[positions[found]]
+
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        columns = column_of[np.array(token_ids, dtype=np.int64)]
+        known = columns >= 0
+        counts = sp.csr_matrix(
+            (np.ones(int(known.sum())), (rows[known], columns[known])),
+            shape=(len(lengths), len(self.idf)), dtype=np.float64
+        )
+        counts.sum_duplicates()
+        counts.sort_indices()
+        return _tfidf_rows(counts, self.idf, self.norm)
+
+class MappedHashingTfidf:
+    """
+    Inference-only HashingVectorizer + TfidfTransformer pipeline with the
+    IDF weights memory-mapped. Hashing needs no vocabulary, so the only
+    per-process state is the (stateless) hasher.
+    """
+
+    def __init__(self, hashing_params, idf, norm='l2', sublinear_tf=False):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        self.hasher = HashingVectorizer(**hashing_params)
+        self.idf = idf
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+
+    def transform(self, raw_documents):
+        counts = self.hasher.transform(raw_documents).tocsr()
+        if self.sublinear_tf:
+            np.log(counts.data, counts.data)
+            counts.data += 1.0
+        return _tfidf_rows(counts, self.idf, self.norm)
+
+def _export_vectorizer(vectorizer, directory):
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+    from sklearn.pipeline import Pipeline
+
+    if isinstance(vectorizer, TfidfVectorizer):
+        params = vectorizer.get_params()
+        if any(params[key] != value for key, value in _TFIDF_DEFAULTS.items()) or params['dtype'] != np.float64:
+            return None
+        terms = sorted(vectorizer.vocabulary_)
+        _save(directory, 'terms.npy', np.array(terms, dtype=f'U{max(map(len, terms), default=1)}'))
+        _save(directory, 'columns.npy', np.array([vectorizer.vocabulary_[term] for term in terms], dtype=np.int64))
+        _save(directory, 'idf.npy', vectorizer.idf_)
+        return {'kind': 'tfidf', 'norm': params['norm']}
+
+    if isinstance(vectorizer, Pipeline) and len(vectorizer.steps) == 2:
+        hasher, transformer = vectorizer.steps[0][1], vectorizer.steps[1][1]
+        if isinstance(hasher, HashingVectorizer) and isinstance(transformer, TfidfTransformer):
+            params = hasher.get_params()
+            if (not isinstance(params['analyzer'], str) or params['tokenizer'] is not None
+                    or params['preprocessor'] is not None or params['dtype'] != np.float64
+                    or not transformer.use_idf):
+                return None
+            params.pop('dtype')
+            params['ngram_range'] = list(params['ngram_range'])
+            _save(directory, 'idf.npy', transformer.idf_)
+            return {'kind': 'hashing', 'hashing': params, 'norm': transformer.norm,
+                    'sublinear_tf': transformer.sublinear_tf}
+    return None
+
+def export_artifacts(model, vectorizer, directory, source_version):
+    """
+    Writes the numeric parts of a trained vectorizer/model pair as .npy
+    files plus a manifest, for load_artifacts to memory-map. Linear models
+    (see compile_model) are exported too; any other model is left to its
+    pickle. Returns False when the vectorizer has no mapped form.
+    """
+    os.makedirs(directory, exist_ok=True)
+    # A stale manifest must never describe half-written arrays
+    manifest_path = os.path.join(directory, MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    vectorizer_spec = _export_vectorizer(vectorizer, directory)
+    if vectorizer_spec is None:
+        return False
+
+    model_spec = None
+    if isinstance(model, LinearModel):
+        _save(directory, 'classes.npy', model.classes_.astype(str))
+        _save(directory, 'coef.npy', model.coef_)
+        _save(directory, 'intercept.npy', model.intercept_)
+        if model.calibration is not None:
+            _save(directory, 'calibration_a.npy', model.calibration[0])
+            _save(directory, 'calibration_b.npy', model.calibration[1])
+        model_spec = {'kind': 'linear', 'link': model.link, 'calibrated': model.calibration is not None}
+
+    manifest = {
+        'format': FORMAT_VERSION, 'source_version': source_version,
+        'vectorizer': vectorizer_spec, 'model': model_spec,
+    }
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return True
+
+def load_artifacts(directory, source_version):
+    """
+    Memory-maps artifacts written by export_artifacts. Returns
+    (model, vectorizer), with model None when it was left to its pickle,
+    or None when there is no export for source_version.
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('format') != FORMAT_VERSION or manifest.get('source_version') != source_version:
+        return None
+
+    spec = manifest['vectorizer']
+    idf = _load(directory, 'idf.npy')
+    if spec['kind'] == 'tfidf':
+        vectorizer = MappedTfidfVectorizer(_load(directory, 'terms.npy'), _load(directory, 'columns.npy'), idf, spec['norm'])
+    else:
+        hashing = dict(spec['hashing'], ngram_range=tuple(spec['hashing']['ngram_range']))
+        vectorizer = MappedHashingTfidf(hashing, idf, spec['norm'], spec['sublinear_tf'])
+
+    model = None
+    spec = manifest['model']
+    if spec is not None:
+        calibration = None
+        if spec['calibrated']:
+            calibration = (_load(directory, 'calibration_a.npy'), _load(directory, 'calibration_b.npy'))
+        model = LinearModel(_load(directory, 'classes.npy'), _load(directory, 'coef.npy'),
+                            _load(directory, 'intercept.npy'), spec['link'], calibration)
+    return model, vectorizer
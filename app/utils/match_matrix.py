@@ -0,0 +1,218 @@
+import numpy as np
+import scipy.sparse as sp
+from app.utils.ats_evaluator import KEYWORD_PATTERN
+from app.utils.job_profile import MISSING_KEYWORDS_LIMIT
+from app.utils.lsa import cosine
+from app.utils.metrics import span
+from app.utils.scoring import rank_rows
+
+# Dense score cells (job descriptions x resumes) computed at a time
+BLOCK_CELLS = 1 << 22
+
+def _normalize(matrix):
+    from sklearn.preprocessing import normalize
+    return normalize(matrix)
+
+class JobSet:
+    """
+    Several job descriptions scored together against one pool of resumes:
+    their JobProfiles' TF-IDF rows stacked (and L2-normalized) into one
+    matrix, and their ATS keywords merged into one shared keyword list, so
+    the semantic scores and the keyword overlap of every (JD, resume) pair
+    each come from a single sparse product.
+
+    Scores are computed a block of resumes at a time, at most BLOCK_CELLS
+    cells, so memory stays bounded however many JDs and resumes there are;
+    only each JD's running top rows and each resume's best JD are kept.
+
+    When the profiles have an LSAProjection, their LSA vectors are stacked
+    instead and every block of resumes is projected and scored densely.
+    """
+
+    def __init__(self, profiles, n_features):
+        self.profiles = profiles
+        vectors = [
+            profile.vector if profile.vector is not None else sp.csr_matrix((1, n_features))
+            for profile in profiles
+        ]
+        self.matrix = _normalize(sp.vstack(vectors, format='csr'))
+        self.lsa = profiles[0].lsa if profiles else None
+        self.dense = None
+        if self.lsa is not None:
+            self.dense = np.vstack([
+                profile.dense if profile.dense is not None else np.zeros(self.lsa.n_components, dtype=np.float32)
+                for profile in profiles
+            ])
+
+        self.keywords = sorted(set().union(*(profile.keywords for profile in profiles)))
+        self._columns = {word: i for i, word in enumerate(self.keywords)}
+        # Each JD's keywords, valued by their rank in that JD (1 = most important)
+        rows, columns, ranks = [], [], []
+        for m, profile in enumerate(profiles):
+            for rank, word in enumerate(profile.ranked_keywords):
+                rows.append(m)
+                columns.append(self._columns[word])
+                ranks.append(rank + 1)
+        self.keyword_ranks = sp.csr_matrix((ranks, (rows, columns)), shape=(len(profiles), len(self.keywords)))
+        self.keyword_counts = np.diff(self.keyword_ranks.indptr)
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def keyword_presence(self, texts):
+        """
+        Sparse boolean matrix (texts x shared keywords) of which keywords of
+        any of the JDs each text contains. Each text is scanned once.
+        """
+        keywords = set(self.keywords)
+        indices = []
+        indptr = [0]
+        for text in texts:
+            found = keywords.intersection(KEYWORD_PATTERN.findall(text.lower()))
+            indices.extend(self._columns[word] for word in found)
+            indptr.append(len(indices))
+        return sp.csr_matrix(
+            (np.ones(len(indices), dtype=bool), indices, indptr),
+            shape=(len(texts), len(self.keywords))
+        )
+
+    def block_size(self):
+        return max(1, BLOCK_CELLS // max(1, len(self)))
+
+    def similarities(self, resume_rows):
+        """
+        JDs x resumes cosine similarities to some TF-IDF resume rows.
+        """
+        if self.dense is not None:
+            return cosine(self.dense, self.lsa.transform(resume_rows))
+        return (self.matrix @ _normalize(resume_rows).T).toarray()
+
+    def scores(self, resume_matrix):
+        """
+        Yields (first resume, JDs x resumes block of scores), the cosine
+        similarity x 100 rounded as score_resumes does, a block at a time.
+        """
+        block = self.block_size()
+        for start in range(0, resume_matrix.shape[0], block):
+            yield start, np.round(self.similarities(resume_matrix[start:start + block]) * 100, 2)
+
+    def rank(self, resume_matrix, top_k):
+        """
+        Every JD's top_k resumes, ranked (ties in upload order), and every
+        resume's best JD. Returns (rows, scores, best_jobs, best_scores):
+        per JD arrays of resume indexes and their scores, then for each
+        resume the index of its best scoring JD (the first on ties) and
+        that score.
+        """
+        n = resume_matrix.shape[0]
+        rows = [np.zeros(0, dtype=np.intp) for _ in self.profiles]
+        scores = [np.zeros(0) for _ in self.profiles]
+        best_jobs = np.zeros(n, dtype=np.intp)
+        best_scores = np.zeros(n)
+        for start, block in self.scores(resume_matrix):
+            best_jobs[start:start + block.shape[1]] = block.argmax(axis=0)
+            best_scores[start:start + block.shape[1]] = block.max(axis=0)
+            candidates = np.arange(start, start + block.shape[1])
+            for m in range(len(self)):
+                # Earlier blocks' picks first, so ties keep upload order
+                merged_rows = np.concatenate([rows[m], candidates])
+                merged_scores = np.concatenate([scores[m], block[m]])
+                keep = rank_rows(merged_scores, top_k)
+                rows[m], scores[m] = merged_rows[keep], merged_scores[keep]
+        return rows, scores, best_jobs, best_scores
+
+    def assign(self, resume_matrix, rows):
+        """
+        One distinct resume per JD, maximizing the total score. rows must
+        hold at least len(self) top resumes per JD: a JD's resume in the
+        best assignment is always among its len(self) best, so only those
+        are considered. Returns (job indexes, resume indexes, scores).
+        """
+        from scipy.optimize import linear_sum_assignment
+
+        candidates = np.unique(np.concatenate(rows))
+        if not len(candidates):
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0)
+        scores = np.round(self.similarities(resume_matrix[candidates]) * 100, 2)
+        jobs, picks = linear_sum_assignment(scores, maximize=True)
+        return jobs, candidates[picks], scores[jobs, picks]
+
+    def keyword_gaps(self, jobs, resumes, presence, limit=MISSING_KEYWORDS_LIMIT):
+        """
+        ATS keyword score and the top `limit` missing keywords (by JD
+        weight) of each (jobs[i], resumes[i]) pair, given keyword_presence()
+        of the resumes, with array operations over all the pairs at once.
+        Returns (scores, missing_lists), as JobProfile.keyword_match.
+        """
+        jobs, resumes = np.asarray(jobs, dtype=np.intp), np.asarray(resumes, dtype=np.intp)
+        if not len(jobs):
+            return [], []
+        ranks = self.keyword_ranks[jobs]
+        found = ranks.multiply(presence[resumes]).tocsr()
+        counts = self.keyword_counts[jobs]
+        common = np.diff(found.indptr)
+        scores = [round((c / n) * 100, 1) if n else 0 for c, n in zip(common.tolist(), counts.tolist())]
+
+        missing = (ranks - found).tocoo()
+        missing.eliminate_zeros()
+        # Pair by pair, most important missing keyword first
+        order = np.lexsort((missing.data, missing.row))
+        pair, column = missing.row[order], missing.col[order]
+        starts = np.searchsorted(pair, np.arange(len(jobs)))
+        keep = np.arange(len(pair)) - starts[pair] < limit
+        words = np.array(self.keywords, dtype=object)
+        splits = np.searchsorted(pair[keep], np.arange(1, len(jobs)))
+        return scores, [list(group) for group in np.split(words[column[keep]], splits)]
+
+def match_matrix(job_set, cleaned_resumes, resume_matrix, model=None, top_k=None, assign=True):
+    """
+    Scores N cleaned resumes (and their TF-IDF rows) against every JD of a
+    JobSet. Returns (rankings, best_fit, assignment): for each JD its top_k
+    results (all by default) as dicts like score_resumes', with the
+    keyword_score of the pair; for each resume its best JD index and score;
+    and the one-resume-per-JD assignment maximizing the total score as
+    (JD index, resume index, score) tuples (empty with assign=False).
+    """
+    n = len(cleaned_resumes)
+    keep = n if top_k is None else top_k
+    if assign:
+        keep = max(keep, len(job_set))
+    with span('cosine_similarity'):
+        rows, scores, best_jobs, best_scores = job_set.rank(resume_matrix, keep)
+    assignment = []
+    if assign:
+        with span('assign'):
+            assignment = list(zip(*job_set.assign(resume_matrix, rows)))
+    if top_k is not None:
+        rows, scores = [r[:top_k] for r in rows], [s[:top_k] for s in scores]
+
+    # Only resumes that are returned are classified and checked for keywords
+    shown = np.unique(np.concatenate(rows + [np.zeros(0, dtype=np.intp)]))
+    categories = {}
+    if model is not None and len(shown):
+        with span('predict'):
+            categories = dict(zip(shown.tolist(), model.predict(resume_matrix[shown])))
+    with span('keywords'):
+        presence = job_set.keyword_presence([cleaned_resumes[i] for i in shown])
+        position = {row: i for i, row in enumerate(shown.tolist())}
+        jobs = np.concatenate([np.full(len(r), m) for m, r in enumerate(rows)] + [np.zeros(0, dtype=np.intp)])
+        pairs = [position[row] for r in rows for row in r.tolist()]
+        keyword_scores, missing = job_set.keyword_gaps(jobs, pairs, presence)
+
+    rankings = []
+    pair = 0
+    for m in range(len(job_set)):
+        results = []
+        for i, score in zip(rows[m].tolist(), scores[m].tolist()):
+            results.append({
+                'resume': i,
+                'category': categories.get(i, "Unknown"),
+                'score': score,
+                'keyword_score': keyword_scores[pair],
+                'missing_keywords': missing[pair],
+                'excerpt': cleaned_resumes[i][:200] + "..."
+            })
+            pair += 1
+        rankings.append(results)
+    best_fit = list(zip(best_jobs.tolist(), best_scores.tolist()))
+    return rankings, best_fit, [(int(m), int(i), float(s)) for m, i, s in assignment]
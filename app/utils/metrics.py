@@ -0,0 +1,136 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+SIZE_BUCKETS = [1024 * 4 ** i for i in range(10)]
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, key, extra=()):
+    pairs = list(zip(names, key)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """
+    Monotonic count per label combination.
+    """
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """
+    Bucketed distribution (cumulative buckets, sum and count) per label
+    combination.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = sorted(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((key, list(counts), total) for key, (counts, total) in self._values.items())
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ['+Inf'], counts):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_value(float(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """
+    In-process metrics rendered in the Prometheus text exposition format.
+    Each worker process keeps its own values.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        return '\n'.join(line for metric in self._metrics for line in metric.render()) + '\n'
+
+REGISTRY = MetricsRegistry()
+REQUEST_SECONDS = REGISTRY.histogram(
+    'resume_screening_request_seconds', 'Request latency by endpoint and status.', ['endpoint', 'status'])
+STAGE_SECONDS = REGISTRY.histogram(
+    'resume_screening_stage_seconds', 'Time spent in each scoring stage (one observation per batch).', ['stage'])
+EXTRACTION_SECONDS = REGISTRY.histogram(
+    'resume_screening_extraction_seconds', 'Text extraction time per document.', ['file_type'])
+DOCUMENT_BYTES = REGISTRY.histogram(
+    'resume_screening_document_bytes', 'Size of uploaded documents.', ['file_type'], SIZE_BUCKETS)
+DOCUMENT_CHARS = REGISTRY.histogram(
+    'resume_screening_document_chars', 'Characters of text extracted per document.', ['file_type'], SIZE_BUCKETS)
+EXTRACTION_FAILURES = REGISTRY.counter(
+    'resume_screening_extraction_failures_total',
+    'Documents that yielded no text, by reason (error, timeout, crash, empty).', ['file_type', 'reason'])
+DUPLICATES = REGISTRY.counter(
+    'resume_screening_duplicates_total',
+    'Resumes flagged as duplicates, by kind (exact, near, seen_before).', ['kind'])
+MODEL_MISSING = REGISTRY.counter(
+    'resume_screening_model_missing_total', 'Requests scored without a trained model.', ['endpoint'])
+
+def file_type(filename):
+    return os.path.splitext(filename)[1].lower().lstrip('.') or 'none'
+
+@contextmanager
+def span(stage):
+    """
+    Times the enclosed block into the stage latency histogram.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
@@ -0,0 +1,113 @@
+import numpy as np
+from scipy.special import expit, softmax
+
+BACKENDS = ['svc', 'linear_svc', 'logistic', 'sgd']
+DEFAULT_BACKEND = 'linear_svc'
+
+def build_classifier(backend=DEFAULT_BACKEND):
+    """
+    Returns an unfitted classifier for the named backend:
+    - svc: the original OneVsRest kernel SVC with Platt-scaled probabilities
+    - linear_svc: LinearSVC calibrated with one sigmoid per class
+    - logistic: multinomial logistic regression
+    - sgd: logistic-loss SGD (also supports partial_fit)
+    """
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.multiclass import OneVsRestClassifier
+    from sklearn.svm import SVC, LinearSVC
+
+    if backend == 'svc':
+        return OneVsRestClassifier(SVC(kernel='linear', probability=True))
+    if backend == 'linear_svc':
+        # ensemble=False keeps a single LinearSVC, so inference stays one matmul
+        return CalibratedClassifierCV(LinearSVC(), method='sigmoid', cv=3, ensemble=False)
+    if backend == 'logistic':
+        return LogisticRegression(C=10.0, max_iter=1000)
+    if backend == 'sgd':
+        return SGDClassifier(loss='log_loss', alpha=1e-5, max_iter=200, tol=1e-4, random_state=42)
+    raise ValueError(f"Unknown model backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+
+class LinearModel:
+    """
+    Inference-only form of a fitted linear classifier. predict and
+    predict_proba are a single sparse matmul against the coefficient
+    matrix followed by the backend's probability link:
+    - softmax: multinomial logistic regression, multinomial naive Bayes
+    - ovr: one-vs-rest logistic outputs, normalized (SGD)
+    - sigmoid: per-class Platt calibration, normalized (calibrated LinearSVC)
+    Outputs match the sklearn estimator it was compiled from.
+    """
+
+    def __init__(self, classes, coef, intercept, link, calibration=None):
+        self.classes_ = np.asarray(classes)
+        self.coef_ = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept_ = np.asarray(intercept, dtype=np.float64)
+        self.link = link
+        # (a, b) arrays of the sigmoid calibrators, for link='sigmoid'
+        self.calibration = calibration
+
+    def decision_function(self, X):
+        scores = X @ self.coef_.T + self.intercept_
+        return np.asarray(scores)
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        # Binary linear models carry one column of scores for the positive class
+        binary = scores.shape[1] == 1
+
+        if self.link == 'softmax':
+            if binary:
+                positive = expit(scores[:, 0])
+                return np.column_stack([1 - positive, positive])
+            return softmax(scores, axis=1)
+
+        if self.link == 'ovr':
+            proba = expit(scores)
+            if binary:
+                return np.column_stack([1 - proba[:, 0], proba[:, 0]])
+            return proba / proba.sum(axis=1).reshape((-1, 1))
+
+        a, b = self.calibration
+        proba = expit(-(scores * a + b))
+        if binary:
+            return np.column_stack([1 - proba[:, 0], proba[:, 0]])
+        denominator = proba.sum(axis=1)[:, np.newaxis]
+        uniform = np.full_like(proba, 1 / len(self.classes_))
+        return np.divide(proba, denominator, out=uniform, where=denominator != 0)
+
+    def predict(self, X):
+        # Calibration can reorder classes, so the calibrated model predicts from probabilities
+        scores = self.predict_proba(X) if self.link == 'sigmoid' else self.decision_function(X)
+        return self.classes_[np.argmax(scores, axis=1)]
+
+def compile_model(clf):
+    """
+    Collapses a fitted linear backend into a LinearModel. Models it cannot
+    collapse (e.g. the kernel SVC backend) are returned unchanged.
+    """
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.naive_bayes import MultinomialNB
+
+    if isinstance(clf, MultinomialNB):
+        # The joint log-likelihood is linear in the counts; probabilities are its softmax
+        return LinearModel(clf.classes_, clf.feature_log_prob_, clf.class_log_prior_, 'softmax')
+
+    if isinstance(clf, LogisticRegression):
+        link = 'ovr' if getattr(clf, 'multi_class', 'auto') == 'ovr' else 'softmax'
+        return LinearModel(clf.classes_, clf.coef_, clf.intercept_, link)
+
+    if isinstance(clf, SGDClassifier) and clf.loss == 'log_loss':
+        return LinearModel(clf.classes_, clf.coef_, clf.intercept_, 'ovr')
+
+    if (isinstance(clf, CalibratedClassifierCV) and clf.method == 'sigmoid'
+            and len(clf.calibrated_classifiers_) == 1):
+        calibrated = clf.calibrated_classifiers_[0]
+        estimator = calibrated.estimator
+        if hasattr(estimator, 'coef_') and list(estimator.classes_) == list(clf.classes_):
+            a = np.array([calibrator.a_ for calibrator in calibrated.calibrators])
+            b = np.array([calibrator.b_ for calibrator in calibrated.calibrators])
+            return LinearModel(clf.classes_, estimator.coef_, estimator.intercept_, 'sigmoid', (a, b))
+
+    return clf
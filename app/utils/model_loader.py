@@ -0,0 +1,238 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+import joblib
+from app.utils.jd_index import SampleJDIndex
+from app.utils.lsa import LSA_FILE, LSAProjection
+from app.utils.mapped_artifacts import MAPPED_DIR, load_artifacts
+from app.utils.preprocessing import load_lemma_cache
+from app.utils.text_cache import file_fingerprint
+
+VERSIONS_DIR = 'versions'
+CURRENT_FILE = 'current'
+
+def current_version(model_dir):
+    """
+    Name of the artifact version model_dir/current points at, or None
+    when there is no pointer (artifacts saved straight into model_dir).
+    """
+    try:
+        with open(os.path.join(model_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def artifact_dir(model_dir, name=None):
+    """
+    Directory holding the artifacts of version `name` (default: current).
+    """
+    name = name or current_version(model_dir)
+    return os.path.join(model_dir, VERSIONS_DIR, name) if name else model_dir
+
+def stage_version(model_dir):
+    """
+    Creates an empty staging directory to save a new version's artifacts in.
+    Nothing reads it until publish_version moves it into place.
+    """
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    staging = os.path.join(model_dir, VERSIONS_DIR, f".staging-{name}")
+    os.makedirs(staging)
+    return staging
+
+def publish_version(model_dir, staging, keep=3):
+    """
+    Moves a fully written staging directory into versions/ and atomically
+    repoints model_dir/current at it, so readers only ever see complete
+    versions. Older versions beyond the newest `keep` are deleted.
+    Returns the new version's name.
+    """
+    name = os.path.basename(staging)[len('.staging-'):]
+    versions = os.path.join(model_dir, VERSIONS_DIR)
+    os.rename(staging, os.path.join(versions, name))
+
+    pointer = os.path.join(model_dir, CURRENT_FILE)
+    with open(f"{pointer}.tmp-{os.getpid()}", 'w') as f:
+        f.write(name + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{pointer}.tmp-{os.getpid()}", pointer)
+
+    published = published_versions(model_dir)
+    for old in published[:max(0, len(published) - max(keep, 1))]:
+        # Mapped arrays of a deleted version stay readable to processes still using them
+        shutil.rmtree(os.path.join(versions, old), ignore_errors=True)
+    return name
+
+def published_versions(model_dir):
+    """
+    Names of the published versions under model_dir, oldest first.
+    """
+    versions = os.path.join(model_dir, VERSIONS_DIR)
+    if not os.path.isdir(versions):
+        return []
+    return sorted(entry for entry in os.listdir(versions) if not entry.startswith('.'))
+
+def vectorizer_versions(model_dir):
+    """
+    Fingerprints of the vectorizers of every published version (and of
+    artifacts saved straight into model_dir), i.e. every vectorizer a
+    process may still be serving.
+    """
+    paths = [os.path.join(artifact_dir(model_dir, name), 'vectorizer.pkl') for name in published_versions(model_dir)]
+    paths.append(os.path.join(model_dir, 'vectorizer.pkl'))
+    fingerprints = set()
+    for path in paths:
+        try:
+            fingerprints.add(file_fingerprint(path))
+        except OSError:
+            # Missing, or deleted by a concurrent publish
+            pass
+    return fingerprints
+
+def artifact_version(model_path, vectorizer_path):
+    """
+    Identifies a model/vectorizer pickle pair, so a mapped export is only
+    used for the pickles it was exported from.
+    """
+    return f"{file_fingerprint(vectorizer_path)}:{file_fingerprint(model_path)}"
+
+class ModelBundle:
+    """
+    A vectorizer/model pair loaded together, plus the vectorizer fingerprint
+    used to key cached TF-IDF rows and the sample JDs compiled against the
+    vectorizer. lsa is the version's LSAProjection, if it was trained with
+    one. Everything is None when the artifacts are missing.
+    """
+
+    def __init__(self, model=None, vectorizer=None, version=None, jd_index=None, load_seconds=0.0, name=None,
+                 lsa=None):
+        self.model = model
+        self.vectorizer = vectorizer
+        self.version = version
+        self.jd_index = jd_index
+        self.lsa = lsa
+        self.load_seconds = load_seconds
+        # Artifact version directory the bundle came from (None for the flat layout)
+        self.name = name
+        self.loaded_at = time.time()
+
+class ModelStore:
+    """
+    Loads the trained artifacts on first use instead of at import, so worker
+    boot stays cheap. Thread-safe; every caller gets the same bundle until
+    reload() swaps in a newly published version. The new bundle is fully
+    loaded before the swap, and requests already holding the old one finish
+    with it.
+
+    With watch_interval set, a background thread in each process polls the
+    `current` pointer and reloads when it changes. Callbacks registered with
+    on_swap run after every swap, to drop anything cached for the old bundle.
+    """
+
+    def __init__(self, model_dir='app/models', watch_interval=0):
+        self.model_dir = model_dir
+        self.watch_interval = watch_interval
+        self.reloads = 0
+        self._bundle = None
+        self._failed_name = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._watcher_pid = None
+
+    def get(self):
+        # Threads don't survive a fork, so each worker process starts its own watcher
+        if self.watch_interval and self._watcher_pid != os.getpid():
+            self._start_watcher()
+        bundle = self._bundle
+        if bundle is None:
+            with self._lock:
+                if self._bundle is None:
+                    self._bundle = self._load(current_version(self.model_dir))
+                bundle = self._bundle
+        return bundle
+
+    def on_swap(self, callback):
+        self._listeners.append(callback)
+
+    def reload(self):
+        """
+        Loads the version `current` points at and swaps it in if it is not
+        the active one. A version that fails to load is skipped and the
+        active bundle kept. Returns True if the bundle was swapped.
+        """
+        with self._lock:
+            name = current_version(self.model_dir)
+            active = self._bundle
+            if (active is not None and name == active.name) or (name is not None and name == self._failed_name):
+                return False
+            bundle = self._load(name)
+            if bundle.model is None and active is not None and active.model is not None:
+                print(f"WARNING: Could not load model version {name}; keeping {active.name}.")
+                self._failed_name = name
+                return False
+            self._bundle = bundle
+            self._failed_name = None
+            self.reloads += 1
+        for callback in self._listeners:
+            callback(bundle)
+        return True
+
+    def _start_watcher(self):
+        with self._lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+        threading.Thread(target=self._watch, name='model-watcher', daemon=True).start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.watch_interval)
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Error reloading models: {e}")
+
+    def _load(self, name):
+        start = time.perf_counter()
+        directory = artifact_dir(self.model_dir, name)
+        model_path = os.path.join(directory, 'model.pkl')
+        vectorizer_path = os.path.join(directory, 'vectorizer.pkl')
+        # We use a try-except block in case models aren't trained yet
+        try:
+            version = file_fingerprint(vectorizer_path)
+            # Memory-mapped arrays exported by train_model.py are shared by every
+            # worker through the page cache; the pickles are the fallback
+            mapped = load_artifacts(os.path.join(directory, MAPPED_DIR),
+                                    artifact_version(model_path, vectorizer_path))
+            model, vectorizer = mapped or (None, None)
+            if model is None:
+                model = joblib.load(model_path)
+            if vectorizer is None:
+                vectorizer = joblib.load(vectorizer_path)
+        except Exception:
+            print("WARNING: Models not found. Please train the model first.")
+            return ModelBundle(name=name)
+
+        # Warm the lemma memo table saved by train_model.py (optional)
+        load_lemma_cache(os.path.join(directory, 'lemmas.pkl'))
+        lsa = self._load_lsa(directory, vectorizer)
+        jd_index = SampleJDIndex(vectorizer, lsa=lsa)
+        return ModelBundle(model, vectorizer, version, jd_index, time.perf_counter() - start, name, lsa)
+
+    def _load_lsa(self, directory, vectorizer):
+        # The LSA projection saved by train_model.py --lsa (optional)
+        path = os.path.join(directory, LSA_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            lsa = LSAProjection.load(path)
+        except Exception as e:
+            print(f"WARNING: Could not load {path}: {e}")
+            return None
+        n_features = vectorizer.transform(['']).shape[1]
+        if lsa.n_features != n_features:
+            print(f"WARNING: {path} projects {lsa.n_features} features, not the vectorizer's {n_features}; ignoring it.")
+            return None
+        return lsa
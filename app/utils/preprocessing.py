@@ -1,29 +1,107 @@
+import os
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
-
-# Ensure NLTK resources are downloaded
-try:
-    nltk.data.find('corpora/stopwords')
-    nltk.data.find('corpora/wordnet')
-    nltk.data.find('corpora/omw-1.4')
-except LookupError:
-    nltk.download('stopwords')
-    nltk.download('wordnet')
-    nltk.download('omw-1.4')
-
-from nltk.corpus import wordnet
-
-# Force lazy loader to initialize
-try:
-    wordnet.ensure_loaded()
-except AttributeError:
-    # Fallback for older/newer versions where ensure_loaded might not work or behave differently
-    wordnet.synsets('hello')
-
-lemmatizer = WordNetLemmatizer()
-stop_words = set(stopwords.words('english'))
+import threading
+import joblib
+
+NLTK_RESOURCES = [
+    ('corpora/stopwords', 'stopwords'),
+    ('corpora/wordnet', 'wordnet'),
+    ('corpora/omw-1.4', 'omw-1.4')
+]
+
+# NLTK is imported and its corpora loaded on first use rather than at import,
+# which keeps worker boot and train_model.py startup cheap.
+_nltk_lock = threading.Lock()
+_lemmatizer = None
+_stop_words = None
+
+def offline_mode():
+    """
+    True when NLTK_OFFLINE is set: missing NLTK data is an error, never a download.
+    """
+    return os.environ.get('NLTK_OFFLINE', '').lower() not in ('', '0', 'false')
+
+def init_nltk():
+    """
+    Loads (downloading if needed and allowed) the stopword list and the
+    WordNet lemmatizer. Thread-safe and idempotent; returns (lemmatizer, stop_words).
+    """
+    global _lemmatizer, _stop_words
+    if _lemmatizer is not None:
+        return _lemmatizer, _stop_words
+
+    with _nltk_lock:
+        if _lemmatizer is not None:
+            return _lemmatizer, _stop_words
+
+        import nltk
+        from nltk.corpus import stopwords, wordnet
+        from nltk.stem import WordNetLemmatizer
+
+        # Ensure NLTK resources are downloaded
+        for resource, package in NLTK_RESOURCES:
+            try:
+                nltk.data.find(resource)
+            except LookupError:
+                if offline_mode():
+                    raise LookupError(
+                        f"NLTK resource '{package}' is not installed and NLTK_OFFLINE is set. "
+                        f"Install it with: python -m nltk.downloader {package}"
+                    )
+                nltk.download(package)
+
+        # Force lazy loader to initialize
+        try:
+            wordnet.ensure_loaded()
+        except AttributeError:
+            # Fallback for older/newer versions where ensure_loaded might not work or behave differently
+            wordnet.synsets('hello')
+
+        _stop_words = set(stopwords.words('english'))
+        _lemmatizer = WordNetLemmatizer()
+    return _lemmatizer, _stop_words
+
+def get_lemmatizer():
+    return init_nltk()[0]
+
+def get_stop_words():
+    return init_nltk()[1]
+
+# The URL, email and special-character passes never cross whitespace, so
+# clean_text works token by token: a URL removes the rest of its token, an
+# email removes its whole token, and anything but letters is stripped.
+# The URL alternatives and the email '@' are found with one combined pattern
+# (anything matching https\S+ also matches http\S+).
+URL_OR_EMAIL_PATTERN = re.compile(r'(?:http|www)\S+|@')
+NON_ALPHA_PATTERN = re.compile(r'[^a-zA-Z]')
+
+# Resume vocabulary is highly repetitive, so each distinct token is cleaned
+# and lemmatized once per process. The table stops growing once full; the
+# frequent words are in it by then.
+LEMMA_CACHE_SIZE = 200000
+_lemma_cache = {}
+
+def clean_token(token):
+    """
+    Cleans one lowercased, whitespace-delimited token.
+    Returns its lemma, or "" if the token is dropped.
+    """
+    cleaned = _lemma_cache.get(token)
+    if cleaned is not None:
+        return cleaned
+
+    word = token
+    match = URL_OR_EMAIL_PATTERN.search(word)
+    if match:
+        # An '@' before any URL survives the URL cut and marks an email
+        word = "" if match.group() == '@' else word[:match.start()]
+    word = NON_ALPHA_PATTERN.sub('', word)
+    lemmatizer, stop_words = init_nltk()
+    cleaned = lemmatizer.lemmatize(word) if word and word not in stop_words else ""
+
+    if len(_lemma_cache) < LEMMA_CACHE_SIZE:
+        _lemma_cache[token] = cleaned
+    return cleaned
 
 def clean_text(text):
     """
@@ -36,22 +114,43 @@ def clean_text(text):
     if not text:
         return ""
     
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove URLs
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+    # Convert to lowercase and tokenize (split by whitespace)
+    tokens = text.lower().split()
     
-    # Remove emails
-    text = re.sub(r'\S*@\S*\s?', '', text)
-    
-    # Remove special characters and numbers
-    text = re.sub(r'[^a-zA-Z\s]', '', text)
-    
-    # Tokenize (split by space)
-    tokens = text.split()
-    
-    # Remove stopwords and lemmatize
-    cleaned_tokens = [lemmatizer.lemmatize(word) for word in tokens if word not in stop_words]
+    # Clean each token through the memo table, dropping the ones that vanish
+    cache = _lemma_cache
+    cleaned_tokens = []
+    for token in tokens:
+        cleaned = cache.get(token)
+        if cleaned is None:
+            cleaned = clean_token(token)
+        if cleaned:
+            cleaned_tokens.append(cleaned)
     
     return " ".join(cleaned_tokens)
+
+def clean_texts(texts):
+    """
+    Streams clean_text over an iterable of texts, yielding one result per input.
+    """
+    for text in texts:
+        yield clean_text(text)
+
+def save_lemma_cache(path):
+    """
+    Persists the token -> lemma table (e.g. next to the model artifacts after training).
+    """
+    joblib.dump(dict(_lemma_cache), path)
+
+def load_lemma_cache(path):
+    """
+    Warms the lemma table from a file written by save_lemma_cache.
+    Returns False if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return False
+    for word, lemma in joblib.load(path).items():
+        if len(_lemma_cache) >= LEMMA_CACHE_SIZE:
+            break
+        _lemma_cache.setdefault(word, lemma)
+    return True
@@ -0,0 +1,70 @@
+import io
+from app.utils.file_reader import HEAD_BYTES, find_extractor, parse_record, record_name, record_text
+from app.utils.text_cache import content_digest
+from app.utils.upload_spool import SpooledFile
+
+class TextRecord:
+    """
+    One resume of a structured export (a JSON Lines line or an element of a
+    JSON array), standing in for an upload's bytes like SpooledFile does.
+    It points into its source (the upload's bytes or spooled file) rather
+    than holding a copy of its bytes where it can. digest is the SHA-256 of
+    the record's bytes, so a record hits the caches however many exports it
+    comes in. text is its resume text, parsed out once when the record was
+    split off (its name needs parsing anyway); None if it is unreadable.
+    """
+
+    def __init__(self, source, offset, size, digest, export, text=None):
+        self.source = source
+        self.offset = offset
+        self.size = size
+        self.digest = digest
+        # The export's filename, e.g. for the file type of the metrics
+        self.export = export
+        self.text = text
+
+    def __len__(self):
+        return self.size
+
+    def read(self):
+        if isinstance(self.source, SpooledFile):
+            with self.source.open() as f:
+                f.seek(self.offset)
+                return f.read(self.size)
+        return bytes(self.source[self.offset:self.offset + self.size])
+
+def open_upload(data):
+    return data.open() if isinstance(data, SpooledFile) else io.BytesIO(data)
+
+def upload_extractor(filename, data):
+    """
+    The registered extractor of an upload (bytes or SpooledFile), sniffed
+    from its first bytes, or None for an unknown format.
+    """
+    with open_upload(data) as f:
+        return find_extractor(filename, f.read(HEAD_BYTES))
+
+def expand_records(uploads):
+    """
+    Yields (filename, data) uploads with every structured export replaced
+    by its resumes, as (name, TextRecord): the record's name field if it has
+    one, else "<export>#<n>". Records are split off one at a time, so this
+    can wrap an upload generator without stalling it.
+    """
+    for filename, data in uploads:
+        extractor = None if isinstance(data, TextRecord) else upload_extractor(filename, data)
+        if extractor is None or extractor.records is None:
+            yield filename, data
+            continue
+        with open_upload(data) as f:
+            for n, (offset, raw) in enumerate(extractor.records(f), 1):
+                # Records split from a reformatted document are kept as their own bytes
+                source = data if offset is not None else raw
+                try:
+                    record = parse_record(raw)
+                    name, text = record_name(record), record_text(record)
+                except ValueError:
+                    # Unreadable records still come through, to be reported as failed
+                    name = text = None
+                yield name or f"{filename}#{n}", TextRecord(
+                    source, offset or 0, len(raw), content_digest(raw), filename, text)
@@ -0,0 +1,79 @@
+import numpy as np
+from app.utils.job_profile import JobProfile
+from app.utils.metrics import span
+
+def rank_rows(scores, top_k=None, offset=0):
+    """
+    Indexes of the rows ranked offset .. offset+top_k by descending score,
+    ties in input order (the same order as a stable sort of every row).
+    Uses np.argpartition so only the selected rows are fully sorted.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    n = len(scores)
+    k = n if top_k is None else min(n, offset + top_k)
+    if k <= 0:
+        return np.array([], dtype=np.intp)
+    if k < n:
+        # Every row scoring at least the k-th best score is a candidate; ties at the cut keep input order
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(n)
+    order = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return order[offset:k]
+
+def score_resumes(filenames, cleaned_resumes, cleaned_jd, model, vectorizer, resume_matrix=None,
+                  top_k=None, offset=0, job_profile=None, extras=None):
+    """
+    Scores a batch of cleaned resumes against one cleaned job description
+    and returns result dicts ranked by score.
+    Uses one transform and one sparse dot product for the whole batch. Only
+    the rows ranked offset .. offset+top_k (all rows by default) are
+    classified and get an excerpt and missing keywords.
+    A precomputed TF-IDF resume_matrix (e.g. from the resume cache) skips the
+    transform, and a JobProfile of the JD (e.g. reused across requests or
+    batches) skips the JD work. extras, one dict per resume, adds fields
+    to its result.
+    """
+    n = len(cleaned_resumes)
+    scores = [0] * n
+    rows = rank_rows(np.zeros(n), top_k, offset)
+    categories = ["Unknown"] * len(rows)
+    missing = [[] for _ in rows]
+
+    if n and model and vectorizer:
+        if job_profile is None:
+            job_profile = JobProfile(cleaned_jd, vectorizer)
+        jd_vector = job_profile.vector
+
+        if resume_matrix is None:
+            with span('transform'):
+                resume_matrix = vectorizer.transform(cleaned_resumes)
+
+        if jd_vector is not None:
+            with span('cosine_similarity'):
+                similarities = job_profile.similarity(resume_matrix)
+                scores = np.round(similarities * 100, 2)
+                rows = rank_rows(scores, top_k, offset)
+
+        if len(rows):
+            with span('predict'):
+                categories = list(model.predict(resume_matrix[rows]))
+
+        if jd_vector is not None and len(rows):
+            # Calculate "What to Add" (Missing Keywords) based on User JD, most important first
+            # Only the missing terms are used, not the keyword score
+            with span('keywords'):
+                _, missing = job_profile.keyword_match([cleaned_resumes[i] for i in rows])
+
+    return [
+        {
+            'filename': filenames[i],
+            'category': categories[j],
+            'score': scores[i],
+            'missing_keywords': missing[j],
+            'excerpt': cleaned_resumes[i][:200] + "...",
+            **(extras[i] if extras else {})
+        }
+        for j, i in enumerate(rows)
+    ]
@@ -0,0 +1,154 @@
+import fcntl
+import json
+import os
+import threading
+import numpy as np
+
+# Filenames are stored truncated to NAME_BYTES bytes of UTF-8
+NAME_BYTES = 128
+
+class FileLock:
+    """
+    Exclusive flock on a lock file, held for a with block.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self._file = open(self.path, 'a')
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+class MappedDirectory:
+    """
+    Base of the on-disk stores (talent pool, feature store, duplicate
+    index): a directory of files described by meta.json, which writers
+    replace atomically while holding an flock on the directory. Every
+    process re-maps the files when meta.json changes, so gunicorn workers
+    can share one store; arrays mapped before a rewrite stay readable to
+    the processes still using them until they notice the new meta.json.
+
+    Subclasses implement _map(meta), building the state _load() returns.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._meta_stamp = None
+        self._state = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, *names):
+        return os.path.join(self.directory, *names)
+
+    def _read_meta(self):
+        try:
+            with open(self._path('meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta):
+        tmp = self._path('meta.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path('meta.json'))
+
+    def _write_lock(self):
+        return FileLock(self._path('lock'))
+
+    def _map(self, meta):
+        raise NotImplementedError
+
+    def _load(self):
+        """
+        The state _map() built from meta.json, rebuilt if another writer changed it.
+        """
+        stat = os.stat(self._path('meta.json'))
+        stamp = (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+        with self._lock:
+            if stamp != self._meta_stamp:
+                self._state = self._map(self._read_meta())
+                self._meta_stamp = stamp
+            return self._state
+
+def map_rows(path, dtype, shape, count, mode='r'):
+    """
+    The first count rows of a flat file of fixed-size rows, memory-mapped.
+    """
+    if count == 0:
+        return np.zeros((0,) + shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode=mode, shape=(count,) + shape)
+
+def append_rows(path, dtype, shape, count, rows):
+    """
+    Appends rows to a flat file after its first count (committed) rows.
+    """
+    row_bytes = np.dtype(dtype).itemsize * int(np.prod(shape))
+    with open(path, 'r+b') as f:
+        # Drop anything past the committed rows (e.g. from an interrupted write)
+        f.truncate(count * row_bytes)
+        f.seek(0, os.SEEK_END)
+        f.write(np.ascontiguousarray(rows, dtype=dtype).tobytes())
+
+def write_array(path, array):
+    """
+    Saves an array as .npy under a temporary name and renames it into place,
+    so readers never map a partial file.
+    """
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, np.ascontiguousarray(array), allow_pickle=False)
+    os.replace(tmp, path)
+
+def sort_keys(keys):
+    """
+    (sorted keys, their row numbers) of an S32 column, the index find_keys searches.
+    """
+    order = np.argsort(keys, kind='stable')
+    return np.asarray(keys)[order], order
+
+def find_keys(indexes, keys, newest=False):
+    """
+    Row numbers of S32 keys (-1 where not stored), given sorted indexes as
+    (sorted keys, row numbers, offset added to them) in row order: the first
+    row holding each key, or with newest the last. Each lookup is a binary
+    search, so it costs log(rows) however many rows the indexes cover.
+    """
+    rows = np.full(len(keys), -1, dtype=np.int64)
+    for sorted_keys, order, offset in (indexes[::-1] if newest else indexes):
+        pending = np.flatnonzero(rows < 0)
+        if not len(pending) or not len(sorted_keys):
+            continue
+        query = keys[pending]
+        if newest:
+            positions = np.searchsorted(sorted_keys, query, side='right') - 1
+            found = positions >= 0
+        else:
+            positions = np.searchsorted(sorted_keys, query)
+            found = positions < len(sorted_keys)
+        found[found] = sorted_keys[positions[found]] == query[found]
+        rows[pending[found]] = offset + order[positions[found]]
+    return rows
+
+def digest_keys(digests):
+    """
+    Hex SHA-256 digests as 32-byte keys (an S32 array).
+    """
+    return np.array([bytes.fromhex(digest) for digest in digests], dtype='S32')
+
+def digest_hex(keys):
+    """
+    Hex digests of S32 keys, e.g. a slice of a mapped column.
+    """
+    # From the raw bytes: numpy drops the trailing NUL bytes of single S32 values
+    hexes = np.ascontiguousarray(keys, dtype='S32').tobytes().hex()
+    return [hexes[i:i + 64] for i in range(0, len(hexes), 64)]
+
+def encode_names(names):
+    return np.array([name.encode('utf-8')[:NAME_BYTES] for name in names], dtype=f'S{NAME_BYTES}')
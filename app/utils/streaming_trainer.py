@@ -0,0 +1,172 @@
+import os
+import tempfile
+import time
+from collections import Counter
+from multiprocessing import Pool
+import numpy as np
+import pandas as pd
+from app.utils.model_backends import compile_model
+from app.utils.preprocessing import clean_text
+from app.utils.text_cache import content_digest
+
+STREAMING_BACKENDS = ['sgd', 'nb']
+VECTORIZERS = ['vocabulary', 'hashing']
+
+def build_streaming_classifier(backend='sgd'):
+    """
+    Returns an unfitted classifier that supports partial_fit.
+    """
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.naive_bayes import MultinomialNB
+
+    if backend == 'sgd':
+        return SGDClassifier(loss='log_loss', alpha=1e-5, random_state=42)
+    if backend == 'nb':
+        return MultinomialNB(alpha=0.1)
+    raise ValueError(f"Unknown streaming backend '{backend}'. Choose from: {', '.join(STREAMING_BACKENDS)}")
+
+class StreamingTrainer:
+    """
+    Trains the vectorizer and classifier from a resume CSV without ever
+    holding the dataset in memory.
+
+    1. The CSV is read in chunks and each chunk is cleaned across a process
+       pool. Cleaned text is spooled to a temporary file so later passes do
+       not clean again, while term and document frequencies are counted.
+    2. The vectorizer is built from those counts: either a TfidfVectorizer
+       with the vocabulary and IDF an in-memory fit would produce, or a
+       HashingVectorizer + TfidfTransformer pipeline whose memory does not
+       grow with the vocabulary.
+    3. The classifier is trained with partial_fit over the spooled chunks,
+       holding out every holdout_every-th row for evaluation.
+
+    Peak memory is bounded by the chunk size, the model and (for the
+    vocabulary vectorizer) the number of distinct terms.
+    """
+
+    def __init__(self, csv_path, chunksize=5000, workers=None, max_features=2000,
+                 vectorizer='vocabulary', backend='sgd', epochs=1, holdout_every=10,
+                 hashing_features=2 ** 18):
+        if vectorizer not in VECTORIZERS:
+            raise ValueError(f"Unknown vectorizer '{vectorizer}'. Choose from: {', '.join(VECTORIZERS)}")
+        self.csv_path = csv_path
+        self.chunksize = chunksize
+        self.workers = workers or os.cpu_count() or 1
+        self.max_features = max_features
+        self.vectorizer_kind = vectorizer
+        self.backend = backend
+        self.epochs = epochs
+        self.holdout_every = holdout_every
+        self.hashing_features = hashing_features
+
+    def run(self, features=None):
+        """
+        Runs every pass and returns (model, vectorizer, holdout_accuracy).
+        The model is compiled for one-matmul inference like the in-memory backends.
+        The final pass also appends every chunk's TF-IDF rows and labels to
+        `features` (a FeatureStore) if given.
+        """
+        with tempfile.TemporaryDirectory() as spool_dir:
+            spool_path = os.path.join(spool_dir, 'cleaned.csv')
+
+            print("Cleaning text and counting terms...")
+            start = time.perf_counter()
+            classes, n_docs = self._clean_and_count(spool_path)
+            print(f"Cleaned {n_docs} resumes in {time.perf_counter() - start:.1f}s")
+
+            print(f"Building {self.vectorizer_kind} vectorizer...")
+            vectorizer = self._build_vectorizer(n_docs)
+
+            print(f"Training model ({self.backend}, partial_fit)...")
+            start = time.perf_counter()
+            clf = build_streaming_classifier(self.backend)
+            for _ in range(self.epochs):
+                for X, y, holdout, _ in self._spooled_batches(spool_path, vectorizer):
+                    if (~holdout).any():
+                        clf.partial_fit(X[~holdout], y[~holdout], classes=classes)
+            print(f"Training took {time.perf_counter() - start:.2f}s")
+
+            correct = total = 0
+            model = compile_model(clf)
+            for X, y, holdout, digests in self._spooled_batches(spool_path, vectorizer):
+                if holdout.any():
+                    correct += int((model.predict(X[holdout]) == y[holdout]).sum())
+                    total += int(holdout.sum())
+                if features is not None:
+                    features.append(digests, X, y, skip_existing=False)
+        accuracy = correct / total if total else None
+        return model, vectorizer, accuracy
+
+    def _clean_and_count(self, spool_path):
+        if self.vectorizer_kind == 'vocabulary':
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            analyzer = TfidfVectorizer().build_analyzer()
+            self._term_counts = Counter()
+            self._doc_counts = Counter()
+        else:
+            hashing = self._hashing_vectorizer()
+            self._doc_counts = np.zeros(self.hashing_features, dtype=np.int64)
+
+        classes = set()
+        n_docs = 0
+        with Pool(self.workers) as pool:
+            for chunk in pd.read_csv(self.csv_path, usecols=['Resume_Text', 'Category'], chunksize=self.chunksize):
+                texts = chunk['Resume_Text'].fillna('').astype(str).tolist()
+                cleaned = pool.map(clean_text, texts, chunksize=max(1, len(texts) // (self.workers * 4)))
+                categories = chunk['Category'].astype(str)
+                classes.update(categories)
+                n_docs += len(cleaned)
+
+                if self.vectorizer_kind == 'vocabulary':
+                    for doc in cleaned:
+                        terms = analyzer(doc)
+                        self._term_counts.update(terms)
+                        self._doc_counts.update(set(terms))
+                else:
+                    self._doc_counts += np.bincount(
+                        hashing.transform(cleaned).indices, minlength=self.hashing_features
+                    )
+
+                digests = [content_digest(text.encode('utf-8')) for text in texts]
+                pd.DataFrame({'cleaned': cleaned, 'category': categories.values, 'digest': digests}).to_csv(
+                    spool_path, mode='a', header=not os.path.exists(spool_path), index=False
+                )
+        return np.array(sorted(classes)), n_docs
+
+    def _build_vectorizer(self, n_docs):
+        if self.vectorizer_kind == 'vocabulary':
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            # Same selection as TfidfVectorizer(max_features=...): the same
+            # (unstable) argsort over the same float64 corpus frequencies of the
+            # alphabetically sorted terms, so ties at the cutoff fall the same
+            # way, then indexed alphabetically
+            terms = sorted(self._term_counts)
+            frequencies = np.array([self._term_counts[term] for term in terms], dtype=np.float64)
+            keep = np.sort((-frequencies).argsort()[:self.max_features])
+            vocabulary = {terms[i]: index for index, i in enumerate(keep)}
+            df = np.array([self._doc_counts[terms[i]] for i in keep])
+
+            vectorizer = TfidfVectorizer(vocabulary=vocabulary)
+            vectorizer.idf_ = np.log((1 + n_docs) / (1 + df)) + 1
+            return vectorizer
+
+        from sklearn.feature_extraction.text import TfidfTransformer
+        from sklearn.pipeline import make_pipeline
+        transformer = TfidfTransformer()
+        transformer.idf_ = np.log((1 + n_docs) / (1 + self._doc_counts)) + 1
+        return make_pipeline(self._hashing_vectorizer(), transformer)
+
+    def _hashing_vectorizer(self):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        return HashingVectorizer(n_features=self.hashing_features, alternate_sign=False, norm=None)
+
+    def _spooled_batches(self, spool_path, vectorizer):
+        row = 0
+        for chunk in pd.read_csv(spool_path, chunksize=self.chunksize, keep_default_na=False):
+            X = vectorizer.transform(chunk['cleaned'].astype(str).tolist())
+            y = chunk['category'].astype(str).to_numpy()
+            holdout = np.zeros(len(chunk), dtype=bool)
+            if self.holdout_every:
+                holdout = np.arange(row, row + len(chunk)) % self.holdout_every == 0
+            row += len(chunk)
+            yield X, y, holdout, chunk['digest'].astype(str).tolist()
@@ -0,0 +1,400 @@
+import os
+from functools import lru_cache
+import numpy as np
+from app.utils.storage import (NAME_BYTES, MappedDirectory, append_rows, digest_hex, digest_keys, encode_names,
+                               find_keys, map_rows, sort_keys, write_array)
+
+BLOCK_ROWS = 32768
+# Resumes added to a TalentPool since its digests were last sorted, before they are re-sorted
+TAIL_ROWS = 8192
+# Vectorizers wider than this (e.g. the hashing pipeline) are projected down to PROJECTED_DIM
+MAX_RAW_FEATURES = 4096
+PROJECTED_DIM = 256
+
+def pool_dim(n_features, lsa=None):
+    if lsa is not None:
+        return lsa.n_components
+    return n_features if n_features <= MAX_RAW_FEATURES else PROJECTED_DIM
+
+@lru_cache(maxsize=4)
+def _random_projection(n_features):
+    from sklearn.random_projection import SparseRandomProjection
+    import scipy.sparse as sp
+    # Fitting only draws the (seeded) random matrix, so any input of the right width will do
+    return SparseRandomProjection(n_components=PROJECTED_DIM, dense_output=True, random_state=0).fit(
+        sp.csr_matrix((1, n_features))
+    )
+
+def pool_vectors(matrix, lsa=None):
+    """
+    Dense vectors to store for TF-IDF rows: their LSA vectors when the model
+    has an LSAProjection (so scores are the same as /predict's), else the
+    rows themselves for vocabularies up to MAX_RAW_FEATURES terms (likewise),
+    otherwise a fixed sparse random projection, which approximately
+    preserves cosine similarity.
+    """
+    if lsa is not None:
+        return lsa.transform(matrix)
+    if matrix.shape[1] <= MAX_RAW_FEATURES:
+        return matrix.toarray()
+    return _random_projection(matrix.shape[1]).transform(matrix)
+
+def pool_key(version, dim, quantize=False):
+    """
+    The subdirectory of the pool of one vectorizer version: a worker still on
+    an older model keeps writing to its own pool, never to the new one.
+    """
+    return f"{(version or 'unversioned')[:16]}-{dim}" + ('-int8' if quantize else '')
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+def _quantize(vectors):
+    # One scale per row: the largest component maps to +-127
+    scales = np.abs(vectors).max(axis=1) / 127
+    safe = np.where(scales > 0, scales, 1)
+    return np.rint(vectors / safe[:, np.newaxis]).astype(np.int8), scales.astype(np.float32)
+
+def _generation_file(name, generation):
+    # Generation 0 keeps the plain names, so pools written before generations still open
+    if not generation:
+        return name
+    stem, ext = os.path.splitext(name)
+    return f"{stem}-{generation}{ext}"
+
+def _top_n(scores, rows, top_n):
+    if len(scores) > top_n:
+        keep = np.argpartition(-scores, top_n - 1)[:top_n]
+        scores, rows = scores[keep], rows[keep]
+    return scores, rows
+
+class TalentPool(MappedDirectory):
+    """
+    Persistent index of every resume vector seen, for reverse search
+    (job description -> best stored resumes).
+
+    Rows live in flat append-only files under `directory` that are read
+    through read-only memory maps: the (unit-length) vectors as float32, or
+    as int8 with one float32 scale per row when quantize=True (4x smaller),
+    plus the content digest, the filename and a tombstone flag. Digests are
+    looked up by binary search in a sorted copy kept on disk, plus the few
+    rows added since (sorted in memory), which is rebuilt once more than
+    TAIL_ROWS rows were added after it. Deleting a resume only sets its
+    tombstone; compact() rewrites the files without
+    them. A rewrite writes a new generation of every file next to the old
+    one and publishes it by writing meta.json last, so readers switch to it
+    all at once; the previous generation is kept until the next rewrite.
+
+    Search is either exact, scoring the memory-mapped rows block by block,
+    or approximate: build_ann() clusters the rows (spherical k-means) and
+    stores them grouped by cluster, and a query then only scores the
+    nprobe clusters closest to it plus any rows added since.
+
+    A directory holds the vectors of one vectorizer version: opening it with
+    another version, dimension or quantization raises ValueError rather
+    than mixing or discarding rows, so each version gets its own directory
+    (see pool_key).
+    """
+
+    def __init__(self, directory, dim, quantize=False, version=None):
+        super().__init__(directory)
+        self.dim = dim
+        self.quantize = quantize
+        self.version = version
+        with self._write_lock():
+            meta = self._read_meta()
+            if meta is None or (meta['count'] == 0 and not self._matches(meta)):
+                self._reset()
+            else:
+                self._check(meta)
+
+    # Files
+
+    def _matches(self, meta):
+        return (meta['dim'], meta['quantize'], meta['version']) == (self.dim, self.quantize, self.version)
+
+    def _check(self, meta):
+        if not self._matches(meta):
+            raise ValueError(
+                f"talent pool {self.directory} holds dim={meta['dim']} quantize={meta['quantize']} "
+                f"vectors of version {meta['version']}, not dim={self.dim} quantize={self.quantize} "
+                f"of version {self.version}"
+            )
+
+    def _columns(self):
+        # (file name, dtype, row shape) of every per-row file
+        columns = [('vectors.bin', np.int8 if self.quantize else np.float32, (self.dim,))]
+        if self.quantize:
+            columns.append(('scales.bin', np.float32, ()))
+        columns += [('digests.bin', 'S32', ()), ('names.bin', f'S{NAME_BYTES}', ()), ('deleted.bin', np.uint8, ())]
+        return columns
+
+    def _file(self, meta, name):
+        return self._path(_generation_file(name, meta.get('generation', 0)))
+
+    def _remove_generation(self, generation):
+        for name in [name for name, _, _ in self._columns()] + ['centroids.npy', 'offsets.npy']:
+            path = self._path(_generation_file(name, generation))
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _index_files(self, indexed, generation):
+        # The sorted digests of the first `indexed` rows of a generation, and their row numbers
+        return [_generation_file(f"{name}-{indexed}.npy", generation) for name in ('digest-keys', 'digest-order')]
+
+    def _write_index(self, meta, keys):
+        """
+        Sorts the digests of meta's first rows (keys) into its index files and
+        returns meta pointing at them; the index it replaces is kept as
+        previous_index until the next sort, for readers of the old meta.json.
+        """
+        sorted_keys, order = sort_keys(keys)
+        generation = meta.get('generation', 0)
+        for name, array in zip(self._index_files(len(keys), generation), (sorted_keys, order)):
+            write_array(self._path(name), array)
+        return dict(meta, indexed=len(keys), previous_index=[meta.get('indexed', 0), meta.get('index_generation', 0)],
+                    index_generation=generation)
+
+    def _remove_indexes(self, meta):
+        # Deletes every digest index but meta's and the one it replaced
+        keep = set(self._index_files(meta.get('indexed', 0), meta.get('index_generation', 0)))
+        if meta.get('previous_index'):
+            keep.update(self._index_files(*meta['previous_index']))
+        for entry in os.listdir(self.directory):
+            if entry.startswith(('digest-keys-', 'digest-order-')) and entry not in keep:
+                os.remove(self._path(entry))
+
+    def _reset(self):
+        meta = self._read_meta()
+        if meta is not None:
+            for generation in range(meta.get('generation', 0) + 1):
+                self._remove_generation(generation)
+        for name, _, _ in self._columns():
+            open(self._path(name), 'wb').close()
+        meta = {'dim': self.dim, 'quantize': self.quantize, 'version': self.version,
+                'count': 0, 'clustered': 0, 'generation': 0, 'indexed': 0}
+        self._remove_indexes(meta)
+        self._write_meta(meta)
+
+    def _map(self, meta):
+        """
+        (meta, maps): the memory-mapped columns, and the clustering if any.
+        """
+        # Checked on every re-map, so writers (which load under the flock)
+        # never append to a pool another version has taken over
+        self._check(meta)
+        maps = {}
+        for name, dtype, shape in self._columns():
+            mode = 'r+' if name == 'deleted.bin' else 'r'
+            maps[name] = map_rows(self._file(meta, name), dtype, shape, meta['count'], mode)
+        if meta['clustered']:
+            maps['centroids'] = np.load(self._file(meta, 'centroids.npy'))
+            maps['offsets'] = np.load(self._file(meta, 'offsets.npy'))
+        # Pools written before the index have none: their rows are all tail until the next sort
+        indexed = meta.get('indexed', 0)
+        maps['index'] = []
+        if indexed:
+            maps['index'].append(tuple(
+                np.load(self._path(name), mmap_mode='r')
+                for name in self._index_files(indexed, meta.get('index_generation', 0))
+            ) + (0,))
+        maps['index'].append(sort_keys(maps['digests.bin'][indexed:]) + (indexed,))
+        return meta, maps
+
+    @staticmethod
+    def _live_rows(maps, keys):
+        """
+        The row holding each S32 key that is not deleted, or -1. A resume is
+        only added back after its row was deleted, so its newest row is the
+        only one that can be live.
+        """
+        rows = find_keys(maps['index'], keys, newest=True)
+        found = rows >= 0
+        found[found] = maps['deleted.bin'][rows[found]] == 0
+        return np.where(found, rows, -1)
+
+    # Updates
+
+    def add(self, digests, names, vectors):
+        """
+        Appends resumes (hex content digests, filenames, dense vectors).
+        Resumes already in the pool are skipped. Returns how many were added.
+        """
+        if not len(digests):
+            return 0
+        keys = digest_keys(digests)
+        with self._write_lock():
+            meta, maps = self._load()
+            _, first = np.unique(keys, return_index=True)
+            new = np.sort(first[self._live_rows(maps, keys[first]) < 0])
+            if not len(new):
+                return 0
+
+            vectors = _normalize(np.asarray(vectors)[new])
+            columns = {'digests.bin': keys[new], 'deleted.bin': np.zeros(len(new), dtype=np.uint8)}
+            columns['names.bin'] = encode_names([names[i] for i in new])
+            if self.quantize:
+                columns['vectors.bin'], columns['scales.bin'] = _quantize(vectors)
+            else:
+                columns['vectors.bin'] = vectors
+            for name, dtype, shape in self._columns():
+                append_rows(self._file(meta, name), dtype, shape, meta['count'], columns[name])
+            meta = dict(meta, count=meta['count'] + len(new))
+            resort = meta['count'] - meta.get('indexed', 0) > TAIL_ROWS
+            if resort:
+                meta = self._write_index(meta, map_rows(self._file(meta, 'digests.bin'), 'S32', (), meta['count']))
+            self._write_meta(meta)
+            if resort:
+                self._remove_indexes(meta)
+        return len(new)
+
+    def delete(self, digests):
+        """
+        Tombstones resumes by digest. Returns how many were removed.
+        """
+        keys = digest_keys(digests)
+        with self._write_lock():
+            _, maps = self._load()
+            deleted = maps['deleted.bin']
+            rows = np.unique(self._live_rows(maps, keys))
+            rows = rows[rows >= 0]
+            if len(rows):
+                deleted[rows] = 1
+                deleted.flush()
+        return len(rows)
+
+    def compact(self):
+        """
+        Rewrites the pool without deleted rows, keeping the clustering if there is one.
+        """
+        with self._write_lock():
+            meta, maps = self._load()
+            centroids = maps.get('centroids')
+            self._rewrite(meta, maps, centroids)
+
+    def build_ann(self, n_lists=None, sample_size=100000, iterations=10, seed=0):
+        """
+        Clusters the live rows into n_lists groups (default sqrt(rows)) with
+        spherical k-means on a sample and stores them grouped by cluster.
+        """
+        with self._write_lock():
+            meta, maps = self._load()
+            live = np.flatnonzero(maps['deleted.bin'] == 0)
+            if not len(live):
+                return
+            n_lists = min(len(live), n_lists or max(1, int(np.sqrt(len(live)))))
+            rng = np.random.default_rng(seed)
+            sample = self._vectors(maps, np.sort(rng.choice(live, min(sample_size, len(live)), replace=False)))
+
+            centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+            for _ in range(iterations):
+                assignment = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, sample)
+                empty = np.bincount(assignment, minlength=n_lists) == 0
+                # Re-seed empty clusters from random sample rows
+                sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+                centroids = _normalize(sums)
+            self._rewrite(meta, maps, centroids)
+
+    def _rewrite(self, meta, maps, centroids):
+        live = np.flatnonzero(maps['deleted.bin'] == 0)
+        offsets = None
+        if centroids is not None:
+            assignment = np.concatenate([
+                np.argmax(self._vectors(maps, live[start:start + BLOCK_ROWS]) @ centroids.T, axis=1)
+                for start in range(0, len(live), BLOCK_ROWS)
+            ] or [np.zeros(0, dtype=np.intp)])
+            order = np.argsort(assignment, kind='stable')
+            live = live[order]
+            offsets = np.searchsorted(assignment[order], np.arange(len(centroids) + 1))
+
+        generation = meta.get('generation', 0)
+        new = dict(meta, count=len(live), clustered=len(live) if centroids is not None else 0,
+                   generation=generation + 1)
+        # Left over from a rewrite interrupted before it was published
+        self._remove_generation(generation + 1)
+        for name, dtype, _ in self._columns():
+            with open(self._file(new, name), 'wb') as f:
+                for start in range(0, len(live), BLOCK_ROWS):
+                    rows = live[start:start + BLOCK_ROWS]
+                    block = np.zeros(len(rows), dtype=np.uint8) if name == 'deleted.bin' else maps[name][rows]
+                    f.write(np.ascontiguousarray(block, dtype=dtype).tobytes())
+        if centroids is not None:
+            np.save(self._file(new, 'centroids.npy'), centroids)
+            np.save(self._file(new, 'offsets.npy'), offsets)
+        new = self._write_index(new, np.asarray(maps['digests.bin'][live]))
+        self._write_meta(new)
+        # Readers that read the previous meta.json may still be opening its files
+        if generation:
+            self._remove_generation(generation - 1)
+        self._remove_indexes(new)
+
+    # Search
+
+    def _vectors(self, maps, rows):
+        vectors = np.asarray(maps['vectors.bin'][rows], dtype=np.float32)
+        if self.quantize:
+            vectors *= maps['scales.bin'][rows][:, np.newaxis]
+        return vectors
+
+    def _score_range(self, maps, query, start, stop, top_n, best):
+        for block_start in range(start, stop, BLOCK_ROWS):
+            rows = np.arange(block_start, min(stop, block_start + BLOCK_ROWS))
+            block = np.asarray(maps['vectors.bin'][block_start:rows[-1] + 1], dtype=np.float32)
+            scores = block @ query
+            if self.quantize:
+                scores *= maps['scales.bin'][block_start:rows[-1] + 1]
+            scores[maps['deleted.bin'][block_start:rows[-1] + 1] != 0] = -np.inf
+            scores, rows = _top_n(scores, rows, top_n)
+            best = _top_n(np.concatenate([best[0], scores]), np.concatenate([best[1], rows]), top_n)
+        return best
+
+    def search(self, query_vector, top_n=10, nprobe=None):
+        """
+        Returns up to top_n (digest, filename, cosine score x 100) for the
+        stored resumes closest to query_vector, best first. With nprobe set
+        and a clustered pool, only the nprobe nearest clusters (and rows
+        added after clustering) are scored.
+        """
+        meta, maps = self._load()
+        query = _normalize(np.asarray(query_vector).reshape(1, -1))[0]
+        best = (np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.intp))
+
+        if nprobe and meta['clustered']:
+            centroid_scores = maps['centroids'] @ query
+            offsets = maps['offsets']
+            for cluster in np.argsort(-centroid_scores)[:nprobe]:
+                best = self._score_range(maps, query, offsets[cluster], offsets[cluster + 1], top_n, best)
+            best = self._score_range(maps, query, meta['clustered'], meta['count'], top_n, best)
+        else:
+            best = self._score_range(maps, query, 0, meta['count'], top_n, best)
+
+        scores, rows = best
+        results = []
+        for i in np.lexsort((rows, -scores)):
+            if np.isfinite(scores[i]):
+                row = rows[i]
+                name = maps['names.bin'][row].decode('utf-8', 'ignore')
+                digest = digest_hex(maps['digests.bin'][row:row + 1])[0]
+                results.append((digest, name, round(float(scores[i]) * 100, 2)))
+        return results
+
+    def stats(self):
+        meta, maps = self._load()
+        deleted = int(maps['deleted.bin'].sum()) if meta['count'] else 0
+        size = sum(os.path.getsize(self._file(meta, name)) for name, _, _ in self._columns())
+        return {
+            'rows': meta['count'] - deleted,
+            'deleted': deleted,
+            'dim': self.dim,
+            'quantized': self.quantize,
+            'clusters': len(maps['centroids']) if meta['clustered'] else 0,
+            'unclustered_rows': meta['count'] - meta['clustered'],
+            'bytes': size
+        }
+
+    def __len__(self):
+        return self.stats()['rows']
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+import scipy.sparse as sp
+
+def content_digest(data):
+    """
+    SHA-256 of the uploaded bytes, used as the cache key.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def file_fingerprint(path):
+    """
+    SHA-256 of a model artifact, used to tie cached TF-IDF rows to the
+    vectorizer that produced them.
+    """
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _encode_row(row):
+    row = row.tocsr()
+    return row.indices.astype(np.int32).tobytes() + row.data.astype(np.float64).tobytes()
+
+def _decode_row(blob, n_features):
+    nnz = len(blob) // 12
+    indices = np.frombuffer(blob, dtype=np.int32, count=nnz)
+    data = np.frombuffer(blob, dtype=np.float64, offset=nnz * 4)
+    return sp.csr_matrix((data, indices, np.array([0, nnz])), shape=(1, n_features))
+
+class ResumeCache:
+    """
+    On-disk cache of extracted resume text, its clean_text output and its
+    TF-IDF row, keyed by the SHA-256 of the uploaded bytes.
+
+    Entries are evicted least-recently-used first once the store grows past
+    max_bytes. TF-IDF rows are only served for the vectorizer version they
+    were built with; a row from any other version is overwritten the next
+    time the resume is vectorized, or evicted like any other entry.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.vector_hits = 0
+        self.vector_misses = 0
+        self._lock = threading.Lock()
+        self._conn_pid = None
+        self._conn_handle = None
+
+    @property
+    def _conn(self):
+        # Connected lazily, and again after a fork, since SQLite handles must not cross processes
+        if self._conn_pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'digest TEXT PRIMARY KEY, raw_text TEXT, cleaned_text TEXT, text_size INTEGER, '
+                'vector BLOB, vector_version TEXT, size INTEGER, last_access REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access)')
+            conn.commit()
+            self._conn_handle = conn
+            self._conn_pid = os.getpid()
+        return self._conn_handle
+
+    def get_texts(self, digests):
+        """
+        Returns {digest: (raw_text, cleaned_text)} for the digests in the cache.
+        """
+        found = {}
+        with self._lock:
+            for digest in set(digests):
+                row = self._conn.execute(
+                    'SELECT raw_text, cleaned_text FROM entries WHERE digest = ?', (digest,)
+                ).fetchone()
+                if row is not None:
+                    found[digest] = row
+            self._touch(found)
+            self._conn.commit()
+            self.hits += sum(1 for d in digests if d in found)
+            self.misses += sum(1 for d in digests if d not in found)
+        return found
+
+    def put_texts(self, entries):
+        """
+        Stores (digest, raw_text, cleaned_text) triples.
+        """
+        now = time.time()
+        with self._lock:
+            for digest, raw_text, cleaned_text in entries:
+                size = len(raw_text.encode('utf-8')) + len(cleaned_text.encode('utf-8'))
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, NULL, NULL, ?, ?)',
+                    (digest, raw_text, cleaned_text, size, size, now)
+                )
+            self._evict()
+            self._conn.commit()
+
+    def transform(self, vectorizer, version, digests, cleaned_texts):
+        """
+        Returns the TF-IDF matrix for the given resumes, reusing cached rows
+        built by this vectorizer version and transforming the rest in one batch.
+        """
+        # Works for both the vocabulary TfidfVectorizer and the hashing pipeline
+        n_features = vectorizer.transform(['']).shape[1]
+        rows = [None] * len(digests)
+        with self._lock:
+            for i, digest in enumerate(digests):
+                blob = self._conn.execute(
+                    'SELECT vector FROM entries WHERE digest = ? AND vector_version = ?', (digest, version)
+                ).fetchone()
+                if blob is not None and blob[0] is not None:
+                    rows[i] = _decode_row(blob[0], n_features)
+            missing = [i for i, row in enumerate(rows) if row is None]
+            self.vector_hits += len(digests) - len(missing)
+            self.vector_misses += len(missing)
+
+        if missing:
+            computed = vectorizer.transform([cleaned_texts[i] for i in missing])
+            with self._lock:
+                for j, i in enumerate(missing):
+                    rows[i] = computed[j]
+                    blob = _encode_row(computed[j])
+                    # Rows are only kept for resumes whose text is already cached
+                    self._conn.execute(
+                        'UPDATE entries SET vector = ?, vector_version = ?, '
+                        'size = text_size + ? WHERE digest = ?',
+                        (blob, version, len(blob), digests[i])
+                    )
+                self._evict()
+                self._conn.commit()
+
+        if not rows:
+            return sp.csr_matrix((0, n_features))
+        return sp.vstack(rows, format='csr')
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+            ).fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'vector_hits': self.vector_hits,
+            'vector_misses': self.vector_misses,
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes
+        }
+
+    def _touch(self, digests):
+        now = time.time()
+        self._conn.executemany(
+            'UPDATE entries SET last_access = ? WHERE digest = ?', [(now, d) for d in digests]
+        )
+
+    def _evict(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for digest, size in self._conn.execute('SELECT digest, size FROM entries ORDER BY last_access'):
+            if total <= self.max_bytes:
+                break
+            victims.append((digest,))
+            total -= size
+        self._conn.executemany('DELETE FROM entries WHERE digest = ?', victims)
+
+    def close(self):
+        with self._lock:
+            if self._conn_pid == os.getpid():
+                self._conn_handle.close()
+            self._conn_pid = None
@@ -0,0 +1,188 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import zipfile
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 64 * 1024
+MAX_FILE_BYTES = 20 * 1024 * 1024
+MAX_REQUEST_BYTES = 200 * 1024 * 1024
+MAX_FIELD_BYTES = 1024 * 1024
+
+class SpooledFile:
+    """
+    An uploaded document spooled to disk, standing in for its bytes: len()
+    is its size and the extraction workers open the path themselves.
+    digest is the SHA-256 of the content (as text_cache.content_digest),
+    computed while it was written.
+    """
+
+    def __init__(self, path, size, digest):
+        self.path = path
+        self.size = size
+        self.digest = digest
+
+    def __len__(self):
+        return self.size
+
+    def open(self):
+        return open(self.path, 'rb')
+
+class _SpoolWriter:
+    def __init__(self, spool, filename, archive):
+        self.spool = spool
+        self.filename = filename
+        self.archive = archive
+        fd, self.path = tempfile.mkstemp(dir=spool.directory, suffix=os.path.splitext(filename)[1])
+        self.file = os.fdopen(fd, 'wb')
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        if not self.archive:
+            self.spool.spooled += len(data)
+            if self.size > self.spool.max_file_bytes:
+                self._reject(f"{self.filename} is larger than the "
+                             f"{self.spool.max_file_bytes // 2 ** 20} MB limit per file.")
+            if self.spool.spooled > self.spool.max_request_bytes:
+                self._reject(f"The uploaded resumes exceed the "
+                             f"{self.spool.max_request_bytes // 2 ** 20} MB limit per request.")
+            self.hash.update(data)
+        self.file.write(data)
+
+    def _reject(self, message):
+        self.file.close()
+        raise RequestEntityTooLarge(message)
+
+    def close(self):
+        self.file.close()
+        return SpooledFile(self.path, self.size, self.hash.hexdigest())
+
+class UploadSpool:
+    """
+    Receives a multipart/form-data request body incrementally, writing each
+    uploaded document to its own file in a fresh directory under `directory`
+    as it arrives, so a request holds one chunk of the body in memory however
+    many resumes it carries.
+
+    files() yields each document as soon as its last byte is on disk, which
+    lets the caller start extracting it while the rest of the body is still
+    being received. Zip archives are spooled whole (their index is at the
+    end), then unpacked one member at a time.
+
+    Documents over max_file_bytes, or more than max_request_bytes of body or
+    of documents (zip members included) in total, abort the request with
+    413. Call cleanup() once the spooled files are no longer needed.
+    """
+
+    def __init__(self, directory, max_file_bytes=MAX_FILE_BYTES, max_request_bytes=MAX_REQUEST_BYTES, accept=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix='upload-', dir=directory)
+        self.max_file_bytes = max_file_bytes
+        self.max_request_bytes = max_request_bytes
+        # Which document filenames to keep (default: all)
+        self.accept = accept or (lambda filename: True)
+        # Form fields, filled in as their parts arrive
+        self.form = MultiDict()
+        # Names of the file fields present in the body, uploaded file or not
+        self.file_fields = set()
+        self.received = 0
+        self.spooled = 0
+
+    def files(self, stream, content_type, fields=('resume_files',), archive_fields=()):
+        """
+        Parses the body read from stream, yielding (filename, SpooledFile)
+        for every accepted document uploaded in `fields`. A .zip in `fields`,
+        or any file in archive_fields, is unpacked and its accepted
+        documents yielded instead. Yields nothing for non-multipart bodies.
+        """
+        mimetype, options = parse_options_header(content_type or '')
+        if mimetype != 'multipart/form-data' or not options.get('boundary'):
+            return
+        decoder = MultipartDecoder(options['boundary'].encode('latin-1'), max_form_memory_size=MAX_FIELD_BYTES)
+        part, value, size, writer = None, [], 0, None
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                self.received += len(chunk)
+                if self.received > self.max_request_bytes:
+                    raise RequestEntityTooLarge(
+                        f"The request is larger than the {self.max_request_bytes // 2 ** 20} MB limit.")
+                decoder.receive_data(chunk or None)
+                event = decoder.next_event()
+                while not isinstance(event, (NeedData, Epilogue)):
+                    if isinstance(event, Field):
+                        part, value, size = event, [], 0
+                    elif isinstance(event, File):
+                        part = event
+                        writer = self._start_file(event, fields, archive_fields)
+                    elif isinstance(event, Data):
+                        if isinstance(part, Field):
+                            value.append(event.data)
+                            size += len(event.data)
+                            if size > MAX_FIELD_BYTES:
+                                raise RequestEntityTooLarge(f"The {part.name} field is too large.")
+                        elif writer is not None:
+                            writer.write(event.data)
+                        if not event.more_data:
+                            if isinstance(part, Field):
+                                self.form.add(part.name, b''.join(value).decode('utf-8', 'replace'))
+                            elif writer is not None:
+                                yield from self._finish_file(writer)
+                            part, value, size, writer = None, [], 0, None
+                    event = decoder.next_event()
+                if isinstance(event, Epilogue):
+                    return
+                if not chunk:
+                    raise BadRequest("The request body ended before the upload was complete.")
+        except ValueError as e:
+            # Malformed multipart data
+            raise BadRequest(str(e))
+
+    def _start_file(self, event, fields, archive_fields):
+        self.file_fields.add(event.name)
+        filename = secure_filename(os.path.basename(event.filename or ''))
+        if not filename:
+            # A file input left empty
+            return None
+        if event.name in archive_fields or (event.name in fields and filename.lower().endswith('.zip')):
+            return _SpoolWriter(self, filename, archive=True)
+        if event.name in fields and self.accept(filename):
+            return _SpoolWriter(self, filename, archive=False)
+        return None
+
+    def _finish_file(self, writer):
+        spooled = writer.close()
+        if not writer.archive:
+            yield writer.filename, spooled
+            return
+        try:
+            yield from self._unpack(spooled.path)
+        except (zipfile.BadZipFile, NotImplementedError):
+            # NotImplementedError: a compression method zipfile cannot inflate
+            raise zipfile.BadZipFile(f"{writer.filename} is not a valid zip archive")
+        finally:
+            os.remove(spooled.path)
+
+    def _unpack(self, path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                filename = secure_filename(os.path.basename(info.filename))
+                # Skips directories and encrypted members
+                if info.is_dir() or info.flag_bits & 0x1 or not filename or not self.accept(filename):
+                    continue
+                writer = _SpoolWriter(self, filename, archive=False)
+                # The sizes in the archive's index are not trusted: the writer counts what is inflated
+                with archive.open(info) as member:
+                    for chunk in iter(lambda: member.read(CHUNK_SIZE), b''):
+                        writer.write(chunk)
+                yield filename, writer.close()
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
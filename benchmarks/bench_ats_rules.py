@@ -0,0 +1,42 @@
+"""
+Throughput of the ATS rule checks on a batch of resumes against one JD:
+a new ATSEvaluator per resume vs one ATSRuleEngine for the whole batch.
+Runs on raw extracted text (as /analyze_ats sees it before cleaning) and
+on clean_text output (as the app scores it).
+
+    python -m benchmarks.bench_ats_rules
+"""
+import time
+from app.utils.ats_evaluator import ATSEvaluator, ATSRuleEngine
+from app.utils.preprocessing import clean_texts
+from app.utils.sample_jds import SAMPLE_JDS
+from benchmarks.synthetic import synthetic_resumes
+
+CORPUS_SIZE = 5000
+REPEATS = 3
+
+def best_of(fn):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    raw = [text for _, text in synthetic_resumes(CORPUS_SIZE)]
+    raw += ["Call +91 98765-43210 or mail a@b.co; linkedin.com/in/me. Led work history at X.", ""]
+    corpora = [('raw', raw, SAMPLE_JDS['Data Science'])]
+    corpora.append(('cleaned', list(clean_texts(raw)), next(clean_texts([SAMPLE_JDS['Data Science']]))))
+
+    print(f"{'text':>8} {'ATSEvaluator/s':>15} {'engine/s':>10} {'speedup':>8}")
+    for name, corpus, jd in corpora:
+        per_resume, expected = best_of(lambda: [ATSEvaluator(text, jd).evaluate() for text in corpus])
+        engine = ATSRuleEngine(jd)
+        batched, actual = best_of(lambda: engine.evaluate_batch(corpus))
+        assert actual == expected, "ATSRuleEngine reports differ from ATSEvaluator.evaluate()"
+        print(f"{name:>8} {len(corpus) / per_resume:>15.0f} {len(corpus) / batched:>10.0f} "
+              f"{per_resume / batched:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
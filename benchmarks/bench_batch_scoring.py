@@ -0,0 +1,76 @@
+"""
+Per-request scoring latency of the /predict route: per-file loop vs batched
+path, and the batched path keeping only the top TOP_K candidates.
+
+Run from the repository root after training the model:
+    python -m benchmarks.bench_batch_scoring
+"""
+import os
+import time
+import joblib
+from sklearn.metrics.pairwise import cosine_similarity
+from app.utils.ats_evaluator import extract_keywords
+from app.utils.job_profile import JobProfile
+from app.utils.model_loader import artifact_dir
+from app.utils.preprocessing import clean_text
+from app.utils.sample_jds import SAMPLE_JDS
+from app.utils.scoring import score_resumes
+from benchmarks.synthetic import synthetic_resumes
+
+BATCH_SIZES = [1, 10, 50, 200, 500, 2000]
+TOP_K = 10
+REPEATS = 3
+
+def score_per_file(filenames, cleaned_resumes, cleaned_jd, model, vectorizer):
+    # The original loop from app.py:predict(), kept here as the baseline. Missing
+    # keywords are ranked by JD weight like the batched path, instead of set order
+    jd_vector = vectorizer.transform([cleaned_jd])
+    rank = {word: i for i, word in enumerate(JobProfile(cleaned_jd, vectorizer).ranked_keywords)}
+    results = []
+    for filename, cleaned_resume in zip(filenames, cleaned_resumes):
+        resume_vector = vectorizer.transform([cleaned_resume])
+        category = model.predict(resume_vector)[0]
+        score = round(cosine_similarity(jd_vector, resume_vector)[0][0] * 100, 2)
+        missing_keywords = extract_keywords(cleaned_jd) - extract_keywords(cleaned_resume)
+        missing_keywords = sorted(missing_keywords, key=rank.get)[:10]
+        results.append({
+            'filename': filename,
+            'category': category,
+            'score': score,
+            'missing_keywords': missing_keywords,
+            'excerpt': cleaned_resume[:200] + "..."
+        })
+    results.sort(key=lambda x: x['score'], reverse=True)
+    return results
+
+def best_of(fn, *args):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    directory = artifact_dir('app/models')
+    model = joblib.load(os.path.join(directory, 'model.pkl'))
+    vectorizer = joblib.load(os.path.join(directory, 'vectorizer.pkl'))
+    cleaned_jd = clean_text(SAMPLE_JDS['Python Developer'])
+
+    corpus = [clean_text(text) for _, text in synthetic_resumes(max(BATCH_SIZES))]
+
+    print(f"{'batch':>6} {'per-file ms':>12} {'batched ms':>11} {'speedup':>8} {f'top-{TOP_K} ms':>10}")
+    for size in BATCH_SIZES:
+        cleaned = corpus[:size]
+        filenames = [f"resume_{i}.pdf" for i in range(size)]
+        loop_time, expected = best_of(score_per_file, filenames, cleaned, cleaned_jd, model, vectorizer)
+        batch_time, actual = best_of(score_resumes, filenames, cleaned, cleaned_jd, model, vectorizer)
+        assert actual == expected, "batched results differ from the per-file loop"
+        top_time, top = best_of(lambda *args: score_resumes(*args, top_k=TOP_K),
+                                filenames, cleaned, cleaned_jd, model, vectorizer)
+        assert top == expected[:TOP_K], "top-k results differ from the full ranking"
+        print(f"{size:>6} {loop_time * 1000:>12.1f} {batch_time * 1000:>11.1f} {loop_time / batch_time:>7.1f}x "
+              f"{top_time * 1000:>10.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Microbenchmark of clean_text on a 10k-resume synthetic corpus, comparing the
+original three-pass, lemmatize-every-token implementation with the current one.
+
+    python -m benchmarks.bench_clean_text
+"""
+import re
+import time
+from app.utils import preprocessing
+from app.utils.preprocessing import clean_texts, init_nltk
+from benchmarks.synthetic import synthetic_resumes
+
+CORPUS_SIZE = 10000
+
+def clean_text_baseline(text):
+    # The original implementation, kept here as the reference output
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\S*@\S*\s?', '', text)
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    tokens = text.split()
+    lemmatizer, stop_words = init_nltk()
+    cleaned_tokens = [lemmatizer.lemmatize(word) for word in tokens if word not in stop_words]
+    return " ".join(cleaned_tokens)
+
+def main():
+    corpus = [text for _, text in synthetic_resumes(CORPUS_SIZE)]
+    corpus += ["Visit https://github.com/me or www.me.dev, mail me@x.io. C++/C# dev; 5+ yrs", ""]
+    tokens = sum(len(text.split()) for text in corpus)
+
+    start = time.perf_counter()
+    expected = [clean_text_baseline(text) for text in corpus]
+    baseline = time.perf_counter() - start
+
+    preprocessing._lemma_cache.clear()
+    start = time.perf_counter()
+    actual = list(clean_texts(corpus))
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    list(clean_texts(corpus))
+    warm = time.perf_counter() - start
+
+    assert actual == expected, "clean_text output differs from the original implementation"
+    print(f"corpus: {len(corpus)} resumes, {tokens} tokens, {len(preprocessing._lemma_cache)} cached lemmas")
+    for name, elapsed in [('original', baseline), ('memoized (cold)', cold), ('memoized (warm)', warm)]:
+        print(f"{name:>16}: {elapsed:7.2f}s  {len(corpus) / elapsed:9.0f} resumes/s  {baseline / elapsed:5.1f}x")
+
+if __name__ == '__main__':
+    main()
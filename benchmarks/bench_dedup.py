@@ -0,0 +1,139 @@
+"""
+Duplicate detection: MinHash signature throughput, how well one batch with
+planted exact and near-duplicate resumes (a few words edited) is grouped,
+and DuplicateIndex lookup latency as the stored pool grows, vs comparing
+every stored signature, plus the latency of the small add each /predict
+makes. Finally checks that a reader holding the meta.json from before a
+re-sort can still map the index it names.
+
+    python -m benchmarks.bench_dedup              # index up to 1M resumes
+    python -m benchmarks.bench_dedup 100000       # smaller run
+"""
+import hashlib
+import random
+import sys
+import tempfile
+import time
+import numpy as np
+from app.utils.dedup import (NEAR_DUPLICATE_THRESHOLD, NUM_PERM, TAIL_ROWS, DuplicateIndex, group_duplicates,
+                             minhash_signatures, similarity)
+from app.utils.preprocessing import clean_texts
+from benchmarks.synthetic import synthetic_document
+
+BATCH = 1000
+# Share of the batch that is a copy of another resume in it, half exact and half edited
+DUPLICATE_SHARE = 0.2
+EDITED_WORDS = 10
+POOL_SIZES = [10000, 100000, 1000000]
+ADD_BATCH = 50000
+QUERIES = 100
+# Resumes per add, as in one /predict request, and how many such adds are timed
+REQUEST_RESUMES = 10
+REQUEST_ADDS = 50
+
+def edit(rng, text, words):
+    tokens = text.split()
+    for _ in range(words):
+        tokens[rng.randrange(len(tokens))] = rng.choice(tokens)
+    return ' '.join(tokens)
+
+def planted_batch(rng, n):
+    """
+    n cleaned resumes, DUPLICATE_SHARE of them copies of an earlier one,
+    and the index of the original of each (itself for originals).
+    """
+    originals = list(clean_texts([synthetic_document(rng)[1] for _ in range(n)]))
+    texts, truth = [], []
+    for i, text in enumerate(originals):
+        if i and rng.random() < DUPLICATE_SHARE:
+            j = rng.choice([k for k in range(len(texts)) if truth[k] == k])
+            texts.append(texts[j] if rng.random() < 0.5 else edit(rng, texts[j], EDITED_WORDS))
+            truth.append(j)
+        else:
+            texts.append(text)
+            truth.append(len(texts) - 1)
+    return texts, np.array(truth)
+
+def random_signatures(np_rng, n):
+    return np_rng.integers(0, 2 ** 32, (n, NUM_PERM), dtype=np.uint64).astype(np.uint32)
+
+def timed_request_adds(index, np_rng):
+    # Includes any re-sort one of them triggers, as a request would see it
+    start = time.perf_counter()
+    for _ in range(REQUEST_ADDS):
+        n = len(index)
+        digests = [hashlib.sha256(f"request-{n}-{i}".encode()).hexdigest() for i in range(REQUEST_RESUMES)]
+        index.add(digests, [f"upload_{i}.pdf" for i in range(REQUEST_RESUMES)], random_signatures(np_rng, REQUEST_RESUMES))
+    return (time.perf_counter() - start) / REQUEST_ADDS * 1000
+
+def check_stale_reader(directory, np_rng):
+    """
+    A reader that read meta.json just before another process's add re-sorted
+    the index must still be able to map the sort it names.
+    """
+    reader = DuplicateIndex(directory)
+    stale = reader._read_meta()
+    writer = DuplicateIndex(directory)
+    n = TAIL_ROWS + 1
+    digests = [hashlib.sha256(f"resort-{len(writer)}-{i}".encode()).hexdigest() for i in range(n)]
+    writer.add(digests, [f"filler_{i}.pdf" for i in range(n)], random_signatures(np_rng, n))
+    assert writer._read_meta()['indexed'] != stale['indexed'], "the add did not re-sort"
+    _, maps = reader._map(stale)
+    assert stale['indexed'] == 0 or maps['sorted'], "the stale reader mapped no sorted keys"
+    print(f"stale reader: still maps the sort of {stale['indexed']:,} rows after a re-sort")
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else max(POOL_SIZES)
+    rng = random.Random(0)
+    texts, truth = planted_batch(rng, BATCH)
+
+    start = time.perf_counter()
+    signatures = minhash_signatures(texts)
+    seconds = time.perf_counter() - start
+    print(f"minhash_signatures: {len(texts) / seconds:,.0f} resumes/s")
+
+    start = time.perf_counter()
+    group, _ = group_duplicates(texts, signatures)
+    seconds = time.perf_counter() - start
+    planted = truth != np.arange(len(truth))
+    found = group != np.arange(len(group))
+    print(f"group_duplicates:   {seconds * 1000:.1f} ms for {len(texts)} resumes; "
+          f"{planted.sum()} planted duplicates, {(found & planted).sum()} found, "
+          f"{(found & ~planted).sum()} false, {len(texts) - found.sum()} resumes left to score")
+
+    # Filler rows are random signatures; the queries are near-duplicates of a few planted real rows
+    np_rng = np.random.default_rng(0)
+    queries = minhash_signatures([edit(rng, text, EDITED_WORDS) for text in texts[:QUERIES]])
+    with tempfile.TemporaryDirectory() as directory:
+        index = DuplicateIndex(directory)
+        index.add([hashlib.sha256(text.encode()).hexdigest() for text in texts[:QUERIES]],
+                  [f"resume_{i}.pdf" for i in range(QUERIES)], signatures[:QUERIES])
+        print(f"{'stored':>9} | {'index ms/query':>14} | {'scan ms/query':>13} | {'add ms/request':>14} | found")
+        for size in [size for size in POOL_SIZES if size <= largest]:
+            while len(index) < size:
+                n = min(ADD_BATCH, size - len(index))
+                digests = [hashlib.sha256(f"{len(index)}-{i}".encode()).hexdigest() for i in range(n)]
+                filler = random_signatures(np_rng, n)
+                index.add(digests, [f"filler_{i}.pdf" for i in range(n)], filler)
+            index.query(queries[:1])
+
+            start = time.perf_counter()
+            matches = index.query(queries)
+            index_ms = (time.perf_counter() - start) / QUERIES * 1000
+
+            stored = np.memmap(f"{directory}/signatures.bin", dtype=np.uint32, mode='r', shape=(len(index), NUM_PERM))
+            start = time.perf_counter()
+            for query in queries[:10]:
+                scores = np.zeros(len(stored))
+                for block in range(0, len(stored), ADD_BATCH):
+                    scores[block:block + ADD_BATCH] = similarity(stored[block:block + ADD_BATCH], query)
+                np.flatnonzero(scores >= NEAR_DUPLICATE_THRESHOLD)
+            scan_ms = (time.perf_counter() - start) / 10 * 1000
+            add_ms = timed_request_adds(index, np_rng)
+            print(f"{len(index):>9,} | {index_ms:>14.2f} | {scan_ms:>13.1f} | {add_ms:>14.2f} | "
+                  f"{sum(match is not None for match in matches)}/{QUERIES}")
+
+        check_stale_reader(directory, np_rng)
+
+if __name__ == '__main__':
+    main()
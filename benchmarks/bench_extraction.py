@@ -0,0 +1,83 @@
+"""
+Text extraction on large synthetic PDFs and DOCX files: the original
+per-page string concatenation vs the generator extractor joined once, with
+budgets off, with the default budgets (MAX_PAGES pages, MAX_CHARS
+characters, MAX_SECONDS) and in early-exit mode. Also reports the peak
+Python allocation of each run.
+
+    python -m benchmarks.bench_extraction
+"""
+import io
+import time
+import tracemalloc
+import PyPDF2
+import docx
+from app.utils.file_reader import extract_text_from_docx, extract_text_from_pdf
+from benchmarks.synthetic import synthetic_docx, synthetic_pdf, synthetic_resumes
+
+PDF_PAGES = [10, 100, 300]
+DOCX_PARAGRAPHS = [100, 2000, 20000]
+EARLY_EXIT_CHARS = 20000
+REPEATS = 3
+
+def concatenating_pdf(file_stream):
+    # The extractor as it was: one string concatenation per page
+    text = ""
+    for page in PyPDF2.PdfReader(file_stream).pages:
+        text += page.extract_text() + " "
+    return text.strip()
+
+def concatenating_docx(file_stream):
+    text = ""
+    for para in docx.Document(file_stream).paragraphs:
+        text += para.text + " "
+    return text.strip()
+
+UNLIMITED = {'max_pages': None, 'max_chars': None, 'max_seconds': None}
+
+def measure(fn, data):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        text = fn(io.BytesIO(data))
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(io.BytesIO(data))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best * 1000, peak / 2 ** 20, text
+
+def report(label, data, variants):
+    print(f"\n{label} ({len(data) / 2 ** 20:.1f} MiB)")
+    baseline = None
+    for name, fn in variants:
+        ms, peak, text = measure(fn, data)
+        if baseline is None:
+            baseline = text
+        elif name == 'generator, no budgets':
+            assert text == baseline, "generator extractor differs from the concatenating one"
+        print(f"  {name:<24} {ms:>9.1f} ms  peak {peak:>7.1f} MiB  {len(text):>10,} chars")
+
+def main():
+    resumes = [text for _, text in synthetic_resumes(50)]
+    for pages in PDF_PAGES:
+        data = synthetic_pdf([resumes[i % len(resumes)] for i in range(pages)])
+        report(f"PDF, {pages} pages", data, [
+            ('concatenating', concatenating_pdf),
+            ('generator, no budgets', lambda f: extract_text_from_pdf(f, **UNLIMITED)),
+            ('default budgets', extract_text_from_pdf),
+            ('early exit', lambda f: extract_text_from_pdf(f, early_exit_chars=EARLY_EXIT_CHARS)),
+        ])
+
+    lines = [line for text in resumes for line in text.split('\n')]
+    for paragraphs in DOCX_PARAGRAPHS:
+        data = synthetic_docx([lines[i % len(lines)] for i in range(paragraphs)])
+        report(f"DOCX, {paragraphs} paragraphs", data, [
+            ('concatenating', concatenating_docx),
+            ('generator, no budgets', lambda f: extract_text_from_docx(f, **UNLIMITED)),
+            ('default budgets', extract_text_from_docx),
+            ('early exit', lambda f: extract_text_from_docx(f, early_exit_chars=EARLY_EXIT_CHARS)),
+        ])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Semantic scoring in LSA space vs sparse TF-IDF cosine as the vocabulary
+grows to 2k, 20k and 100k features, with 200 LSA dimensions. For each
+size it reports:
+- the one-off cost: TruncatedSVD fit time and the size of the basis
+- the memory of the pool's vectors: sparse TF-IDF rows vs dense float32
+- latency and peak memory of scoring the pool against one JD and against
+  every sample JD, sparse vs LSA. LSA is timed both from TF-IDF rows
+  (projected inside the request) and from stored LSA vectors (as the
+  talent pool keeps them)
+- how many of each sample JD's sparse top 10 the LSA top 10 keeps
+
+A long tail of rare terms is mixed into the synthetic resumes, so that
+the larger vocabularies really hold more (and sparser) features.
+
+    python -m benchmarks.bench_lsa
+"""
+import time
+import tracemalloc
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+from app.utils.lsa import cosine, fit_lsa
+from app.utils.preprocessing import clean_text
+from app.utils.sample_jds import SAMPLE_JDS
+from benchmarks.synthetic import synthetic_resumes
+
+FEATURE_COUNTS = [2000, 20000, 100000]
+COMPONENTS = 200
+RESUMES = 20000
+# Rare terms per resume, drawn from a Zipf distribution over TAIL_VOCABULARY terms
+TAIL_WORDS = 150
+TAIL_VOCABULARY = 500000
+TOP = 10
+REPEATS = 3
+
+def corpus(n, seed=0):
+    rng = np.random.default_rng(seed)
+    tails = np.minimum(rng.zipf(1.2, (n, TAIL_WORDS)), TAIL_VOCABULARY)
+    return [
+        text + ' ' + ' '.join(f"term{t}" for t in tail)
+        for (_, text), tail in zip(synthetic_resumes(n, seed=seed), tails)
+    ]
+
+def measure(fn):
+    """
+    (best of REPEATS in ms, peak traced MiB of one more run).
+    """
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best * 1000, peak / 2 ** 20
+
+def sparse_bytes(matrix):
+    return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+def main():
+    texts = corpus(RESUMES)
+    jds = [clean_text(jd) for jd in SAMPLE_JDS.values()]
+    print(f"{RESUMES} resumes, {len(jds)} sample JDs, {COMPONENTS} LSA dimensions\n")
+    print(f"{'features':>8} | {'SVD fit':>8} {'basis':>9} | {'sparse pool':>11} {'dense pool':>10} | "
+          f"{'scoring':<13} {'sparse':>19} {'LSA from rows':>19} {'LSA stored':>19} | top-{TOP} kept")
+    for n_features in FEATURE_COUNTS:
+        vectorizer = TfidfVectorizer(max_features=n_features)
+        X = vectorizer.fit_transform(texts)
+        start = time.perf_counter()
+        lsa, _ = fit_lsa(X, COMPONENTS)
+        fit_seconds = time.perf_counter() - start
+        stored = lsa.transform(X)
+        J = vectorizer.transform(jds)
+        J_dense = lsa.transform(J)
+
+        kept = []
+        for m in range(len(jds)):
+            sparse_top = set(np.argsort(-cosine_similarity(J[m], X)[0], kind='stable')[:TOP])
+            lsa_top = set(np.argsort(-cosine(stored, J_dense[m:m + 1])[:, 0], kind='stable')[:TOP])
+            kept.append(len(sparse_top & lsa_top))
+
+        prefix = (f"{X.shape[1]:>8} | {fit_seconds:>6.1f} s {lsa.basis.nbytes / 2 ** 20:>5.1f} MiB | "
+                  f"{sparse_bytes(X) / 2 ** 20:>7.1f} MiB {stored.nbytes / 2 ** 20:>6.1f} MiB")
+        for label, rows in (('1 JD', slice(0, 1)), (f"{len(jds)} JDs", slice(None))):
+            cells = []
+            for fn in (
+                lambda: cosine_similarity(J[rows], X),
+                lambda: cosine(J_dense[rows], lsa.transform(X)),
+                lambda: cosine(J_dense[rows], stored),
+            ):
+                ms, peak = measure(fn)
+                cells.append(f"{ms:>7.1f} ms {peak:>6.1f} MiB")
+            print(f"{prefix} | {label:<13} {' '.join(f'{cell:>19}' for cell in cells)} | "
+                  f"{np.mean(kept):.1f}/{TOP}")
+            prefix = ' ' * len(prefix)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Scoring one pool of resumes against M job descriptions: score_resumes once
+per JD (what re-submitting the pool to /predict per requisition costs,
+parsing aside) vs one JobSet match_matrix call, and the peak memory of the
+blocked matrix product as the pool grows.
+
+Run from the repository root after training the model:
+    python -m benchmarks.bench_match_matrix
+"""
+import random
+import time
+import tracemalloc
+from app.utils.job_profile import JobProfile
+from app.utils.match_matrix import JobSet, match_matrix
+from app.utils.model_loader import ModelStore
+from app.utils.preprocessing import clean_text
+from app.utils.sample_jds import SAMPLE_JDS
+from app.utils.scoring import score_resumes
+from benchmarks.synthetic import synthetic_resumes
+
+POOL_SIZES = [1000, 10000, 50000]
+JOB_COUNTS = [5, 50]
+TOP_K = 10
+REPEATS = 3
+
+def job_descriptions(m, seed=0):
+    # Sample JDs, reshuffled into distinct requisitions once they run out
+    rng = random.Random(seed)
+    texts = list(SAMPLE_JDS.values())
+    jds = texts[:m]
+    while len(jds) < m:
+        words = rng.choice(texts).split()
+        rng.shuffle(words)
+        jds.append(' '.join(words[:len(words) // 2]))
+    return jds
+
+def measure(fn):
+    """
+    (best of REPEATS in ms, peak traced MiB of one more run).
+    """
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best * 1000, peak / 2 ** 20
+
+def main():
+    bundle = ModelStore('app/models').get()
+    model, vectorizer = bundle.model, bundle.vectorizer
+    corpus = [clean_text(text) for _, text in synthetic_resumes(max(POOL_SIZES))]
+    print(f"{'resumes':>8} {'JDs':>4} | {'per-JD score_resumes':>22} | {'match_matrix':>22}")
+    for m in JOB_COUNTS:
+        profiles = [JobProfile(clean_text(jd), vectorizer) for jd in job_descriptions(m)]
+        for n in POOL_SIZES:
+            cleaned = corpus[:n]
+            matrix = vectorizer.transform(cleaned)
+            filenames = [f"resume_{i}.pdf" for i in range(n)]
+            job_set = JobSet(profiles, matrix.shape[1])
+
+            def per_jd():
+                for profile in profiles:
+                    score_resumes(filenames, cleaned, profile.cleaned, model, vectorizer, matrix,
+                                  top_k=TOP_K, job_profile=profile)
+
+            row = f"{n:>8} {m:>4}"
+            for fn in (per_jd, lambda: match_matrix(job_set, cleaned, matrix, model, TOP_K)):
+                ms, peak = measure(fn)
+                row += f" | {ms:>8.0f} ms {peak:>7.1f} MiB"
+            print(row)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Training time, inference latency and holdout accuracy of every classifier
+backend in app.utils.model_backends, on a noisy synthetic resume corpus.
+Linear backends are timed both as the fitted sklearn estimator and as the
+compiled one-matmul LinearModel that train_model.py saves.
+
+    python -m benchmarks.bench_model_backends
+"""
+import time
+import warnings
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.model_selection import train_test_split
+from app.utils.model_backends import BACKENDS, build_classifier, compile_model
+from app.utils.preprocessing import clean_texts
+from benchmarks.synthetic import synthetic_resumes
+
+CORPUS_SIZE = 3000
+BATCH_SIZE = 500
+SINGLE_REPEATS = 200
+
+def latency(model, X, repeats):
+    """Median seconds for one predict + predict_proba call on X."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X)
+        model.predict_proba(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+def main():
+    # SVC(probability=True) is deprecated in recent sklearn; that is the point of this comparison
+    warnings.filterwarnings('ignore', category=FutureWarning)
+    corpus = synthetic_resumes(CORPUS_SIZE, words=60, signal=0.15)
+    labels = [category for category, _ in corpus]
+    cleaned = list(clean_texts(text for _, text in corpus))
+    X_train_text, X_test_text, y_train, y_test = train_test_split(
+        cleaned, labels, test_size=0.25, random_state=42, stratify=labels
+    )
+    tfidf = TfidfVectorizer(max_features=2000)
+    X_train = tfidf.fit_transform(X_train_text)
+    X_test = tfidf.transform(X_test_text)
+    single = X_test[:1]
+    batch = X_test[:BATCH_SIZE]
+
+    print(f"train {X_train.shape[0]} / test {X_test.shape[0]} resumes, {X_train.shape[1]} features\n")
+    print(f"{'backend':<22} {'train s':>8} {'accuracy':>9} {'1 resume ms':>12} {f'{BATCH_SIZE} resumes ms':>16}")
+    for backend in BACKENDS:
+        start = time.perf_counter()
+        clf = build_classifier(backend)
+        clf.fit(X_train, y_train)
+        compiled = compile_model(clf)
+        train_seconds = time.perf_counter() - start
+
+        variants = [(backend, clf)]
+        if compiled is not clf:
+            variants.append((f"{backend} (compiled)", compiled))
+            assert (compiled.predict(X_test) == clf.predict(X_test)).all(), "compiled predictions differ"
+            assert np.allclose(compiled.predict_proba(X_test), clf.predict_proba(X_test)), "compiled probabilities differ"
+
+        for name, model in variants:
+            accuracy = (model.predict(X_test) == np.asarray(y_test)).mean()
+            print(f"{name:<22} {train_seconds:>8.2f} {accuracy:>9.3f} "
+                  f"{latency(model, single, SINGLE_REPEATS) * 1000:>12.3f} "
+                  f"{latency(model, batch, 10) * 1000:>16.2f}")
+
+if __name__ == '__main__':
+    main()
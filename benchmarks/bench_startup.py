@@ -0,0 +1,72 @@
+"""
+Cold-start cost of the app: each stage runs in a fresh interpreter so nothing
+is already imported or loaded. Also lists the slowest imports reported by
+python -X importtime for app.py.
+
+    python -m benchmarks.bench_startup
+"""
+import subprocess
+import sys
+
+STAGES = {
+    'import preprocessing': "import app.utils.preprocessing",
+    'import app.py': "import runpy; runpy.run_path('app.py', run_name='app_main')",
+    'first clean_text (NLTK init)': (
+        "from app.utils.preprocessing import clean_text; "
+        "START(); clean_text('Developed scalable services'); STOP()"
+    ),
+    'first model load': (
+        "from app.utils.model_loader import ModelStore; "
+        "START(); ModelStore('app/models').get(); STOP()"
+    ),
+}
+
+PRELUDE = (
+    "import time\n"
+    "_t = [time.perf_counter(), None]\n"
+    "def START(): _t[0] = time.perf_counter()\n"
+    "def STOP(): _t[1] = time.perf_counter()\n"
+)
+EPILOGUE = "\nprint(((_t[1] or time.perf_counter()) - _t[0]) * 1000)\n"
+
+def run_stage(code):
+    result = subprocess.run(
+        [sys.executable, '-c', PRELUDE + code + EPILOGUE],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if 'Error' in line]
+        raise RuntimeError(errors[-1].strip() if errors else f"exit status {result.returncode}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(code, limit=10):
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len('import time:'):].split('|')]
+        # Only top-level entries; nested ones are already counted in their parent
+        if not name.startswith(' ') and not line.split('|')[2].startswith('  '):
+            rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:limit]
+
+def main(repeats=3):
+    print(f"{'stage':<30} {'best of %d (ms)' % repeats:>16}")
+    for name, code in STAGES.items():
+        try:
+            best = min(run_stage(code) for _ in range(repeats))
+        except RuntimeError as e:
+            print(f"{name:<30} {'failed':>16}  ({e})")
+            continue
+        print(f"{name:<30} {best:>16.1f}")
+
+    print("\nslowest imports for app.py (cumulative ms):")
+    for cumulative, name in slowest_imports(STAGES['import app.py']):
+        print(f"  {cumulative / 1000:>8.1f}  {name}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Ingesting the same resumes in each upload format, from upload bytes to
+extracted text: one file per resume as PDF and DOCX (parsed in the
+extraction pool), TXT in UTF-8 and cp1252, and HTML (read on the request
+thread), vs one JSON Lines export of all of them, split into records
+that skip document parsing.
+
+    python -m benchmarks.bench_structured_input
+"""
+import html
+import json
+import random
+import time
+from app.utils.extraction_pool import ExtractionPool
+from app.utils.records import expand_records
+from benchmarks.synthetic import synthetic_document, synthetic_file
+
+COUNTS = [100, 1000, 5000]
+REPEATS = 3
+
+def html_file(text):
+    paragraphs = ''.join(f"<p>{html.escape(line)}</p>" for line in text.split('\n'))
+    return f"<!DOCTYPE html><html><head><style>p {{margin: 0}}</style></head><body>{paragraphs}</body></html>".encode()
+
+def uploads_by_format(texts):
+    return {
+        'pdf': [(f"resume_{i}.pdf", synthetic_file(text, 'pdf')) for i, text in enumerate(texts)],
+        'docx': [(f"resume_{i}.docx", synthetic_file(text, 'docx')) for i, text in enumerate(texts)],
+        'txt (utf-8)': [(f"resume_{i}.txt", text.encode()) for i, text in enumerate(texts)],
+        'txt (cp1252)': [(f"resume_{i}.txt", (text + " – café").encode('cp1252')) for i, text in enumerate(texts)],
+        'html': [(f"resume_{i}.html", html_file(text)) for i, text in enumerate(texts)],
+        'jsonl export': [("export.jsonl", b''.join(
+            json.dumps({'id': f"candidate-{i}", 'resume_text': text}).encode() + b'\n' for i, text in enumerate(texts)))],
+    }
+
+def main():
+    rng = random.Random(0)
+    texts = [synthetic_document(rng)[1] for _ in range(max(COUNTS))]
+    pool = ExtractionPool()
+    # Start the workers before timing anything
+    pool.extract_all([("warmup.docx", synthetic_file(texts[0], 'docx'))])
+    results = {}
+    for n in COUNTS:
+        for name, uploads in uploads_by_format(texts[:n]).items():
+            best = float('inf')
+            for _ in range(REPEATS):
+                start = time.perf_counter()
+                extracted = pool.extract_all(expand_records(uploads))
+                best = min(best, time.perf_counter() - start)
+            assert len(extracted) == n and all(extracted), f"{name}: {sum(map(bool, extracted))}/{n} resumes read"
+            results.setdefault(name, []).append(n / best)
+    print(f"{'format':<14}" + ''.join(f" | {n:>6} resumes/s" for n in COUNTS))
+    for name, rates in results.items():
+        print(f"{name:<14}" + ''.join(f" | {rate:>16,.0f}" for rate in rates))
+    pool.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Talent pool at scale: bulk add throughput, single-resume add latency (one
+/predict upload) against the full pool, on-disk size and top-10 search
+latency for exact (blocked) and ANN (clustered) search, float32 vs int8.
+Vectors are synthetic 256-d (the projected dimension used for wide
+vectorizers), drawn around 200 topic directions like real resume pools.
+
+    python -m benchmarks.bench_talent_pool            # 1M resumes
+    python -m benchmarks.bench_talent_pool 100000     # smaller run
+"""
+import hashlib
+import sys
+import tempfile
+import time
+import numpy as np
+from app.utils.talent_pool import PROJECTED_DIM, TalentPool
+
+POOL_SIZE = 1000000
+ADD_BATCH = 50000
+SINGLE_ADDS = 200
+TOPICS = 200
+QUERIES = 20
+TOP_N = 10
+NPROBES = [4, 16, 64]
+
+def synthetic_vectors(rng, centers, n):
+    topics = rng.integers(0, len(centers), n)
+    noise = rng.standard_normal((n, centers.shape[1])) / np.sqrt(centers.shape[1])
+    return (centers[topics] + 1.2 * noise).astype(np.float32)
+
+def timed_search(pool, queries, **kwargs):
+    start = time.perf_counter()
+    results = [pool.search(query, TOP_N, **kwargs) for query in queries]
+    return (time.perf_counter() - start) / len(queries) * 1000, results
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else POOL_SIZE
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((TOPICS, PROJECTED_DIM))
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    queries = synthetic_vectors(rng, centers, QUERIES)
+
+    for quantize in (False, True):
+        with tempfile.TemporaryDirectory() as directory:
+            pool = TalentPool(directory, PROJECTED_DIM, quantize=quantize, version='bench')
+            start = time.perf_counter()
+            for offset in range(0, size, ADD_BATCH):
+                n = min(ADD_BATCH, size - offset)
+                digests = [hashlib.sha256(str(offset + i).encode()).hexdigest() for i in range(n)]
+                pool.add(digests, [f"resume_{offset + i}.pdf" for i in range(n)], synthetic_vectors(rng, centers, n))
+            add_seconds = time.perf_counter() - start
+            stats = pool.stats()
+
+            label = 'int8' if quantize else 'float32'
+            print(f"{label}: {stats['rows']} resumes added at {stats['rows'] / add_seconds:,.0f}/s, "
+                  f"{stats['bytes'] / 2 ** 20:,.0f} MiB on disk")
+
+            # One new resume per call, as a request adds them; includes any digest re-sort it triggers
+            digests = [hashlib.sha256(f"single-{i}".encode()).hexdigest() for i in range(SINGLE_ADDS)]
+            vectors = synthetic_vectors(rng, centers, SINGLE_ADDS)
+            start = time.perf_counter()
+            for i in range(SINGLE_ADDS):
+                pool.add(digests[i:i + 1], [f"single_{i}.pdf"], vectors[i:i + 1])
+            print(f"  single add:          {(time.perf_counter() - start) / SINGLE_ADDS * 1000:8.2f} ms/resume")
+            exact_ms, exact = timed_search(pool, queries)
+            print(f"  exact search:        {exact_ms:8.1f} ms/query")
+
+            start = time.perf_counter()
+            pool.build_ann()
+            print(f"  build_ann:           {time.perf_counter() - start:8.1f} s ({pool.stats()['clusters']} clusters)")
+            for nprobe in NPROBES:
+                ann_ms, approx = timed_search(pool, queries, nprobe=nprobe)
+                recall = np.mean([
+                    len({row[0] for row in a} & {row[0] for row in e}) / TOP_N for a, e in zip(approx, exact)
+                ])
+                print(f"  ANN nprobe={nprobe:<3}:      {ann_ms:8.1f} ms/query  recall@{TOP_N} {recall:.2f}")
+
+if __name__ == '__main__':
+    main()
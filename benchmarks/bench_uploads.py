@@ -0,0 +1,69 @@
+"""
+Memory and time to receive a multipart request of N resumes: Werkzeug's
+request.files followed by reading every file into memory (the old /predict
+path) vs UploadSpool spooling each file to disk as it arrives. Bodies are
+read from a file on disk, so the peak Python allocation is the parser's own.
+
+    python -m benchmarks.bench_uploads
+"""
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+from werkzeug.formparser import parse_form_data
+from werkzeug.test import EnvironBuilder
+from app.utils.upload_spool import UploadSpool
+from benchmarks.synthetic import synthetic_corpus
+
+REQUEST_SIZES = [20, 200, 1000]
+
+def write_body(files, path):
+    environ = EnvironBuilder(method='POST', data={
+        'job_description': 'Python developer',
+        'resume_files': [(io.BytesIO(data), filename) for filename, data in files]
+    }).get_environ()
+    with open(path, 'wb') as f:
+        f.write(environ['wsgi.input'].read())
+    return environ['CONTENT_TYPE'], os.path.getsize(path)
+
+def in_memory(path, content_type, size, directory):
+    with open(path, 'rb') as body:
+        environ = EnvironBuilder(method='POST', input_stream=body, content_type=content_type,
+                                 headers={'Content-Length': str(size)}).get_environ()
+        _, _, files = parse_form_data(environ)
+        return [(file.filename, file.read()) for file in files.getlist('resume_files')]
+
+def spooled(path, content_type, size, directory):
+    spool = UploadSpool(directory)
+    try:
+        with open(path, 'rb') as body:
+            return list(spool.files(body, content_type))
+    finally:
+        spool.cleanup()
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    uploads = fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return len(uploads), elapsed * 1000, peak / 2 ** 20
+
+def main():
+    corpus = [(filename, data) for _, filename, data in synthetic_corpus(max(REQUEST_SIZES), ('pdf', 'docx'), 600)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'body')
+        print(f"{'files':>6} {'body MiB':>9} | {'request.files + read':>22} | {'spooled':>22}")
+        for n in REQUEST_SIZES:
+            content_type, size = write_body(corpus[:n], path)
+            row = f"{n:>6} {size / 2 ** 20:>9.1f}"
+            for fn in (in_memory, spooled):
+                count, ms, peak = measure(fn, path, content_type, size, directory)
+                assert count == n
+                row += f" | {ms:>7.0f} ms {peak:>7.2f} MiB"
+            print(row)
+
+if __name__ == '__main__':
+    main()
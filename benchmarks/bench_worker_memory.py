@@ -0,0 +1,119 @@
+"""
+Per-worker memory of the model artifacts under a pre-forking server such as
+gunicorn: pickled vs memory-mapped artifacts, loaded before the fork
+(--preload) or in each worker. Every worker reports RSS, PSS (shared pages
+split between the processes using them) and private memory right after the
+fork and again after scoring one batch, read from /proc/self/smaps_rollup.
+
+Uses a synthetic vectorizer/linear model large enough to dominate a
+worker's footprint (200k terms by default, one class per sample JD).
+
+    python -m benchmarks.bench_worker_memory            # 200k terms, 4 workers
+    python -m benchmarks.bench_worker_memory 50000 8    # 50k terms, 8 workers
+"""
+import gc
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import joblib
+import numpy as np
+from app.utils.mapped_artifacts import MAPPED_DIR, export_artifacts
+from app.utils.model_backends import LinearModel
+from app.utils.model_loader import ModelStore, artifact_version
+from app.utils.sample_jds import SAMPLE_JDS
+
+VOCABULARY_SIZE = 200000
+WORKERS = 4
+BATCH = 200
+
+def smaps_rollup():
+    """
+    RSS, PSS and private memory of this process in MiB.
+    """
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return fields['Rss'], fields['Pss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+def synthetic_documents(rng, terms, n, words=300):
+    return [' '.join(rng.choice(terms, words)) for _ in range(n)]
+
+def build_artifacts(directory, n_terms):
+    """
+    Pickles a TF-IDF vectorizer over n_terms synthetic skills and a random
+    linear model over its features into `directory`; returns sample documents.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    rng = np.random.default_rng(0)
+    terms = np.array([f"skill{i:07d}" for i in range(n_terms)])
+    vectorizer = TfidfVectorizer().fit(synthetic_documents(rng, terms, max(1, 4 * n_terms // 300)))
+    n_features = len(vectorizer.vocabulary_)
+    classes = np.array(sorted(SAMPLE_JDS))
+    model = LinearModel(classes, rng.standard_normal((len(classes), n_features)), np.zeros(len(classes)), 'softmax')
+    joblib.dump(model, os.path.join(directory, 'model.pkl'))
+    joblib.dump(vectorizer, os.path.join(directory, 'vectorizer.pkl'))
+    return model, vectorizer, synthetic_documents(rng, terms, BATCH), n_features
+
+def worker(store, documents, barrier, results):
+    before = smaps_rollup()
+    barrier.wait()
+    bundle = store.get()
+    bundle.model.predict_proba(bundle.vectorizer.transform(documents))
+    gc.collect()
+    # Measure with every worker still alive, so PSS splits shared pages between them
+    barrier.wait()
+    results.put((before, smaps_rollup()))
+    barrier.wait()
+
+def measure(model_dir, preload, workers, documents):
+    context = multiprocessing.get_context('fork')
+    store = ModelStore(model_dir)
+    if preload:
+        store.get()
+        # As app.py does with PRELOAD_MODELS: keep the workers' GC from touching (and copying) inherited objects
+        gc.freeze()
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(store, documents, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    gc.unfreeze()
+    return np.mean([before for before, _ in samples], axis=0), np.mean([after for _, after in samples], axis=0)
+
+def main():
+    n_terms = int(sys.argv[1]) if len(sys.argv) > 1 else VOCABULARY_SIZE
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else WORKERS
+    pickled = tempfile.mkdtemp()
+    mapped = tempfile.mkdtemp()
+    try:
+        model, vectorizer, documents, n_features = build_artifacts(pickled, n_terms)
+        for name in ('model.pkl', 'vectorizer.pkl'):
+            shutil.copy(os.path.join(pickled, name), mapped)
+        export_artifacts(model, vectorizer, os.path.join(mapped, MAPPED_DIR),
+                         artifact_version(os.path.join(mapped, 'model.pkl'), os.path.join(mapped, 'vectorizer.pkl')))
+        del model, vectorizer
+        gc.collect()
+
+        print(f"{n_features} features x {len(SAMPLE_JDS)} classes, {workers} workers; MiB per worker")
+        print(f"{'artifacts':>10} {'loaded':>13} | {'RSS':>7} {'PSS':>7} {'private':>8} "
+              f"| after one batch: {'RSS':>7} {'PSS':>7} {'private':>8}")
+        for label, directory in (('pickle', pickled), ('mapped', mapped)):
+            for preload in (False, True):
+                before, after = measure(directory, preload, workers, documents)
+                print(f"{label:>10} {'before fork' if preload else 'in worker':>13} | "
+                      f"{before[0]:>7.1f} {before[1]:>7.1f} {before[2]:>8.1f} "
+                      f"|                  {after[0]:>7.1f} {after[1]:>7.1f} {after[2]:>8.1f}")
+    finally:
+        shutil.rmtree(pickled)
+        shutil.rmtree(mapped)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Compares two benchmark suite result files (see benchmarks.run_suite) metric
+by metric. Metrics ending in _ms are better lower, those ending in _per_s
+better higher; a change for the worse beyond the threshold is a regression
+and makes the command exit with status 1.
+
+    python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+    python -m benchmarks.compare old.json new.json --threshold 5
+"""
+import argparse
+import json
+import sys
+
+THRESHOLD = 10.0
+
+def flatten(results, prefix=''):
+    """
+    {'a': {'b': 1.5}} -> {'a.b': 1.5}, keeping numeric leaves only.
+    """
+    metrics = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = value
+    return metrics
+
+def change(name, old, new):
+    """
+    Percent change of a metric, positive when it got worse; None for
+    metrics without a direction (sizes, counts) or a zero baseline.
+    """
+    if not old:
+        return None
+    if name.endswith('_ms'):
+        return (new - old) / old * 100
+    if name.endswith('_per_s'):
+        return (old - new) / old * 100
+    return None
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """
+    Prints every metric present in both runs with its change; returns the
+    names of the regressions.
+    """
+    old_metrics, new_metrics = flatten(baseline['results']), flatten(current['results'])
+    print(f"baseline {baseline.get('commit') or '?'}  ->  current {current.get('commit') or '?'}")
+    print(f"  {'metric':<52} {'baseline':>12} {'current':>12} {'better':>9}")
+    regressions = []
+    for name in sorted(old_metrics.keys() & new_metrics.keys()):
+        old, new = old_metrics[name], new_metrics[name]
+        worse = change(name, old, new)
+        flag = ''
+        if worse is not None and worse > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        delta = '' if worse is None else f"{-worse:+8.1f}%"
+        print(f"  {name:<52} {old:>12.4g} {new:>12.4g} {delta:>9}{flag}")
+    for name in sorted(old_metrics.keys() ^ new_metrics.keys()):
+        print(f"  {name:<52} only in {'baseline' if name in old_metrics else 'current'}")
+    print(f"{len(regressions)} regression(s) beyond {threshold:g}%")
+    return regressions
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark suite result files.")
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="percent slowdown reported as a regression (default: %(default)s)")
+    args = parser.parse_args()
+    sys.exit(1 if compare(load(args.baseline), load(args.current), args.threshold) else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Writes a synthetic resume corpus to disk: PDF, DOCX and TXT files laid out
+like real resumes, drawn from the sample JDs of the categories the model is
+trained on, plus a labels.csv mapping each file to its category. Useful for
+load-testing a running server or the /api/v1/screen endpoint by hand.
+
+    python -m benchmarks.generate_corpus data/bench_corpus
+    python -m benchmarks.generate_corpus data/bench_corpus --count 1000 --words 1500 --formats pdf,docx
+"""
+import argparse
+import csv
+import os
+from benchmarks.synthetic import FORMATS, synthetic_corpus
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic resume corpus.")
+    parser.add_argument('output', help="directory to write the files to")
+    parser.add_argument('--count', type=int, default=100, help="number of resumes")
+    parser.add_argument('--words', type=int, default=400, help="body words per resume (about 500 per PDF page)")
+    parser.add_argument('--formats', default=','.join(FORMATS), help="comma-separated formats to cycle through")
+    parser.add_argument('--signal', type=float, default=0.8, help="share of words taken from the category's JD")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    formats = tuple(args.formats.split(','))
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"unknown formats: {', '.join(sorted(unknown))}")
+
+    os.makedirs(args.output, exist_ok=True)
+    corpus = synthetic_corpus(args.count, formats, args.words, args.seed, args.signal)
+    with open(os.path.join(args.output, 'labels.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['filename', 'category'])
+        for category, filename, data in corpus:
+            with open(os.path.join(args.output, filename), 'wb') as out:
+                out.write(data)
+            writer.writerow([filename, category])
+    size = sum(len(data) for _, _, data in corpus)
+    print(f"Wrote {len(corpus)} resumes ({size / 2 ** 20:.1f} MiB) to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""
+End-to-end benchmark suite: per-stage microbenchmarks (clean_text, PDF/DOCX/
+TXT extraction, ATS rules, model inference) and load tests of /predict and
+/analyze_ats through the Flask test client, all on a synthetic corpus
+generated from the sample JDs. Runs fully offline (NLTK data must already
+be installed) and writes the results as JSON, tagged with the git commit,
+so runs can be compared across commits with benchmarks.compare.
+
+Run from the repository root after training the model:
+    python -m benchmarks.run_suite                    # writes benchmarks/results/<commit>.json
+    python -m benchmarks.run_suite --quick            # smaller corpus, for a fast sanity check
+    python -m benchmarks.run_suite --compare benchmarks/results/<baseline>.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import runpy
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# Never reach the network: missing NLTK data is an error, not a download
+os.environ.setdefault('NLTK_OFFLINE', '1')
+
+import numpy as np
+import sklearn
+from app.utils import preprocessing
+from app.utils.ats_evaluator import ATSEvaluator, ATSRuleEngine
+from app.utils.file_reader import extract_text_from_stream
+from app.utils.job_profile import JobProfile
+from app.utils.model_loader import ModelStore
+from app.utils.preprocessing import clean_texts
+from app.utils.sample_jds import SAMPLE_JDS
+from app.utils.scoring import score_resumes
+from benchmarks.compare import THRESHOLD, compare, load
+from benchmarks.synthetic import FORMATS, synthetic_document, synthetic_file
+
+RESULTS_DIR = 'benchmarks/results'
+SIZES = {
+    'full': {'resumes': 2000, 'words': 400, 'documents': 30, 'large_words': 5000, 'requests': 30, 'batch': 20},
+    'quick': {'resumes': 200, 'words': 400, 'documents': 5, 'large_words': 2000, 'requests': 5, 'batch': 10},
+}
+REPEATS = 3
+
+def git_commit():
+    """
+    (short commit hash, uncommitted changes?) of the working tree, or
+    (None, None) outside a git checkout.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+def best_of(fn):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def latency_summary(seconds):
+    ms = np.array(seconds) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'mean_ms': round(float(ms.mean()), 3),
+    }
+
+def bench_clean_text(texts):
+    preprocessing._lemma_cache.clear()
+    start = time.perf_counter()
+    list(clean_texts(texts))
+    cold = time.perf_counter() - start
+    warm = best_of(lambda: list(clean_texts(texts)))
+    return {
+        'resumes': len(texts),
+        'cold_resumes_per_s': round(len(texts) / cold, 1),
+        'warm_resumes_per_s': round(len(texts) / warm, 1),
+    }
+
+def bench_extraction(texts, large_texts):
+    results = {}
+    for file_format in FORMATS:
+        for size, sample in (('normal', texts), ('large', large_texts)):
+            files = [synthetic_file(text, file_format) for text in sample]
+            seconds, chars = [], 0
+            for i, data in enumerate(files):
+                start = time.perf_counter()
+                chars += len(extract_text_from_stream(io.BytesIO(data), f"resume_{i}.{file_format}"))
+                seconds.append(time.perf_counter() - start)
+            results[f"{file_format}_{size}"] = dict(latency_summary(seconds), documents=len(files),
+                                                    mean_bytes=sum(map(len, files)) // len(files),
+                                                    mean_chars=chars // len(files))
+    return results
+
+def bench_ats(texts, jd):
+    cleaned = list(clean_texts(texts))
+    cleaned_jd = next(clean_texts([jd]))
+    per_resume = best_of(lambda: [ATSEvaluator(text, cleaned_jd).evaluate() for text in cleaned])
+    engine = ATSRuleEngine(cleaned_jd)
+    batched = best_of(lambda: engine.evaluate_batch(cleaned))
+    return {
+        'resumes': len(cleaned),
+        'evaluator_resumes_per_s': round(len(cleaned) / per_resume, 1),
+        'engine_resumes_per_s': round(len(cleaned) / batched, 1),
+    }
+
+def bench_inference(texts, jd, batch):
+    bundle = ModelStore('app/models').get()
+    model, vectorizer = bundle.model, bundle.vectorizer
+    if not (model and vectorizer):
+        return {'skipped': 'model not trained'}
+    cleaned = list(clean_texts(texts))
+    job_profile = JobProfile(next(clean_texts([jd])), vectorizer)
+    filenames = [f"resume_{i}" for i in range(len(cleaned))]
+    results = {'model': type(model).__name__, 'vectorizer': type(vectorizer).__name__}
+    for size in sorted({1, batch, len(cleaned)}):
+        sample, names = cleaned[:size], filenames[:size]
+        matrix = vectorizer.transform(sample)
+        results[f"batch_{size}"] = {
+            'transform_ms': round(best_of(lambda: vectorizer.transform(sample)) * 1000, 3),
+            'predict_proba_ms': round(best_of(lambda: model.predict_proba(matrix)) * 1000, 3),
+            'score_resumes_ms': round(best_of(lambda: score_resumes(
+                names, sample, job_profile.cleaned, model, vectorizer, matrix, job_profile=job_profile)) * 1000, 3),
+        }
+    return results
+
+def load_app():
+    """
+    Imports app.py as a module with every persistent layer (resume cache,
+    feature store, talent pool, duplicate index, feedback log), duplicate
+    detection, the model watcher and profiling off, so every request does
+    the full work and leaves nothing on disk. A new persistent layer must
+    be switched off here too.
+    """
+    os.environ.update({'RESUME_CACHE_PATH': '', 'FEATURE_STORE_PATH': '', 'TALENT_POOL_PATH': '',
+                       'DEDUP_INDEX_PATH': '', 'DEDUP_THRESHOLD': '0', 'FEEDBACK_PATH': '',
+                       'MODEL_RELOAD_INTERVAL': '0', 'PROFILE_REQUESTS': ''})
+    return runpy.run_path('app.py', run_name='benchmark_app')
+
+def post(client, path, data):
+    response = client.post(path, data=data, content_type='multipart/form-data')
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned {response.status_code}")
+
+def bench_endpoints(texts, requests, batch, seed):
+    namespace = load_app()
+    client = namespace['app'].test_client()
+    # Only the formats the app accepts, cycled so consecutive requests get different files
+    formats = [file_format for file_format in FORMATS if namespace['allowed_file'](f"x.{file_format}")]
+    files = [(f"resume_{i}.{formats[i % len(formats)]}", synthetic_file(text, formats[i % len(formats)]))
+             for i, text in enumerate(texts)]
+    rng = random.Random(seed)
+    jds = list(SAMPLE_JDS.values())
+
+    def predict(i):
+        sample = [files[(i * batch + j) % len(files)] for j in range(batch)]
+        post(client, '/predict', {'job_description': rng.choice(jds),
+                                  'resume_files': [(io.BytesIO(data), name) for name, data in sample]})
+
+    def analyze_ats(i):
+        name, data = files[i % len(files)]
+        post(client, '/analyze_ats', {'resume_file': (io.BytesIO(data), name)})
+
+    results = {}
+    try:
+        for name, fn, per_request in (('predict', predict, batch), ('analyze_ats', analyze_ats, 1)):
+            # One untimed request loads the model and starts the extraction workers
+            fn(requests)
+            seconds = []
+            for i in range(requests):
+                start = time.perf_counter()
+                fn(i)
+                seconds.append(time.perf_counter() - start)
+            total = sum(seconds)
+            results[name] = dict(latency_summary(seconds), requests=requests, resumes_per_request=per_request,
+                                 requests_per_s=round(requests / total, 2),
+                                 resumes_per_s=round(requests * per_request / total, 1))
+    finally:
+        namespace['extraction_pool'].shutdown()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and save the results as JSON.")
+    parser.add_argument('--quick', action='store_true', help="smaller corpus and fewer requests")
+    parser.add_argument('--resumes', type=int, help="corpus size for the clean_text, ATS and inference stages")
+    parser.add_argument('--words', type=int, help="body words per resume")
+    parser.add_argument('--documents', type=int, help="documents per format and size for extraction")
+    parser.add_argument('--large-words', type=int, help="body words per large resume for extraction")
+    parser.add_argument('--requests', type=int, help="timed requests per endpoint")
+    parser.add_argument('--batch', type=int, help="resumes per /predict request")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help=f"result file (default: {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="result file to compare this run against")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    config = dict(SIZES['quick' if args.quick else 'full'], seed=args.seed)
+    for key in ('resumes', 'words', 'documents', 'large_words', 'requests', 'batch'):
+        if getattr(args, key) is not None:
+            config[key] = getattr(args, key)
+
+    rng = random.Random(config['seed'])
+    texts = [synthetic_document(rng, config['words'])[1] for _ in range(config['resumes'])]
+    large_texts = [synthetic_document(rng, config['large_words'])[1] for _ in range(config['documents'])]
+    jd = SAMPLE_JDS['Data Science']
+
+    results = {}
+    stages = [
+        ('clean_text', lambda: bench_clean_text(texts)),
+        ('extraction', lambda: bench_extraction(texts[:config['documents']], large_texts)),
+        ('ats', lambda: bench_ats(texts, jd)),
+        ('inference', lambda: bench_inference(texts, jd, config['batch'])),
+        ('endpoints', lambda: bench_endpoints(texts, config['requests'], config['batch'], config['seed'])),
+    ]
+    for name, stage in stages:
+        print(f"Running {name}...")
+        results[name] = stage()
+
+    commit, dirty = git_commit()
+    report = {
+        'commit': commit,
+        'dirty': dirty,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'packages': {'numpy': np.__version__, 'scikit-learn': sklearn.__version__},
+        'config': config,
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'unversioned'}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"Saved results to {output}")
+
+    if args.compare:
+        sys.exit(1 if compare(load(args.compare), report, args.threshold) else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+import functools
+import io
+import random
+import re
+import docx
+from app.utils.sample_jds import SAMPLE_JDS
+
+FILLER = [
+    "Developed", "Designed", "Implemented", "Managed", "Led", "Improved",
+    "team", "project", "clients", "production", "delivery", "stakeholders",
+    "2019", "2021", "Bangalore", "remote", "B.Tech", "certified"
+]
+
+@functools.lru_cache(maxsize=None)
+def _vocabulary(category):
+    return re.findall(r"[A-Za-z][A-Za-z+#.]*", SAMPLE_JDS[category])
+
+def synthetic_resume(rng, words=300, signal=0.8):
+    """
+    Builds one resume-like text for a random category: a `signal` share of
+    its words comes from that category's sample JD, the rest is generic
+    filler or words from any category's JD.
+    """
+    categories = list(SAMPLE_JDS)
+    category = rng.choice(categories)
+    vocab = _vocabulary(category)
+    tokens = []
+    for _ in range(words):
+        if rng.random() < signal:
+            tokens.append(rng.choice(vocab))
+        elif rng.random() < 0.5:
+            tokens.append(rng.choice(FILLER))
+        else:
+            # Noise from any category's JD makes the classes overlap
+            tokens.append(rng.choice(_vocabulary(rng.choice(categories))))
+    header = f"Candidate {rng.randint(1, 10**6)} candidate{rng.randint(1, 999)}@example.com +91 98765 43210"
+    return category, header + "\n" + " ".join(tokens)
+
+def synthetic_resumes(n, seed=0, words=300, signal=0.8):
+    """
+    Returns n (category, text) pairs generated deterministically from seed.
+    """
+    rng = random.Random(seed)
+    return [synthetic_resume(rng, words, signal) for _ in range(n)]
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def synthetic_pdf(pages, line_chars=90):
+    """
+    Builds a minimal text PDF (Helvetica, one content stream per page) with
+    one entry of `pages` per page, wrapped at line_chars characters.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        lines = [text[i:i + line_chars] for i in range(0, len(text), line_chars)] or ['']
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in lines) + " ET"
+        stream = stream.encode('latin-1', 'replace')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects)))
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def synthetic_docx(paragraphs):
+    """
+    Builds a DOCX with one paragraph per entry of `paragraphs`.
+    """
+    document = docx.Document()
+    for text in paragraphs:
+        document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+FORMATS = ('pdf', 'docx', 'txt')
+SECTION_HEADERS = ['Summary', 'Skills', 'Experience', 'Projects', 'Education']
+ACTION_VERBS = ["Developed", "Designed", "Implemented", "Managed", "Led", "Improved", "Optimized", "Engineered"]
+DEGREES = ["B.Tech Computer Science", "MBA Human Resources", "M.Sc Statistics", "B.Com", "BCA"]
+
+def synthetic_document(rng, words=400, signal=0.8):
+    """
+    Builds one resume laid out like a real one: a contact header, then
+    Summary, Skills, Experience (bullets led by action verbs), Projects and
+    Education sections. The body words are drawn as in synthetic_resume.
+    """
+    category, text = synthetic_resume(rng, words, signal)
+    header, body = text.split('\n', 1)
+    tokens = body.split()
+    skills = sorted({word.rstrip('.') for word in _vocabulary(category) if len(word) > 3})
+    skills = rng.sample(skills, min(12, len(skills)))
+    # Split the body into summary / experience / projects text, experience as 12-word bullets
+    summary, experience, projects = tokens[:words // 8], tokens[words // 8:words * 3 // 4], tokens[words * 3 // 4:]
+    bullets = [f"- {rng.choice(ACTION_VERBS)} " + " ".join(experience[i:i + 12]) for i in range(0, len(experience), 12)]
+    lines = [header, f"linkedin.com/in/candidate{rng.randint(1, 999)}", "",
+             "Summary", " ".join(summary), "",
+             "Skills", ", ".join(skills), "",
+             "Experience", f"{category} at Example Corp, {rng.randint(2012, 2020)} - present", *bullets, "",
+             "Projects", " ".join(projects), "",
+             "Education", f"{rng.choice(DEGREES)}, {rng.randint(2005, 2018)}"]
+    return category, "\n".join(lines)
+
+def synthetic_file(text, file_format, page_words=500):
+    """
+    Encodes a resume text as a PDF (page_words words per page), DOCX (one
+    paragraph per line) or UTF-8 TXT file; returns its bytes.
+    """
+    if file_format == 'pdf':
+        lines, pages, count = text.split('\n'), [''], 0
+        for line in lines:
+            if count >= page_words:
+                pages.append('')
+                count = 0
+            # synthetic_pdf wraps each page's text into fixed-width lines
+            pages[-1] += line + ' '
+            count += len(line.split())
+        return synthetic_pdf(pages)
+    if file_format == 'docx':
+        return synthetic_docx(text.split('\n'))
+    if file_format == 'txt':
+        return text.encode('utf-8')
+    raise ValueError(f"Unknown format: {file_format}")
+
+def synthetic_corpus(n, formats=FORMATS, words=400, seed=0, signal=0.8):
+    """
+    Returns n (category, filename, bytes) resume files generated
+    deterministically from seed, cycling through `formats`.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(n):
+        category, text = synthetic_document(rng, words, signal)
+        file_format = formats[i % len(formats)]
+        corpus.append((category, f"resume_{i:05d}.{file_format}", synthetic_file(text, file_format)))
+    return corpus
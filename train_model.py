@@ -1,80 +1,221 @@
+import argparse
+import shutil
+import time
 import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.model_selection import train_test_split
 from sklearn.neighbors import KNeighborsClassifier
-from sklearn.svm import SVC
-from sklearn.multiclass import OneVsRestClassifier
 from sklearn.metrics import accuracy_score
 import joblib
 import os
-from app.utils.preprocessing import clean_text
-
-# 1. Create a Synthetic Dataset
-# In a real project, this would be loaded from a CSV/Kaggle dataset
-print("Creating synthetic dataset...")
-data = {
-    'Resume_Text': [
-        "Java Developer, Spring Boot, Hibernate, SQL, Microservices, JUnit, Maven, REST API", # Java Dev
-        "Python Developer, Django, Flask, Pandas, NumPy, SQL, API Development", # Python Dev
-        "Data Scientist, Machine Learning, Deep Learning, NLP, TensorFlow, Keras, Python, Statistics", # Data Science
-        "Web Designer, HTML, CSS, JavaScript, React, Bootstrap, Photoshop, UI/UX", # Web Designer
-        "HR Manager, Recruitment, Employee Relations, Payroll, Compliance, Communication", # HR
-        "Sales Executive, Marketing, CRM, Lead Generation, Negotiation, Business Development", # Sales
-        "Android Developer, Kotlin, Java, XML, Android SDK, Dagger, Retrofit", # Android
-        "DevOps Engineer, AWS, Docker, Kubernetes, Jenkins, Linux, CI/CD", # DevOps
+from app.utils.feature_store import FEATURES_DIR, FeatureStore
+from app.utils.lsa import LSA_FILE, fit_lsa
+from app.utils.mapped_artifacts import MAPPED_DIR, export_artifacts
+from app.utils.model_backends import BACKENDS, DEFAULT_BACKEND, build_classifier, compile_model
+from app.utils.model_loader import artifact_dir, artifact_version, publish_version, stage_version
+from app.utils.preprocessing import clean_texts, save_lemma_cache
+from app.utils.streaming_trainer import STREAMING_BACKENDS, VECTORIZERS, StreamingTrainer
+from app.utils.text_cache import content_digest
+
+MODEL_DIR = 'app/models'
+
+def train_in_memory(args, features=None):
+    """
+    Loads the whole dataset, fits TF-IDF and the chosen backend in one go.
+    The training matrix is appended to `features` (a FeatureStore) if given.
+    """
+    # 1. Create a Synthetic Dataset
+    # In a real project, this would be loaded from a CSV/Kaggle dataset
+    print("Creating synthetic dataset...")
+    data = {
+        'Resume_Text': [
+            "Java Developer, Spring Boot, Hibernate, SQL, Microservices, JUnit, Maven, REST API", # Java Dev
+            "Python Developer, Django, Flask, Pandas, NumPy, SQL, API Development", # Python Dev
+            "Data Scientist, Machine Learning, Deep Learning, NLP, TensorFlow, Keras, Python, Statistics", # Data Science
+            "Web Designer, HTML, CSS, JavaScript, React, Bootstrap, Photoshop, UI/UX", # Web Designer
+            "HR Manager, Recruitment, Employee Relations, Payroll, Compliance, Communication", # HR
+            "Sales Executive, Marketing, CRM, Lead Generation, Negotiation, Business Development", # Sales
+            "Android Developer, Kotlin, Java, XML, Android SDK, Dagger, Retrofit", # Android
+            "DevOps Engineer, AWS, Docker, Kubernetes, Jenkins, Linux, CI/CD", # DevOps
         
-        # Variations
-        "Expert in Java and Spring framework, built scalable microservices.",
-        "Experienced Data Analyst with strong Python and ML skills.",
-        "Front-end developer proficient in React.js and Tailwind CSS.",
-        "Human Resources professional with 5 years in talent acquisition.",
+            # Variations
+            "Expert in Java and Spring framework, built scalable microservices.",
+            "Experienced Data Analyst with strong Python and ML skills.",
+            "Front-end developer proficient in React.js and Tailwind CSS.",
+            "Human Resources professional with 5 years in talent acquisition.",
         
-        # More specific data for better training
-        "Implemented RESTful web services using Java and Spring Boot.",
-        "Developed neural networks for image classification using PyTorch.",
-        "Designed responsive websites using HTML5 and CSS3.",
-        "Managed end-to-end recruitment lifecycle for technical roles."
-    ],
-    'Category': [
-        'Java Developer', 'Python Developer', 'Data Science', 'Web Designing', 'HR', 'Sales', 'Android Developer', 'DevOps',
-        'Java Developer', 'Data Science', 'Web Designing', 'HR',
-        'Java Developer', 'Data Science', 'Web Designing', 'HR'
-    ]
-}
-
-df = pd.read_csv('data/resumes_dataset.csv') if os.path.exists('data/resumes_dataset.csv') else pd.DataFrame(data)
-
-# If using synthetic data, let's duplicate it to have enough for a split if needed, 
-# but for a demo, we will just train on all of it if small.
-if len(df) < 50:
-    df = pd.concat([df]*5, ignore_index=True)
-
-print(f"Dataset size: {len(df)}")
-
-# 2. Preprocessing
-print("Cleaning text...")
-df['Cleaned_Resume'] = df['Resume_Text'].apply(clean_text)
-
-# 3. Feature Extraction
-print("Vectorizing...")
-tfidf = TfidfVectorizer(max_features=2000)
-X = tfidf.fit_transform(df['Cleaned_Resume'])
-y = df['Category']
-
-# 4. Model Training
-print("Training model...")
-# Using OneVsRest with SVC for multi-class classification
-clf = OneVsRestClassifier(SVC(kernel='linear', probability=True))
-clf.fit(X, y)
-
-# 5. Evaluation
-print(f"Model Accuracy on training set: {clf.score(X, y):.4f}")
-
-# 6. Save Artifacts
-print("Saving model and vectorizer...")
-os.makedirs('app/models', exist_ok=True)
-joblib.dump(clf, 'app/models/model.pkl')
-joblib.dump(tfidf, 'app/models/vectorizer.pkl')
-
-print("Done! Models saved to app/models/")
+            # More specific data for better training
+            "Implemented RESTful web services using Java and Spring Boot.",
+            "Developed neural networks for image classification using PyTorch.",
+            "Designed responsive websites using HTML5 and CSS3.",
+            "Managed end-to-end recruitment lifecycle for technical roles."
+        ],
+        'Category': [
+            'Java Developer', 'Python Developer', 'Data Science', 'Web Designing', 'HR', 'Sales', 'Android Developer', 'DevOps',
+            'Java Developer', 'Data Science', 'Web Designing', 'HR',
+            'Java Developer', 'Data Science', 'Web Designing', 'HR'
+        ]
+    }
+
+    df = pd.read_csv('data/resumes_dataset.csv') if os.path.exists('data/resumes_dataset.csv') else pd.DataFrame(data)
+
+    # If using synthetic data, let's duplicate it to have enough for a split if needed, 
+    # but for a demo, we will just train on all of it if small.
+    if len(df) < 50:
+        df = pd.concat([df]*5, ignore_index=True)
+
+    print(f"Dataset size: {len(df)}")
+
+    # 2. Preprocessing
+    print("Cleaning text...")
+    df['Cleaned_Resume'] = list(clean_texts(df['Resume_Text']))
+
+    # 3. Feature Extraction
+    print("Vectorizing...")
+    tfidf = TfidfVectorizer(max_features=args.max_features)
+    X = tfidf.fit_transform(df['Cleaned_Resume'])
+    y = df['Category']
+    if features is not None:
+        # Every row is kept (duplicates included), keyed by the SHA-256 of its resume text
+        digests = [content_digest(str(text).encode('utf-8')) for text in df['Resume_Text']]
+        features.append(digests, X, y.to_numpy(), skip_existing=False)
+
+    # 4. Model Training
+    print(f"Training model ({args.backend})...")
+    start = time.perf_counter()
+    clf = build_classifier(args.backend)
+    clf.fit(X, y)
+    # Linear backends are saved as a plain coefficient matrix for one-matmul inference
+    clf = compile_model(clf)
+    print(f"Training took {time.perf_counter() - start:.2f}s")
+
+    # 5. Evaluation
+    print(f"Model Accuracy on training set: {accuracy_score(y, clf.predict(X)):.4f}")
+    return clf, tfidf
+
+def train_streaming(args, features=None):
+    """
+    Trains out of core from --csv with partial_fit, for datasets that do not fit in memory.
+    """
+    trainer = StreamingTrainer(
+        args.csv, chunksize=args.chunksize, workers=args.workers,
+        vectorizer=args.vectorizer, backend=args.streaming_backend, epochs=args.epochs
+    )
+    clf, vectorizer, accuracy = trainer.run(features)
+    if accuracy is not None:
+        print(f"Model Accuracy on holdout rows: {accuracy:.4f}")
+    return clf, vectorizer
+
+def train_from_features(args, features=None):
+    """
+    Refits the chosen backend on the training matrix stored with the current
+    model version, reusing its vectorizer: no text is read or cleaned.
+    """
+    directory = artifact_dir(MODEL_DIR)
+    if not os.path.exists(os.path.join(directory, FEATURES_DIR, 'meta.json')):
+        raise SystemExit(f"No training features stored in {directory}; train from text first.")
+    X, digests, y = FeatureStore(os.path.join(directory, FEATURES_DIR)).matrix()
+    if y is None or not len(digests):
+        raise SystemExit(f"The features stored in {directory} have no labels.")
+    tfidf = joblib.load(os.path.join(directory, 'vectorizer.pkl'))
+    print(f"Loaded {X.shape[0]} stored training rows ({X.shape[1]} features)")
+
+    print(f"Training model ({args.backend})...")
+    start = time.perf_counter()
+    clf = compile_model(build_classifier(args.backend).fit(X, y))
+    print(f"Training took {time.perf_counter() - start:.2f}s")
+    print(f"Model Accuracy on training set: {accuracy_score(y, clf.predict(X)):.4f}")
+    if features is not None:
+        features.append(digests, X, y, skip_existing=False)
+    return clf, tfidf
+
+def export_mapped(clf, tfidf, directory):
+    """
+    Exports the saved artifacts as .npy arrays that app workers memory-map
+    and share instead of each unpickling a copy.
+    """
+    version = artifact_version(os.path.join(directory, 'model.pkl'), os.path.join(directory, 'vectorizer.pkl'))
+    if export_artifacts(clf, tfidf, os.path.join(directory, MAPPED_DIR), version):
+        print("Exported memory-mapped artifacts.")
+    else:
+        print("Vectorizer has no memory-mapped form; the app will load the pickles.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the resume classifier and vectorizer.")
+    parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help=f"classifier backend (default: {DEFAULT_BACKEND}; 'svc' is the original kernel SVC)")
+    parser.add_argument('--streaming', action='store_true',
+                        help="train out of core from --csv in chunks instead of loading it whole")
+    parser.add_argument('--csv', default='data/resumes_dataset.csv',
+                        help="CSV with Resume_Text and Category columns (streaming mode)")
+    parser.add_argument('--streaming-backend', choices=STREAMING_BACKENDS, default='sgd',
+                        help="partial_fit classifier for streaming mode (default: sgd)")
+    parser.add_argument('--vectorizer', choices=VECTORIZERS, default='vocabulary',
+                        help="streaming vectorizer: exact top-2000 vocabulary, or fixed-memory hashing")
+    parser.add_argument('--chunksize', type=int, default=5000, help="rows per chunk (streaming mode)")
+    parser.add_argument('--workers', type=int, default=None, help="cleaning processes (default: CPU count)")
+    parser.add_argument('--epochs', type=int, default=1, help="passes over the data (streaming mode)")
+    parser.add_argument('--export-mapped', action='store_true',
+                        help="only re-export the saved model.pkl/vectorizer.pkl as memory-mapped arrays")
+    parser.add_argument('--keep-versions', type=int, default=3,
+                        help="published model versions to keep in app/models/versions (default: 3)")
+    parser.add_argument('--from-features', action='store_true',
+                        help="refit --backend on the training features stored with the current version")
+    parser.add_argument('--no-features', action='store_true',
+                        help=f"don't keep the training matrix in the version's {FEATURES_DIR}/ directory")
+    parser.add_argument('--max-features', type=int, default=2000,
+                        help="TF-IDF vocabulary size (in-memory training; default: 2000)")
+    parser.add_argument('--lsa', type=int, default=0, metavar='N',
+                        help="also fit an N-dimension LSA projection (TruncatedSVD) of the training features, "
+                             "used for semantic scores instead of raw TF-IDF cosine (e.g. 200; default: off)")
+    args = parser.parse_args()
+    if args.lsa and args.no_features:
+        parser.error("--lsa is fitted on the stored training features; drop --no-features")
+
+    if args.export_mapped:
+        directory = artifact_dir(MODEL_DIR)
+        export_mapped(joblib.load(os.path.join(directory, 'model.pkl')),
+                      joblib.load(os.path.join(directory, 'vectorizer.pkl')), directory)
+        return
+
+    # Everything is written to a staging directory first; the app only sees the version once it is complete
+    staging = stage_version(MODEL_DIR)
+    try:
+        # The training matrix is stored with the version, for retraining without re-cleaning
+        features = None if args.no_features else FeatureStore(os.path.join(staging, FEATURES_DIR))
+        if args.from_features:
+            clf, tfidf = train_from_features(args, features)
+        elif args.streaming:
+            clf, tfidf = train_streaming(args, features)
+        else:
+            clf, tfidf = train_in_memory(args, features)
+        if features is not None:
+            # One segment, so loading it back is a memory map rather than a copy
+            features.compact()
+        lsa = None
+        if args.lsa:
+            print(f"Fitting {args.lsa}-dimension LSA projection...")
+            start = time.perf_counter()
+            lsa, variance = fit_lsa(features.matrix()[0], args.lsa)
+            print(f"LSA took {time.perf_counter() - start:.2f}s: {lsa.n_components} dimensions "
+                  f"keep {variance:.1%} of the variance")
+
+        # 6. Save Artifacts
+        print("Saving model and vectorizer...")
+        joblib.dump(clf, os.path.join(staging, 'model.pkl'))
+        joblib.dump(tfidf, os.path.join(staging, 'vectorizer.pkl'))
+        # Ship the lemma table so the app starts with a warm preprocessing cache
+        save_lemma_cache(os.path.join(staging, 'lemmas.pkl'))
+        if lsa is not None:
+            lsa.save(os.path.join(staging, LSA_FILE))
+        export_mapped(clf, tfidf, staging)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    name = publish_version(MODEL_DIR, staging, keep=args.keep_versions)
+
+    print(f"Done! Models saved to {artifact_dir(MODEL_DIR, name)} (now current)")
+
+if __name__ == '__main__':
+    main()